@@ -0,0 +1,42 @@
+"""
+Conditional GET helpers (ETag / Last-Modified).
+
+Endpoints serving rarely-changing, pre-serialized JSON answer
+If-None-Match with 304 Not Modified, so clients revalidate without
+downloading (or the server re-serializing) the body.
+"""
+from datetime import datetime
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+
+def conditional_json_response(
+    body: bytes,
+    etag: str,
+    last_modified: datetime,
+    if_none_match: Optional[str] = None
+) -> Response:
+    """
+    Serve pre-serialized JSON with validators, or 304 if the client copy is current.
+    Cache-Control makes browsers revalidate on every use instead of trusting a stale copy.
+    """
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache"
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -3,8 +3,16 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
 
-from app.core.security import decode_access_token, verify_telegram_hash, verify_telegram_init_data, verify_external_token
+from app.core.security import (
+    verify_bearer_token,
+    verify_telegram_hash,
+    verify_telegram_init_data,
+    TOKEN_KIND_ACCESS,
+    TOKEN_KIND_EXTERNAL
+)
 from app.models.user import User
+from app.services.user_cache import user_cache
+from app.services.index_audit import register_query_shape
 
 security = HTTPBearer()
 
@@ -17,6 +25,9 @@ async def get_current_user(
     1. BE JWT token (for Telegram users)
     2. External app JWT token (for external users like Katalis)
     
+    Users are served from user_cache when possible, so most requests
+    need no database lookup for identity.
+    
     Raises:
         HTTPException: If token is invalid or user not found
     """
@@ -28,18 +39,23 @@ async def get_current_user(
     
     token = credentials.credentials
     
-    # Try to decode as BE JWT token (for Telegram users)
-    payload = decode_access_token(token)
-    if payload:
+    # Verify once per token (cached until exp), routed by token kind
+    kind, payload = verify_bearer_token(token)
+    
+    # BE JWT token (for Telegram users)
+    if kind == TOKEN_KIND_ACCESS:
         # Get user ID from token
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
         
-        # Get user from database
-        user = await User.get(user_id)
+        # Get user from cache, falling back to the database
+        user = user_cache.get_by_id(user_id)
         if user is None:
-            raise credentials_exception
+            user = await User.get(user_id)
+            if user is None:
+                raise credentials_exception
+            user_cache.put(user)
         
         if not user.is_active:
             raise HTTPException(
@@ -49,21 +65,23 @@ async def get_current_user(
         
         return user
     
-    # Try to decode as external app JWT token (for external users)
-    external_payload = verify_external_token(token)
-    if external_payload:
+    # External app JWT token (for external users)
+    if kind == TOKEN_KIND_EXTERNAL:
         # Get external user ID from token
-        external_user_id: str = external_payload.get("userId")
+        external_user_id: str = payload.get("userId")
         if external_user_id is None:
             raise credentials_exception
         
-        # Get user from database by external_user_id
-        user = await User.find_one(
-            User.external_user_id == external_user_id
-        )
-        
+        # Get user from cache, falling back to the database by external_user_id
+        user = user_cache.get_by_external_id(external_user_id)
         if user is None:
-            raise credentials_exception
+            user = await User.find_one(
+                User.external_user_id == external_user_id
+            )
+            
+            if user is None:
+                raise credentials_exception
+            user_cache.put(user)
         
         if not user.is_active:
             raise HTTPException(
@@ -119,6 +137,13 @@ async def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
     return await User.find_one(User.telegram_id == telegram_id)
 
 
+register_query_shape(
+    "user by Telegram ID (login, bot handlers)",
+    User,
+    lambda: {"telegram_id": 123456789}
+)
+
+
 def verify_telegram_auth(query_string: str) -> bool:
     """
     Verify Telegram authentication data.
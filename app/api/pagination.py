@@ -0,0 +1,70 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor encodes the sort value and _id of the last item of a page, so the
+next page is fetched with an indexed range query instead of skip/offset.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, document_id: ObjectId) -> str:
+    """Encode (sort_value, _id) of the last item of a page as an opaque cursor."""
+    if isinstance(sort_value, datetime):
+        payload = {"t": sort_value.isoformat(), "id": str(document_id)}
+    else:
+        payload = {"v": sort_value, "id": str(document_id)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = datetime.fromisoformat(payload["t"]) if "t" in payload else payload["v"]
+        return sort_value, ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_filter(field: str, cursor: Optional[str], descending: bool = True) -> Dict[str, Any]:
+    """
+    Build the MongoDB filter selecting items after the cursor for a sort on (field, _id).
+    Returns an empty filter for the first page.
+    """
+    if not cursor:
+        return {}
+    
+    sort_value, document_id = decode_cursor(cursor)
+    operator = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {field: {operator: sort_value}},
+            {field: sort_value, "_id": {operator: document_id}}
+        ]
+    }
+
+
+def stringify_object_ids(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert top-level ObjectId values of a raw MongoDB document to strings."""
+    return {
+        key: str(value) if isinstance(value, ObjectId) else value
+        for key, value in document.items()
+    }
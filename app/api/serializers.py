@@ -0,0 +1,93 @@
+"""
+Fast JSON serialization for list endpoints.
+
+The model path (Booking -> dict -> BookingResponse -> response_model
+validation -> jsonable_encoder -> json) validates every booking several
+times. For lists, raw Motor documents fetched with the response
+projection are reshaped into the response layout and encoded with orjson
+in one pass, without any pydantic validation.
+"""
+from typing import Any, Dict, Iterable, Optional, Type, Union
+
+import orjson
+from bson import ObjectId
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.models.booking import Booking
+from app.schemas.booking import BookingResponse
+
+
+def _is_model(type_: Any) -> bool:
+    return isinstance(type_, type) and issubclass(type_, BaseModel)
+
+
+def build_projection(model: Type[BaseModel], prefix: str = "") -> Dict[str, int]:
+    """MongoDB projection selecting exactly the (nested) fields of a response model."""
+    projection = {}
+    for field in model.__fields__.values():
+        name = f"{prefix}{field.alias}"
+        if _is_model(field.type_):
+            projection.update(build_projection(field.type_, f"{name}."))
+        else:
+            projection[name] = 1
+    return projection
+
+
+def to_response_dict(document: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Reshape a raw document into the response model layout without validation:
+    only model fields, defaults for missing ones, ObjectIds as strings.
+    """
+    result = {}
+    for field in model.__fields__.values():
+        if field.alias in document:
+            value = document[field.alias]
+        else:
+            value = field.get_default()
+        if isinstance(value, ObjectId):
+            value = str(value)
+        elif isinstance(value, dict) and _is_model(field.type_):
+            value = to_response_dict(value, field.type_)
+        result[field.alias] = value
+    return result
+
+
+BOOKING_RESPONSE_PROJECTION = build_projection(BookingResponse)
+
+
+def serialize_bookings(documents: Iterable[Union[Dict[str, Any], Booking]]) -> bytes:
+    """Encode bookings (raw documents or Booking models) as a BookingResponse JSON list."""
+    return orjson.dumps([
+        to_response_dict(
+            document.dict(by_alias=True) if isinstance(document, BaseModel) else document,
+            BookingResponse
+        )
+        for document in documents
+    ])
+
+
+def booking_list_response(
+    documents: Iterable[Union[Dict[str, Any], Booking]],
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """JSON response with a list of bookings, bypassing response_model validation."""
+    return Response(content=serialize_bookings(documents), media_type="application/json", headers=headers)
+
+
+def convert_booking_to_response(booking: Booking) -> BookingResponse:
+    """
+    Convert a Booking model to BookingResponse by converting ObjectId fields to strings.
+    Used for single-booking responses; lists go through serialize_bookings.
+    """
+    booking_dict = booking.dict(by_alias=True)
+    # Convert ObjectId fields to strings
+    if "_id" in booking_dict and booking_dict["_id"] is not None:
+        booking_dict["_id"] = str(booking_dict["_id"])
+    if "user_id" in booking_dict and booking_dict["user_id"] is not None:
+        booking_dict["user_id"] = str(booking_dict["user_id"])
+    if "room_id" in booking_dict and booking_dict["room_id"] is not None:
+        booking_dict["room_id"] = str(booking_dict["room_id"])
+    if "cancelled_by" in booking_dict and booking_dict["cancelled_by"] is not None:
+        booking_dict["cancelled_by"] = str(booking_dict["cancelled_by"])
+    return BookingResponse(**booking_dict)
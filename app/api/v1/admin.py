@@ -1,12 +1,14 @@
 from typing import List, Optional
-from datetime import datetime, timezone
+from datetime import datetime, timezone, date, time, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from bson import ObjectId
 
 from app.models.booking import Booking
 from app.models.user import User
-from app.models.room import Room
 from app.models.setting import Setting
 from app.schemas.admin import SettingResponse, SettingUpdate
 from app.schemas.dashboard import DashboardStats
@@ -21,44 +23,41 @@ from app.schemas.user_management import (
 )
 from app.services.booking_service import cancel_booking
 from app.services.dashboard_service import get_dashboard_statistics
-from app.services.scheduler_service import get_pending_cleanup_count, get_recent_ended_bookings
+from app.services.settings_service import settings_cache
+from app.services.user_service import search_users
+from app.services.history_service import HISTORY_MAX_PAGE_SIZE, get_history_page
+from app.services.room_catalog import room_catalog
+from app.services.booking_index import to_utc_naive
+from app.services.user_cache import user_cache
+from app.services.scheduler_service import (
+    scheduler,
+    get_pending_cleanup_count,
+    get_recent_ended_bookings,
+    get_booking_timer_jobs
+)
+from app.services.leader_service import scheduler_leader
 from app.core.config import settings
 from app.api.deps import get_current_admin_user
-from app.schemas.booking import BookingResponse
+from app.api.conditional import conditional_json_response
+from app.api.serializers import (
+    BOOKING_RESPONSE_PROJECTION,
+    booking_list_response,
+    convert_booking_to_response,
+    to_response_dict
+)
+from app.api.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter, stringify_object_ids
+from app.schemas.booking import BookingResponse, BookingHistoryListResponse, BookingHistoryResponse
 from app.schemas.room import RoomResponse
 from app.schemas.auth import UserResponse
-from app.services.telegram_service import test_notification
+from app.services.telegram_service import test_notification, get_send_queue_metrics
+from app.bot.webhook import get_webhook_stats
+from app.bot.update_queue import webhook_queue
+from app.services.history_journal import history_journal
+from app.services.index_audit import register_query_shape
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-def convert_booking_to_response(booking: Booking) -> BookingResponse:
-    """
-    Convert a Booking model to BookingResponse by converting ObjectId fields to strings.
-    """
-    booking_dict = booking.dict(by_alias=True)
-    # Convert ObjectId fields to strings
-    if "_id" in booking_dict and booking_dict["_id"] is not None:
-        booking_dict["_id"] = str(booking_dict["_id"])
-    if "user_id" in booking_dict and booking_dict["user_id"] is not None:
-        booking_dict["user_id"] = str(booking_dict["user_id"])
-    if "room_id" in booking_dict and booking_dict["room_id"] is not None:
-        booking_dict["room_id"] = str(booking_dict["room_id"])
-    if "cancelled_by" in booking_dict and booking_dict["cancelled_by"] is not None:
-        booking_dict["cancelled_by"] = str(booking_dict["cancelled_by"])
-    return BookingResponse(**booking_dict)
-
-
-def convert_room_to_response(room: Room) -> RoomResponse:
-    """
-    Convert a Room model to RoomResponse by converting ObjectId fields to strings.
-    """
-    room_dict = room.dict(by_alias=True)
-    if "_id" in room_dict and room_dict["_id"] is not None:
-        room_dict["_id"] = str(room_dict["_id"])
-    return RoomResponse(**room_dict)
-
-
 def convert_user_to_response(user: User) -> UserResponse:
     """
     Convert a User model to UserResponse by converting ObjectId fields to strings.
@@ -87,15 +86,95 @@ def convert_user_to_management_response(user: User) -> UserManagementResponse:
     )
 
 
+ADMIN_BOOKINGS_MAX_PAGE_SIZE = 500
+
+
+def parse_object_id(value: str, name: str) -> ObjectId:
+    """Parse an ObjectId query parameter, raising 400 if invalid."""
+    try:
+        return ObjectId(value)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {name} format"
+        )
+
+
 @router.get("/bookings", response_model=List[BookingResponse])
 async def get_all_bookings(
+    limit: int = Query(100, ge=1, le=ADMIN_BOOKINGS_MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status (active/cancelled)"),
+    room_id: Optional[str] = Query(None, description="Filter by room ID"),
+    user_id: Optional[str] = Query(None, description="Filter by user ID"),
+    published: Optional[bool] = Query(None, description="Filter by published flag"),
+    start_date: Optional[date] = Query(None, description="Bookings starting on/after this date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Bookings starting on/before this date (YYYY-MM-DD)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (projection)"),
     current_user: User = Depends(get_current_admin_user)
 ):
     """
-    Get all bookings from all users (Admin only).
+    Get bookings from all users, newest first (Admin only).
+    
+    Uses keyset pagination on (created_at, _id): pass the X-Next-Cursor response
+    header as `cursor` to fetch the next page. The header is absent on the last page.
+    
+    With `fields`, only those fields (plus _id) are returned, without response validation.
     """
-    bookings = await Booking.find().sort(-Booking.created_at).to_list()
-    return [convert_booking_to_response(booking) for booking in bookings]
+    query = {}
+    
+    if status_filter:
+        query["status"] = status_filter
+    if room_id:
+        query["room_id"] = parse_object_id(room_id, "room ID")
+    if user_id:
+        query["user_id"] = parse_object_id(user_id, "user ID")
+    if published is not None:
+        query["published"] = published
+    if start_date or end_date:
+        # Dates are local days (settings.timezone); MongoDB stores naive UTC
+        query["start_time"] = {}
+        if start_date:
+            query["start_time"]["$gte"] = to_utc_naive(datetime.combine(start_date, time.min, tzinfo=settings.timezone))
+        if end_date:
+            query["start_time"]["$lt"] = to_utc_naive(datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=settings.timezone))
+    
+    query.update(keyset_filter("created_at", cursor))
+    sort = [("created_at", -1), ("_id", -1)]
+    
+    if fields:
+        projection = {field.strip(): 1 for field in fields.split(",") if field.strip()}
+        projection["created_at"] = 1  # Needed for the cursor
+        documents = await Booking.get_motor_collection().find(query, projection).sort(sort).limit(limit + 1).to_list(None)
+        
+        headers = {}
+        if len(documents) > limit:
+            documents = documents[:limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1]["created_at"], documents[-1]["_id"])
+        
+        return JSONResponse(
+            content=jsonable_encoder([stringify_object_ids(document) for document in documents]),
+            headers=headers
+        )
+    
+    documents = await Booking.get_motor_collection().find(
+        query, BOOKING_RESPONSE_PROJECTION
+    ).sort(sort).limit(limit + 1).to_list(None)
+    
+    headers = {}
+    if len(documents) > limit:
+        documents = documents[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1]["created_at"], documents[-1]["_id"])
+    
+    return booking_list_response(documents, headers=headers)
+
+
+register_query_shape(
+    "all bookings, newest first (GET /admin/bookings)",
+    Booking,
+    lambda: {},
+    sort=[("created_at", -1), ("_id", -1)]
+)
 
 
 @router.delete("/bookings/{booking_id}", response_model=BookingResponse)
@@ -124,37 +203,55 @@ async def admin_cancel_booking(
 
 @router.get("/rooms", response_model=List[RoomResponse])
 async def get_all_rooms(
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_admin_user)
 ):
     """
     Get all rooms including inactive ones (Admin only).
+    
+    Served from the room catalog cache; supports If-None-Match (304).
     """
-    rooms = await Room.find().sort(Room.name).to_list()
-    return [convert_room_to_response(room) for room in rooms]
+    entry = await room_catalog.get(active_only=False)
+    return conditional_json_response(entry.body, entry.etag, entry.last_modified, if_none_match)
+
+
+ADMIN_USERS_MAX_PAGE_SIZE = 200
 
 
 @router.get("/users", response_model=UserListResponse)
 async def get_all_users(
     role: Optional[str] = Query("all", description="Filter by role: 'all' or 'admin'"),
+    search: Optional[str] = Query(None, min_length=1, max_length=100, description="Prefix of name, username or division"),
+    limit: int = Query(50, ge=1, le=ADMIN_USERS_MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: str = Query("exact", regex="^(exact|estimate|none)$", description="Total count mode"),
     current_user: User = Depends(get_current_admin_user)
 ):
     """
-    Get all registered users (Admin only).
+    Get registered users, newest first, one page at a time (Admin only).
     
     Query Parameters:
     - role: Filter users by role ('all' for all users, 'admin' for admin users only)
+    - search: Case-insensitive prefix matched against any word of full name, username or division
+    - limit: Page size (max 200)
+    - cursor: Cursor from the previous page's next_cursor
+    - count: 'exact' total, 'estimate' (fast, exact only without filters) or 'none' to skip counting
     """
     try:
-        # Build query based on role filter
-        if role == "admin":
-            users = await User.find(User.is_admin == True).sort(-User.created_at).to_list()
-        else:  # role == "all" or any other value
-            users = await User.find().sort(-User.created_at).to_list()
+        users, total, next_cursor = await search_users(
+            role=role,
+            search=search,
+            cursor=cursor,
+            limit=limit,
+            count=count
+        )
         
         # Convert users to management response format
         user_responses = [convert_user_to_management_response(user) for user in users]
         
-        return UserListResponse(users=user_responses, total=len(user_responses))
+        return UserListResponse(users=user_responses, total=total, next_cursor=next_cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -187,6 +284,7 @@ async def toggle_user_admin_role(
         user.is_admin = request.is_admin
         user.updated_at = datetime.now(timezone.utc)
         await user.save()
+        user_cache.invalidate(user)
         
         # Return success response
         user_response = convert_user_to_management_response(user)
@@ -226,6 +324,7 @@ async def toggle_user_active_status(
         user.is_active = request.is_active
         user.updated_at = datetime.now(timezone.utc)
         await user.save()
+        user_cache.invalidate(user)
         
         # Return success response
         user_response = convert_user_to_management_response(user)
@@ -265,6 +364,7 @@ async def update_user_avatar(
         user.avatar_url = request.avatar
         user.updated_at = datetime.now(timezone.utc)
         await user.save()
+        user_cache.invalidate(user)
         
         # Return success response
         user_response = convert_user_to_management_response(user)
@@ -279,6 +379,29 @@ async def update_user_avatar(
         )
 
 
+@router.get("/users/{user_id}/history", response_model=BookingHistoryListResponse)
+async def get_user_history(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get booking changes made by a user, newest first, one page at a time (Admin only).
+    """
+    user_obj_id = parse_object_id(user_id, "user ID")
+    documents, next_cursor = await get_history_page(
+        entry_filter={"changed_by": user_obj_id},
+        bucket_filter={"changed_by": user_obj_id},
+        cursor=cursor,
+        limit=limit
+    )
+    return BookingHistoryListResponse(
+        items=[to_response_dict(document, BookingHistoryResponse) for document in documents],
+        next_cursor=next_cursor
+    )
+
+
 @router.get("/settings/group-ids")
 async def get_group_ids(
     current_user: User = Depends(get_current_admin_user)
@@ -349,6 +472,8 @@ async def update_group_ids(
             )
             await new_setting.insert()
     
+    settings_cache.invalidate()
+    
     return {
         "message": "Group IDs updated successfully",
         "default_consumption_group_id": data.default_consumption_group_id,
@@ -424,6 +549,7 @@ async def update_setting(
     
     setting.updated_by = current_user.id
     await setting.save()
+    settings_cache.invalidate()
     
     # Convert ObjectId fields to strings for response
     setting_dict = setting.dict(by_alias=True)
@@ -469,6 +595,8 @@ async def get_dashboard_stats(
         - active_rooms: Active rooms only
         - total_users: Total users (active + inactive)
         - active_users: Active users only
+        - room_utilization: Per room bookings, booked minutes and share of operating hours this week
+        - peak_hours: Active bookings this week per local start hour (0-23)
     """
     stats = await get_dashboard_statistics()
     return DashboardStats(**stats)
@@ -515,8 +643,10 @@ async def get_scheduler_status(
             "pending_count": pending_count,
             "recent_ended": bookings_data,
             "scheduler_info": {
-                "runs_every_minutes": 5,
-                "status": "active"
+                "runs_every_minutes": settings.SCHEDULER_CLEANUP_SWEEP_MINUTES,
+                "pending_timers": len(await get_booking_timer_jobs()),
+                "status": ("active" if scheduler_leader.is_leader else "standby") if scheduler.running else "stopped",
+                "instance": scheduler_leader.holder
             }
         }
     except Exception as e:
@@ -526,3 +656,51 @@ async def get_scheduler_status(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting scheduler status: {str(e)}"
         )
+
+
+@router.get("/telegram/send-queue")
+async def get_telegram_send_queue_status(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get Telegram send queue metrics (Admin only).
+    
+    Returns:
+        - queue_depth / queue_depth_by_chat: Messages waiting for a rate-limit token
+        - throttled_chats: Chats currently paused by Telegram flood control
+        - sent, failed, coalesced, retry_after: Counters since process start
+        - latency_p50, latency_p95, latency_max: Queue-to-delivery latency in seconds
+    """
+    return get_send_queue_metrics()
+
+
+@router.get("/telegram/webhook-stats")
+async def get_telegram_webhook_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get Telegram webhook counters of this process (Admin only).
+    
+    Returns:
+        - queue_depth: Updates waiting for a webhook worker
+        - by_type: Per update type counts of received, dropped (no handler), processed and failed updates
+    """
+    return {
+        "queue_depth": webhook_queue.depth,
+        "by_type": get_webhook_stats()
+    }
+
+
+@router.get("/history-journal")
+async def get_history_journal_status(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get booking history journal metrics of this process (Admin only).
+    
+    Returns:
+        - mode: buffered (write-behind) or transactional
+        - buffered: History records waiting to be written
+        - written, flushes, failed_flushes: Counters since process start
+    """
+    return history_journal.get_metrics()
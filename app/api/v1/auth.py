@@ -26,6 +26,7 @@ from app.schemas.auth import (
 )
 from app.api.deps import get_user_by_telegram_id
 from app.services.auth_code_service import auth_code_service
+from app.services.user_cache import user_cache
 
 
 class TelegramUserAuth(BaseModel):
@@ -76,6 +77,7 @@ async def create_or_update_user(telegram_user_data: Dict[str, Any]) -> User:
             user.is_admin = True
         
         await user.save()
+        user_cache.invalidate(user)
     else:
         # Create new user
         user = User(
@@ -196,14 +198,29 @@ async def generate_auth_code(request: AuthCodeGenerateRequest):
 
 
 @router.get("/verify-code", response_model=AuthCodeVerifyResponse)
-async def verify_auth_code(code: str = Query(..., description="6-digit authentication code")):
+async def verify_auth_code(
+    code: str = Query(..., description="6-digit authentication code"),
+    wait: int = Query(
+        0,
+        ge=0,
+        le=settings.AUTH_CODE_MAX_WAIT_SECONDS,
+        description="Long-poll: seconds to wait for the bot to authorize a pending code"
+    )
+):
     """
     Verify an authentication code status.
     
     Called by frontend to poll for code verification status.
     Returns pending/verified/expired status and user data if verified.
+    
+    With `wait`, a pending code is held open until the bot authorizes it (or
+    the code expires, or `wait` seconds pass), so the frontend can call again
+    right away instead of polling on a timer.
     """
-    code_data = await auth_code_service.verify_code(code)
+    if wait:
+        code_data = await auth_code_service.wait_for_authorization(code, wait)
+    else:
+        code_data = await auth_code_service.verify_code(code)
     
     if not code_data:
         # Code is invalid, expired, or already used
@@ -387,6 +404,7 @@ async def verify_external_token_endpoint(request: ExternalTokenVerifyRequest):
         # Update last login
         user.last_login_at = datetime.now(settings.timezone)
         await user.save()
+        user_cache.invalidate(user)
         
         return ExternalTokenVerifyResponse(
             success=True,
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from bson import ObjectId
 
@@ -7,7 +7,9 @@ from app.models.booking import Booking
 from app.schemas.booking import (
     BookingCreate,
     BookingUpdate,
-    BookingResponse
+    BookingResponse,
+    BookingHistoryListResponse,
+    BookingHistoryResponse
 )
 from app.services.booking_service import (
     create_booking,
@@ -17,31 +19,20 @@ from app.services.booking_service import (
     delete_booking,
     get_user_bookings
 )
+from app.services.schedule_service import find_scheduled_bookings, get_day_range
+from app.services.history_service import HISTORY_MAX_PAGE_SIZE, get_history_page
+from app.api.serializers import (
+    BOOKING_RESPONSE_PROJECTION,
+    booking_list_response,
+    convert_booking_to_response,
+    to_response_dict
+)
 from app.api.deps import get_current_active_user
 from app.models.user import User
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
 
-def convert_booking_to_response(booking: Booking) -> BookingResponse:
-    """
-    Convert a Booking model to BookingResponse by converting ObjectId fields to strings.
-    """
-    booking_dict = booking.dict(by_alias=True)
-    
-    # Convert ObjectId fields to strings
-    if "_id" in booking_dict and booking_dict["_id"] is not None:
-        booking_dict["_id"] = str(booking_dict["_id"])
-    if "user_id" in booking_dict and booking_dict["user_id"] is not None:
-        booking_dict["user_id"] = str(booking_dict["user_id"])
-    if "room_id" in booking_dict and booking_dict["room_id"] is not None:
-        booking_dict["room_id"] = str(booking_dict["room_id"])
-    if "cancelled_by" in booking_dict and booking_dict["cancelled_by"] is not None:
-        booking_dict["cancelled_by"] = str(booking_dict["cancelled_by"])
-    
-    return BookingResponse(**booking_dict)
-
-
 @router.get("/my", response_model=List[BookingResponse])
 async def get_my_bookings(
     status: Optional[str] = None,
@@ -51,8 +42,8 @@ async def get_my_bookings(
     Get all bookings for the current user.
     Optionally filter by status (active/cancelled).
     """
-    bookings = await get_user_bookings(current_user.id, status)
-    return [convert_booking_to_response(booking) for booking in bookings]
+    bookings = await get_user_bookings(current_user.id, status, projection=BOOKING_RESPONSE_PROJECTION)
+    return booking_list_response(bookings)
 
 
 @router.get("", response_model=List[BookingResponse])
@@ -79,17 +70,11 @@ async def get_bookings(
     Returns:
         List of published bookings with user name and division info.
     """
-    # Build query for published, active bookings only
-    query = {
-        "status": "active",
-        "published": True
-    }
-    
     # Add room filter if provided
+    room_ids = None
     if room_id:
         try:
-            room_obj_id = ObjectId(room_id)
-            query["room_id"] = room_obj_id
+            room_ids = [ObjectId(room_id)]
         except Exception:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -97,20 +82,20 @@ async def get_bookings(
             )
     
     # Add date filters if provided
+    start_datetime = end_datetime = None
     if start_date:
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        if end_date:
-            end_datetime = datetime.combine(end_date, datetime.max.time())
-        else:
-            end_datetime = datetime.combine(start_date, datetime.max.time())
-        
-        query["start_time"] = {"$gte": start_datetime, "$lte": end_datetime}
+        start_datetime, end_datetime = get_day_range(start_date, end_date)
     
-    # Query bookings
-    bookings = await Booking.find(query).sort(Booking.start_time).to_list()
+    # Query published, active bookings only
+    bookings = await find_scheduled_bookings(
+        start_datetime,
+        end_datetime,
+        room_ids=room_ids,
+        projection=BOOKING_RESPONSE_PROJECTION
+    )
     
-    # Convert and return
-    return [convert_booking_to_response(booking) for booking in bookings]
+    # Serialize straight to JSON (no per-booking model validation)
+    return booking_list_response(bookings)
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
@@ -148,6 +133,50 @@ async def get_booking(
     return convert_booking_to_response(booking)
 
 
+@router.get("/{booking_id}/history", response_model=BookingHistoryListResponse)
+async def get_booking_history(
+    booking_id: str,
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the change history of a booking, newest first, one page at a time.
+    User can only view the history of their own bookings.
+    """
+    try:
+        obj_id = ObjectId(booking_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid booking ID format"
+        )
+    
+    booking = await Booking.get_motor_collection().find_one({"_id": obj_id}, {"user_id": 1})
+    if not booking:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking not found"
+        )
+    
+    if booking["user_id"] != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to view this booking"
+        )
+    
+    documents, next_cursor = await get_history_page(
+        entry_filter={"booking_id": obj_id},
+        bucket_filter={"booking_id": obj_id},
+        cursor=cursor,
+        limit=limit
+    )
+    return BookingHistoryListResponse(
+        items=[to_response_dict(document, BookingHistoryResponse) for document in documents],
+        next_cursor=next_cursor
+    )
+
+
 @router.post("", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_booking(
     booking_data: BookingCreate,
@@ -1,6 +1,6 @@
 from typing import List, Optional
-from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
 from bson import ObjectId
 import logging
 
@@ -9,6 +9,12 @@ from app.models.booking import Booking
 from app.schemas.room import RoomResponse, RoomCreate, RoomUpdate
 from app.api.deps import get_current_active_user, get_current_admin_user
 from app.models.user import User
+from app.services.booking_index import booking_index
+from app.services.schedule_service import find_scheduled_bookings, get_day_range
+from app.services.reservation_service import release_room
+from app.services.booking_service import cancel_active_booking
+from app.services.room_catalog import room_catalog, build_room_response
+from app.api.conditional import conditional_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -18,40 +24,18 @@ router = APIRouter(prefix="/rooms", tags=["rooms"])
 @router.get("", response_model=List[RoomResponse])
 async def get_rooms(
     active_only: bool = Query(True, description="Filter only active rooms"),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get list of all rooms.
     By default returns only active rooms.
-    """
-    logger.info(f"GET /rooms called - User: {current_user.id}, active_only: {active_only}")
-    query = {}
-    if active_only:
-        query["is_active"] = True
-    
-    logger.info(f"Query: {query}")
-    rooms = await Room.find(query).sort(Room.name).to_list()
-    logger.info(f"Found {len(rooms)} rooms")
-    
-    result = []
-    for room in rooms:
-        try:
-            response = RoomResponse(
-                _id=str(room.id),
-                name=room.name,
-                capacity=room.capacity,
-                facilities=room.facilities,
-                location=room.location,
-                is_active=room.is_active,
-                created_at=room.created_at
-            )
-            result.append(response)
-            logger.info(f"Successfully processed room: {room.name} (id: {room.id})")
-        except Exception as e:
-            logger.error(f"Error processing room {room.name}: {e}")
     
-    logger.info(f"Returning {len(result)} rooms")
-    return result
+    Served from the room catalog cache with ETag/Last-Modified headers;
+    If-None-Match with the current ETag is answered with 304 Not Modified.
+    """
+    entry = await room_catalog.get(active_only=active_only)
+    return conditional_json_response(entry.body, entry.etag, entry.last_modified, if_none_match)
 
 
 @router.get("/{room_id}", response_model=RoomResponse)
@@ -81,15 +65,7 @@ async def get_room(
         )
     
     logger.info(f"Successfully retrieved room: {room.name}")
-    return RoomResponse(
-        _id=str(room.id),
-        name=room.name,
-        capacity=room.capacity,
-        facilities=room.facilities,
-        location=room.location,
-        is_active=room.is_active,
-        created_at=room.created_at
-    )
+    return build_room_response(room)
 
 
 @router.get("/{room_id}/schedule", response_model=List[dict])
@@ -122,18 +98,12 @@ async def get_room_schedule(
         end_date = start_date
     
     # Create datetime range
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
+    start_datetime, end_datetime = get_day_range(start_date, end_date)
     
     logger.info(f"Querying schedule from {start_datetime} to {end_datetime}")
     
     # Query bookings for this room within date range (only published bookings)
-    bookings = await Booking.find({
-        "room_id": ObjectId(room_id),
-        "status": "active",
-        "published": True,
-        "start_time": {"$gte": start_datetime, "$lte": end_datetime}
-    }).sort(Booking.start_time).to_list()
+    bookings = await find_scheduled_bookings(start_datetime, end_datetime, room_ids=[room.id])
     
     logger.info(f"Found {len(bookings)} bookings")
     
@@ -169,16 +139,9 @@ async def create_room(
     """
     room = Room(**room_data.dict())
     await room.insert()
+    room_catalog.invalidate()
     
-    return RoomResponse(
-        _id=str(room.id),
-        name=room.name,
-        capacity=room.capacity,
-        facilities=room.facilities,
-        location=room.location,
-        is_active=room.is_active,
-        created_at=room.created_at
-    )
+    return build_room_response(room)
 
 
 @router.put("/{room_id}", response_model=RoomResponse)
@@ -203,16 +166,9 @@ async def update_room(
         setattr(room, field, value)
     
     await room.save()
+    room_catalog.invalidate()
     
-    return RoomResponse(
-        _id=str(room.id),
-        name=room.name,
-        capacity=room.capacity,
-        facilities=room.facilities,
-        location=room.location,
-        is_active=room.is_active,
-        created_at=room.created_at
-    )
+    return build_room_response(room)
 
 
 @router.put("/{room_id}/toggle")
@@ -232,6 +188,7 @@ async def toggle_room_status(
     
     room.is_active = not room.is_active
     await room.save()
+    room_catalog.invalidate()
     
     return {
         "id": str(room.id),
@@ -263,11 +220,13 @@ async def delete_room(
     }).to_list()
     
     for booking in bookings:
-        booking.status = "cancelled"
-        await booking.save()
+        await cancel_active_booking(booking, current_user.id, notify=False)
+    booking_index.remove_room(room_id)
+    await release_room(ObjectId(room_id))
     
     # Delete room
     await room.delete()
+    room_catalog.invalidate()
     
     return {
         "message": f"Room '{room.name}' deleted successfully",
@@ -6,6 +6,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from app.services.auth_code_service import auth_code_service
+from app.services.user_cache import user_cache
 from app.core.security import create_access_token
 from app.core.config import settings
 from app.models.user import User
@@ -41,6 +42,7 @@ async def create_or_update_user(telegram_user_data: dict) -> User:
             user.is_admin = True
         
         await user.save()
+        user_cache.invalidate(user)
     else:
         # Create new user
         user = User(
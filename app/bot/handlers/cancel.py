@@ -4,9 +4,17 @@ from telegram.ext import ContextTypes
 from app.models.user import User
 from app.models.booking import Booking
 from app.services.booking_service import cancel_booking
+from app.services.index_audit import register_query_shape
 from app.services.telegram_service import format_date_indonesian, format_time_range
 
 
+register_query_shape(
+    "booking by number (bot /cancel)",
+    Booking,
+    lambda: {"booking_number": "BK-00001"}
+)
+
+
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle /cancel command.
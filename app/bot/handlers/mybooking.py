@@ -4,9 +4,18 @@ from telegram.ext import ContextTypes
 
 from app.models.user import User
 from app.models.booking import Booking
+from app.services.index_audit import register_query_shape, sample_id
 from app.services.telegram_service import format_date_indonesian, format_time_range
 
 
+register_query_shape(
+    "active bookings of a user (bot /mybooking)",
+    Booking,
+    lambda: {"user_id": sample_id(), "status": "active"},
+    sort=[("start_time", 1)]
+)
+
+
 async def mybooking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle /mybooking command.
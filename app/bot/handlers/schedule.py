@@ -1,11 +1,11 @@
-from datetime import datetime, date
+from datetime import date
 from typing import Optional
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from app.models.user import User
 from app.models.room import Room
-from app.models.booking import Booking
+from app.services.schedule_service import get_schedule_by_room, get_day_range
 from app.services.telegram_service import format_date_indonesian, format_time_range
 
 
@@ -50,8 +50,7 @@ async def schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
         target_date = date.today()
     
     # Get date range for query
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
+    start_datetime, end_datetime = get_day_range(target_date)
     
     # Get all active rooms
     rooms = await Room.find(Room.is_active == True).sort(Room.name).to_list()
@@ -68,13 +67,16 @@ async def schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     total_bookings = 0
     
+    # Bookings of all rooms in one query, grouped by room
+    schedule_by_room = await get_schedule_by_room(
+        start_datetime,
+        end_datetime,
+        room_ids=[room.id for room in rooms],
+        published_only=False
+    )
+    
     for room in rooms:
-        # Get bookings for this room
-        bookings = await Booking.find({
-            "room_id": room.id,
-            "status": "active",
-            "start_time": {"$gte": start_datetime, "$lte": end_datetime}
-        }).sort(Booking.start_time).to_list()
+        bookings = schedule_by_room.get(str(room.id), [])
         
         if bookings:
             message += f"🚪 *{room.name}*\n"
@@ -0,0 +1,132 @@
+"""
+In-process ingestion queue for Telegram webhook updates.
+
+The webhook endpoint only enqueues the update and acknowledges Telegram
+right away; worker tasks run the handler chain in the background.
+Updates are sharded by chat, so updates of one chat are handled in order
+while different chats are handled concurrently. Redeliveries (same
+update_id) are dropped.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+# Update fields whose payload carries the chat the update belongs to
+CHAT_UPDATE_FIELDS = ("message", "edited_message", "channel_post", "edited_channel_post", "my_chat_member", "chat_member")
+
+
+def get_update_chat_id(data: Dict[str, Any]) -> Optional[int]:
+    """Chat an update belongs to (sender for updates without a chat), None if unknown."""
+    for field in CHAT_UPDATE_FIELDS:
+        payload = data.get(field)
+        if payload and "chat" in payload:
+            return payload["chat"].get("id")
+    
+    callback_query = data.get("callback_query")
+    if callback_query:
+        message = callback_query.get("message") or {}
+        if "chat" in message:
+            return message["chat"].get("id")
+        return (callback_query.get("from") or {}).get("id")
+    
+    return None
+
+
+class WebhookUpdateQueue:
+    """Bounded queue of raw updates with one worker (and queue shard) per concurrency slot."""
+    
+    def __init__(self, workers: int = 4, max_size: int = 1000, dedupe_size: int = 10000):
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.dedupe_size = dedupe_size
+        self._shards: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._seen_update_ids: "OrderedDict[int, None]" = OrderedDict()
+        self._handler: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    
+    def start(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """
+        Start the worker tasks.
+        
+        Args:
+            handler: Coroutine function processing one raw update
+        """
+        if self._tasks:
+            return
+        self._handler = handler
+        shard_size = max(1, self.max_size // self.workers)
+        self._shards = [asyncio.Queue(maxsize=shard_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self.run(shard)) for shard in self._shards]
+    
+    async def stop(self, timeout: float = 10.0):
+        """Finish queued updates (up to timeout), then stop the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.join() for shard in self._shards)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"⚠️  Webhook queue stopped with {self.depth} unprocessed updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    @property
+    def depth(self) -> int:
+        return sum(shard.qsize() for shard in self._shards)
+    
+    def is_duplicate(self, update_id: Optional[int]) -> bool:
+        return update_id is not None and update_id in self._seen_update_ids
+    
+    def _remember(self, update_id: Optional[int]):
+        if update_id is None:
+            return
+        self._seen_update_ids[update_id] = None
+        while len(self._seen_update_ids) > self.dedupe_size:
+            self._seen_update_ids.popitem(last=False)
+    
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """
+        Enqueue an update without waiting for it to be processed.
+        
+        Returns:
+            False if the queue is full (the caller should let Telegram retry),
+            True otherwise, including for dropped duplicates
+        """
+        update_id = data.get("update_id")
+        if self.is_duplicate(update_id):
+            return True
+        
+        chat_id = get_update_chat_id(data)
+        key = chat_id if chat_id is not None else (update_id or 0)
+        try:
+            self._shards[hash(key) % self.workers].put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        
+        self._remember(update_id)
+        return True
+    
+    async def run(self, shard: asyncio.Queue):
+        while True:
+            data = await shard.get()
+            try:
+                await self._handler(data)
+            except Exception as e:
+                print(f"❌ Error processing Telegram update {data.get('update_id')}: {e}")
+            finally:
+                shard.task_done()
+
+
+# Global instance
+webhook_queue = WebhookUpdateQueue(
+    workers=settings.WEBHOOK_WORKERS,
+    max_size=settings.WEBHOOK_QUEUE_SIZE,
+    dedupe_size=settings.WEBHOOK_DEDUPE_SIZE
+)
@@ -1,5 +1,9 @@
 import logging
 import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 
@@ -42,6 +46,12 @@ application.add_handler(schedule_handler)
 application.add_handler(cancel_handler)
 application.add_handler(authorize_handler)
 
+# Commands with a registered handler (used to drop other updates before parsing)
+HANDLED_COMMANDS = frozenset().union(*(
+    handler.commands
+    for handler in (start_handler, help_handler, mybooking_handler, schedule_handler, cancel_handler, authorize_handler)
+))
+
 # Initialize application once (not for every update)
 application_started = False
 
@@ -65,63 +75,100 @@ async def stop_application():
         application_started = False
 
 
-async def handle_webhook_update(data: dict, context: ContextTypes.DEFAULT_TYPE):
+class WebhookStats:
+    """Per-update-type counters (received, dropped, processed, failed)."""
+    
+    def __init__(self):
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+    
+    def count(self, update_type: str, outcome: str):
+        self._counters[update_type][outcome] += 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {update_type: dict(counter) for update_type, counter in self._counters.items()}
+
+
+webhook_stats = WebhookStats()
+
+
+def get_update_type(data: dict) -> str:
+    """Update type is the payload field next to update_id (message, callback_query, ...)."""
+    for key in data:
+        if key != "update_id":
+            return key
+    return "unknown"
+
+
+def should_process_update(data: dict) -> bool:
+    """
+    Cheap check on the raw dict whether any registered handler would act on the update:
+    registered commands and new-member events (bot joining a group).
+    Everything else (plain group chatter, member updates, callbacks) is dropped
+    before Update.de_json.
+    """
+    message = data.get("message") or data.get("edited_message")
+    if not message:
+        return False
+    
+    if "new_chat_members" in message:
+        return True
+    
+    text = message.get("text") or ""
+    if not text.startswith("/"):
+        return False
+    
+    # "/schedule@BotName 24-02-2025" -> "schedule"
+    command = text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+    return command in HANDLED_COMMANDS
+
+
+def accept_webhook_update(data: dict) -> bool:
+    """Count an incoming update and tell whether it should be queued for processing."""
+    update_type = get_update_type(data)
+    webhook_stats.count(update_type, "received")
+    if not should_process_update(data):
+        webhook_stats.count(update_type, "dropped")
+        return False
+    return True
+
+
+async def handle_webhook_update(data: dict, context: ContextTypes.DEFAULT_TYPE = None):
     """
     Handle incoming webhook updates from Telegram.
-    This function is called by FastAPI when Telegram sends updates via webhook.
+    This function is called by the webhook queue workers for every update Telegram sends.
+    
+    Logs one structured line for a sample of updates (WEBHOOK_LOG_SAMPLE_RATE),
+    or for every update when DEBUG logging is enabled.
     """
-    logger.info("=" * 50)
-    logger.info("🔔 WEBHOOK UPDATE RECEIVED")
-    logger.info("=" * 50)
-    logger.info(f"📦 Raw data keys: {list(data.keys())}")
+    update_type = get_update_type(data)
+    started = time.perf_counter()
     
     app = await get_application()
     
-    # Log the incoming update type for debugging
-    if "message" in data:
-        message = data.get("message", {})
-        if "new_chat_members" in message:
-            logger.info(f"📨 Received MESSAGE with NEW_CHAT_MEMBERS (BOT INVITE DETECTED!)")
-        else:
-            logger.info(f"📨 Received MESSAGE update")
-            # Log message text if present
-            if "text" in message:
-                logger.info(f"💬 Message text: {message.get('text')}")
-            # Log user info
-            if "from" in message:
-                user = message.get("from", {})
-                logger.info(f"👤 From user: {user.get('id')} - {user.get('first_name')}")
-    elif "callback_query" in data:
-        logger.info(f"📨 Received CALLBACK_QUERY update")
-    elif "my_chat_member" in data:
-        logger.info(f"📨 Received MY_CHAT_MEMBER update")
-    elif "chat_member" in data:
-        logger.info(f"📨 Received CHAT_MEMBER update (other user)")
-    elif "edited_message" in data:
-        logger.info(f"📨 Received EDITED_MESSAGE update")
-    else:
-        logger.info(f"📨 Received UNKNOWN update type: {list(data.keys())}")
-    
     # Create Update object from JSON data using the application's bot instance
-    bot = app.bot
-    update = Update.de_json(data, bot)
+    update = Update.de_json(data, app.bot)
     
-    # Log if update was successfully parsed
-    if update:
-        logger.info(f"✅ Update parsed successfully: {update.update_id}")
-        if update.message and update.message.new_chat_members:
-            logger.info(f"✅ MESSAGE with NEW_CHAT_MEMBERS detected in parsed Update object!")
-        elif update.my_chat_member:
-            logger.info(f"✅ MY_CHAT_MEMBER update detected in parsed Update object!")
-        elif update.chat_member:
-            logger.info(f"✅ CHAT_MEMBER update detected in parsed Update object!")
-    else:
-        logger.error(f"❌ Failed to parse update from data")
+    try:
+        await app.process_update(update)
+    except Exception:
+        webhook_stats.count(update_type, "failed")
+        raise
+    webhook_stats.count(update_type, "processed")
     
-    # Process the update
-    logger.info(f"🔄 Processing update through handlers...")
-    await app.process_update(update)
-    logger.info(f"✅ Update processing completed")
+    if logger.isEnabledFor(logging.DEBUG) or random.random() < settings.WEBHOOK_LOG_SAMPLE_RATE:
+        chat = update.effective_chat
+        logger.info(
+            "webhook_update update_id=%s type=%s chat_id=%s duration_ms=%.1f",
+            update.update_id,
+            update_type,
+            chat.id if chat else None,
+            (time.perf_counter() - started) * 1000
+        )
+
+
+def get_webhook_stats() -> Dict[str, Dict[str, int]]:
+    """Get per-update-type webhook counters."""
+    return webhook_stats.snapshot()
 
 
 async def set_webhook():
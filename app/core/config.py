@@ -26,6 +26,86 @@ class Settings(BaseSettings):
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "booking_app"
 
+    # In-memory booking index
+    BOOKING_INDEX_RELOAD_SECONDS: int = 30  # Reload period, bounds staleness of bookings written by other replicas (0: never)
+    BOOKING_INDEX_CHANGE_STREAM_ENABLED: bool = False  # Apply other replicas' writes right away via change stream (requires replica set)
+
+    # Booking slot reservation
+    BOOKING_SLOT_MINUTES: int = 15  # Grid of per-room slot documents (double booking guard); claims inside a slot are exact
+    BOOKING_SLOT_RETENTION_DAYS: int = 1  # Keep slot claims this long after booking end (TTL)
+
+    # Booking number allocation
+    BOOKING_NUMBER_BLOCK_SIZE: int = 1  # >1: each worker reserves a block of numbers and hands them out from memory
+
+    # Settings cache
+    SETTINGS_CACHE_TTL_SECONDS: int = 60  # How long cached settings are trusted before reloading
+    SETTINGS_CHANGE_STREAM_ENABLED: bool = False  # Invalidate on MongoDB change stream (requires replica set)
+
+    # Telegram login codes
+    AUTH_CODE_BLOCK_SIZE: int = 100  # Code sequence numbers each worker reserves per counter round trip
+    AUTH_CODE_MAX_WAIT_SECONDS: int = 25  # Longest verify-code long-poll (stay below proxy timeouts)
+    AUTH_CODE_RECHECK_SECONDS: float = 5.0  # DB re-check while long-polling (authorizations on other replicas)
+    AUTH_CODE_CHANGE_STREAM_ENABLED: bool = False  # Wake long-polls on MongoDB change stream (requires replica set)
+
+    # Verified JWT cache (entries live until the token's exp)
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Authenticated user cache
+    USER_CACHE_MAX_SIZE: int = 1000  # Users kept in memory per worker (LRU)
+    USER_CACHE_TTL_SECONDS: int = 60  # Bounds staleness of changes made by other workers
+
+    # Cleanup notification scheduler
+    SCHEDULER_CLEANUP_BATCH_SIZE: int = 100  # Bookings leased, notified and marked per bulk_write
+    SCHEDULER_CLEANUP_CONCURRENCY: int = 8  # Concurrent notifications within a batch
+    SCHEDULER_CLEANUP_LEASE_SECONDS: int = 300  # Other replicas skip a leased booking until this expires
+    SCHEDULER_CLEANUP_SWEEP_MINUTES: int = 30  # Reconciliation sweep; end timers fire notifications on time
+    BOOKING_TIMER_COLLECTION: str = "booking_timers"  # APScheduler job store for booking end timers
+
+    # Leader election (only the leader replica runs scheduled jobs)
+    LEADER_LEASE_SECONDS: int = 30  # Failover time if the leader dies without releasing
+    LEADER_HEARTBEAT_SECONDS: int = 10  # Lease renewal interval; must be well below the lease
+
+    # Room catalog cache (GET /rooms, GET /admin/rooms)
+    ROOM_CATALOG_TTL_SECONDS: int = 60  # Bounds staleness of room writes made through other workers
+
+    # Index audit (explain() of every registered query shape, see check_indexes.py)
+    INDEX_AUDIT_ON_STARTUP: bool = False  # Also print the audit when the app starts
+
+    # Booking history journal
+    HISTORY_JOURNAL_MODE: str = "auto"  # transactional: same transaction as the booking (requires replica set); buffered: write-behind batches, lost on crash; auto: transactional if supported
+    HISTORY_JOURNAL_BATCH_SIZE: int = 100  # Records per insert_many
+    HISTORY_JOURNAL_MAX_BUFFERED: int = 10000  # Beyond this, history is written inline (buffered mode)
+    HISTORY_JOURNAL_FLUSH_SECONDS: float = 1.0  # Max time a record waits in memory (buffered mode)
+    HISTORY_ARCHIVE_AFTER_MONTHS: int = 6  # Older history moves to monthly archive buckets (0 disables)
+    HISTORY_ARCHIVE_BATCH_SIZE: int = 1000  # Records moved per round
+    HISTORY_ARCHIVE_INTERVAL_HOURS: int = 24  # How often the leader runs the archival job
+
+    # Dashboard
+    DASHBOARD_STATS_CACHE_TTL_SECONDS: int = 30  # Cached stats are also dropped on every booking write
+
+    # Notification outbox
+    NOTIFICATION_OUTBOX_ENABLED: bool = True  # Queue Telegram notifications instead of sending inline
+    OUTBOX_POLL_SECONDS: int = 5  # Idle poll interval of the dispatcher
+    OUTBOX_CONCURRENCY: int = 8  # Max messages in flight per process
+    OUTBOX_MAX_ATTEMPTS: int = 8  # Give up (status=failed) after this many attempts
+    OUTBOX_CHAT_MIN_INTERVAL_SECONDS: float = 0.0  # Extra per-chat spacing (rate limits are enforced by the send queue)
+    OUTBOX_RETENTION_DAYS: int = 7  # Keep sent/failed entries this long
+
+    # Telegram fan-out (inline sends when the outbox is disabled)
+    TELEGRAM_FANOUT_CONCURRENCY: int = 8  # Max concurrent sends across all chats
+
+    # Telegram send queue (token buckets in front of the bot)
+    TELEGRAM_GLOBAL_MESSAGES_PER_SECOND: float = 25.0  # Telegram allows ~30 msg/s per bot
+    TELEGRAM_CHAT_MESSAGES_PER_MINUTE: int = 20  # Telegram allows ~20 msg/min per group
+    TELEGRAM_CHAT_BURST: int = 3  # Messages a chat may receive back-to-back
+    TELEGRAM_COALESCE_MAX_MESSAGES: int = 5  # Merge up to this many queued messages per chat (1 disables)
+
+    # Telegram webhook ingestion
+    WEBHOOK_WORKERS: int = 4  # Concurrent update handlers (updates of one chat stay in order)
+    WEBHOOK_QUEUE_SIZE: int = 1000  # Queued updates before the webhook answers 503
+    WEBHOOK_DEDUPE_SIZE: int = 10000  # Recent update_ids remembered to drop redeliveries
+    WEBHOOK_LOG_SAMPLE_RATE: float = 0.01  # Share of processed updates logged (all with DEBUG logging)
+
     # Telegram
     BOT_TOKEN: Optional[str] = None
     WEBHOOK_BASE_URL: str = "https://localhost:8000"
@@ -9,10 +9,8 @@ from beanie import Document
 client: AsyncIOMotorClient = None
 
 
-async def connect_to_mongo():
-    """Initialize MongoDB connection and Beanie ODM"""
-    global client
-
+def get_client_config() -> dict:
+    """MongoDB client options (shared by the Motor client and sync pymongo clients)"""
     # Determine if SSL should be used based on the URL
     use_ssl = "mongodb+srv://" in settings.MONGODB_URL or "ssl=true" in settings.MONGODB_URL
 
@@ -28,7 +26,14 @@ async def connect_to_mongo():
             "tlsAllowInvalidCertificates": True,  # For MongoDB Atlas
         })
 
-    client = AsyncIOMotorClient(settings.MONGODB_URL, **client_config)
+    return client_config
+
+
+async def connect_to_mongo():
+    """Initialize MongoDB connection and Beanie ODM"""
+    global client
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL, **get_client_config())
 
     # Test connection
     try:
@@ -58,4 +63,9 @@ async def init_beanie_models(document_models: List[Type[Document]]):
 
 def get_db():
     """Get database instance"""
-    return client[settings.MONGODB_DB_NAME]
\ No newline at end of file
+    return client[settings.MONGODB_DB_NAME]
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Get the Motor client (for sessions and transactions)"""
+    return client
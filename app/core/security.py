@@ -1,9 +1,11 @@
 from datetime import datetime, timedelta, timezone as dt_timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from collections import OrderedDict
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from hashlib import sha256
 import hmac
+import time
 from urllib.parse import parse_qs
 
 from app.core.config import settings
@@ -168,3 +170,89 @@ def verify_external_token(token: str) -> Optional[Dict[str, Any]]:
     except Exception as e:
         print(f"Unexpected error verifying external token: {e}")
         return None
+
+
+# Token kinds returned by verify_bearer_token
+TOKEN_KIND_ACCESS = "access"  # BE JWT token (Telegram users)
+TOKEN_KIND_EXTERNAL = "external"  # External app token (e.g., Katalis)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified token payloads keyed by SHA-256 of the token.
+    Entries are kept until the token's `exp`; tokens without `exp` are not cached.
+    """
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any], float]]" = OrderedDict()
+    
+    @staticmethod
+    def _key(token: str) -> str:
+        return sha256(token.encode()).hexdigest()
+    
+    def get(self, token: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        kind, payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return kind, payload
+    
+    def put(self, token: str, kind: str, payload: Dict[str, Any]):
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        self._entries[key] = (kind, payload, float(expires_at))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+
+
+verified_token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+
+def get_unverified_producer(token: str) -> Optional[str]:
+    """
+    Read the `producer` claim without verifying the signature.
+    Only used to pick which verifier to run; never trusted on its own.
+    """
+    try:
+        return jwt.get_unverified_claims(token).get("producer")
+    except Exception:
+        return None
+
+
+def verify_bearer_token(token: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Verify a bearer token of either kind, using the verified-token cache.
+    
+    Tokens are routed by their `producer` claim before decoding, so external
+    tokens are only decoded by verify_external_token and BE tokens only by
+    decode_access_token.
+    
+    Returns:
+        (TOKEN_KIND_ACCESS or TOKEN_KIND_EXTERNAL, payload) if valid, (None, None) otherwise
+    """
+    cached = verified_token_cache.get(token)
+    if cached is not None:
+        return cached
+    
+    if get_unverified_producer(token) == settings.KATALIS_PRODUCER:
+        kind, payload = TOKEN_KIND_EXTERNAL, verify_external_token(token)
+    else:
+        kind, payload = TOKEN_KIND_ACCESS, decode_access_token(token)
+    
+    if payload is None:
+        return None, None
+    
+    verified_token_cache.put(token, kind, payload)
+    return kind, payload
@@ -4,19 +4,37 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
 from app.api.v1 import auth, bookings, rooms, admin, telegram_groups
-from app.bot.webhook import set_webhook, delete_webhook, handle_webhook_update
-from app.services.scheduler_service import check_and_notify_ended_bookings
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.bot.webhook import set_webhook, delete_webhook, handle_webhook_update, accept_webhook_update
+from app.bot.update_queue import webhook_queue
+from app.services.scheduler_service import (
+    scheduler,
+    check_and_notify_ended_bookings,
+    add_booking_timer_store,
+    resume_scheduled_jobs,
+    pause_scheduled_jobs,
+    SWEEP_JOB_ID
+)
+from app.services.leader_service import scheduler_leader
+from app.services.booking_index import booking_index
+from app.services.reservation_service import backfill_room_slots
+from app.services.user_service import backfill_user_search_keys
+from app.services.history_service import HISTORY_ARCHIVE_JOB_ID, archive_booking_history
+from app.services.index_audit import audit_indexes, drop_superseded_indexes
+from app.services.auth_code_service import prepare_auth_codes
+from app.services.auth_code_waiters import auth_code_waiters
+from app.services.settings_service import settings_cache
+from app.services.outbox_service import outbox_dispatcher
+from app.services.history_journal import history_journal
+from app.services.telegram_service import deliver_telegram_message, send_queue
 from telegram import Update
 from fastapi import Request
 
-# Create scheduler instance
-scheduler = AsyncIOScheduler()
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,10 +50,12 @@ logger = logging.getLogger(__name__)
 from app.models.user import User
 from app.models.room import Room
 from app.models.booking import Booking
-from app.models.booking_history import BookingHistory
+from app.models.booking_history import BookingHistory, BookingHistoryArchive
 from app.models.setting import Setting
 from app.models.auth_code import AuthCode
 from app.models.telegram_group import TelegramGroup
+from app.models.room_slot import RoomSlot
+from app.models.notification_outbox import NotificationOutbox
 
 
 @asynccontextmanager
@@ -44,31 +64,105 @@ async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
     
+    # Replace the old auth code indexes before Beanie creates the unique/TTL ones
+    await prepare_auth_codes()
+    
     # Initialize Beanie with all document models
     await init_beanie_models([
         User,
         Room,
         Booking,
         BookingHistory,
+        BookingHistoryArchive,
         Setting,
         AuthCode,
-        TelegramGroup
+        TelegramGroup,
+        RoomSlot,
+        NotificationOutbox
     ])
     
     # Initialize default settings if not exist
     await initialize_default_settings()
     
-    # Start scheduler for automatic cleanup notifications
+    # Warm settings cache (and keep workers coherent via change stream if enabled)
+    await settings_cache.refresh()
+    if settings.SETTINGS_CHANGE_STREAM_ENABLED:
+        settings_cache.start_watching()
+        print("✅ Settings change stream watcher started")
+    
+    # Wake verify-code long-polls for codes authorized through other replicas
+    if settings.AUTH_CODE_CHANGE_STREAM_ENABLED:
+        auth_code_waiters.start_watching()
+        print("✅ Auth code change stream watcher started")
+    
+    # Warm in-memory booking index used for conflict checks and room schedules,
+    # and keep it current with bookings written by other replicas
+    loaded = await booking_index.load()
+    print(f"✅ Booking index loaded: {loaded} active bookings")
+    booking_index.start_refreshing(
+        settings.BOOKING_INDEX_RELOAD_SECONDS,
+        watch=settings.BOOKING_INDEX_CHANGE_STREAM_ENABLED
+    )
+    
+    # Claim room slots for bookings created before slot reservation existed
+    await backfill_room_slots()
+    
+    # Populate prefix-search keys for users created before user search existed
+    await backfill_user_search_keys()
+    
+    # Indexes replaced by compound indexes cost writes only
+    await drop_superseded_indexes()
+    
+    # Report hot queries that no index serves (COLLSCAN / in-memory sort)
+    if settings.INDEX_AUDIT_ON_STARTUP:
+        try:
+            await audit_indexes()
+        except Exception as e:
+            print(f"⚠️  Warning: Index audit failed: {str(e)}")
+    
+    # Start scheduler for automatic cleanup notifications:
+    # per-booking end timers (persisted) plus a reconciliation sweep.
+    # It starts paused; only the replica holding the scheduler lease runs jobs.
+    add_booking_timer_store()
     scheduler.add_job(
         check_and_notify_ended_bookings,
         'interval',
-        minutes=5,
-        id='cleanup_notifications',
-        name='Send cleanup notifications for ended bookings',
+        minutes=settings.SCHEDULER_CLEANUP_SWEEP_MINUTES,
+        id=SWEEP_JOB_ID,
+        name='Reconcile cleanup notifications for ended bookings',
         replace_existing=True
     )
-    scheduler.start()
-    print("✅ Scheduler started: Will check for ended bookings every 5 minutes")
+    if settings.HISTORY_ARCHIVE_AFTER_MONTHS > 0:
+        scheduler.add_job(
+            archive_booking_history,
+            'interval',
+            hours=settings.HISTORY_ARCHIVE_INTERVAL_HOURS,
+            id=HISTORY_ARCHIVE_JOB_ID,
+            name='Archive old booking history into monthly buckets',
+            replace_existing=True
+        )
+    scheduler.start(paused=True)
+    scheduler_leader.start(
+        on_elected=resume_scheduled_jobs,
+        on_demoted=pause_scheduled_jobs,
+        on_heartbeat=scheduler.wakeup  # Pick up timers added by other replicas
+    )
+    print(f"✅ Scheduler started: booking end timers + sweep every {settings.SCHEDULER_CLEANUP_SWEEP_MINUTES} minutes (leader only)")
+    
+    # Process Telegram webhook updates in background workers
+    webhook_queue.start(handle_webhook_update)
+    
+    # Write booking history in the booking's transaction where MongoDB supports it,
+    # otherwise in batches in the background
+    if await history_journal.resolve_mode() == "transactional":
+        print("✅ Booking history written in the booking transaction")
+    else:
+        history_journal.start()
+        print(f"✅ Booking history journal started (flush every {settings.HISTORY_JOURNAL_FLUSH_SECONDS}s)")
+    
+    # Deliver queued Telegram notifications in the background
+    outbox_dispatcher.start(deliver_telegram_message)
+    print("✅ Notification outbox dispatcher started")
     
     # Set Telegram webhook (for Vercel deployment)
     try:
@@ -84,9 +178,24 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await scheduler_leader.stop()
     scheduler.shutdown()
     print("✅ Scheduler stopped")
     
+    await settings_cache.stop_watching()
+    await auth_code_waiters.stop_watching()
+    await booking_index.stop_refreshing()
+    
+    await webhook_queue.stop()
+    
+    await outbox_dispatcher.stop()
+    print("✅ Notification outbox dispatcher stopped")
+    
+    await send_queue.stop()
+    
+    # Last, so history of requests finished during shutdown is written too
+    await history_journal.stop()
+    
     await close_mongo_connection()
     
     # Note: Webhook is kept configured in Telegram for always-on bot functionality
@@ -107,6 +216,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],  # Pagination cursor and cache validators must be readable by the frontend
 )
 
 # Include routers
@@ -121,7 +231,7 @@ app.include_router(telegram_groups.router, prefix="/api/v1")
 async def telegram_webhook(token: str, request: Request):
     """
     Telegram webhook endpoint.
-    Receives updates from Telegram and passes them to the bot handler.
+    Receives updates from Telegram and queues them for the bot handlers.
     """
     # Verify token matches
     if token != settings.BOT_TOKEN:
@@ -130,8 +240,14 @@ async def telegram_webhook(token: str, request: Request):
     # Parse update from request
     data = await request.json()
     
-    # Process the update (handler will get bot instance)
-    await handle_webhook_update(data, None)
+    # Drop updates no handler acts on before parsing them
+    if not accept_webhook_update(data):
+        return {"status": "ok"}
+    
+    # Queue the update and acknowledge immediately; workers run the handlers
+    if not webhook_queue.submit(data):
+        # Queue full: let Telegram redeliver later
+        return JSONResponse(status_code=503, content={"status": "busy"})
     
     return {"status": "ok"}
 
@@ -4,7 +4,8 @@ Stores temporary codes for Telegram bot authorization.
 """
 from datetime import datetime
 from typing import Optional, Dict, Any
-from beanie import Document, Indexed
+from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from bson import ObjectId
 
 from app.core.config import settings
@@ -13,8 +14,8 @@ from app.core.config import settings
 class AuthCode(Document):
     """Authorization code for Telegram bot authentication."""
     
-    code: str = Indexed(unique=True, max_length=6)
-    """6-digit authorization code."""
+    code: str
+    """6-digit authorization code (unique, see AuthCodeService.generate_code)."""
     
     telegram_user_id: Optional[int] = None
     """Telegram user ID this code is authorized for (set during generation)."""
@@ -26,7 +27,7 @@ class AuthCode(Document):
     """Timestamp when code was created."""
     
     expires_at: datetime
-    """Timestamp when code expires."""
+    """Timestamp when code expires (MongoDB deletes the code shortly after)."""
     
     used: bool = False
     """Whether code has been used."""
@@ -37,11 +38,10 @@ class AuthCode(Document):
     class Settings:
         name = "auth_codes"
         indexes = [
-            # Index on code for fast lookup
-            "code",
+            # Unique code lookup; a duplicate insert tells the allocator to draw again
+            IndexModel([("code", ASCENDING)], unique=True, name="code_unique"),
             # TTL index to auto-expire codes after expiration
-            [("expires_at", 1)]
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
         ]
         
-        # Time-to-live index for automatic document expiration
         use_state_management = False
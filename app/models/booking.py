@@ -2,9 +2,13 @@ from datetime import datetime, timezone
 from typing import Optional
 from beanie import Document, Indexed
 from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from bson import ObjectId
 
 
+BOOKING_STATUSES = ["active", "cancelled"]
+
+
 class UserSnapshot(BaseModel):
     """Snapshot of user data at booking time"""
     full_name: str
@@ -32,7 +36,7 @@ class Booking(Document):
     description: Optional[str] = None
     start_time: datetime
     end_time: datetime
-    status: str = Field(default="active")  # active, cancelled
+    status: str = Field(default="active")  # One of BOOKING_STATUSES
     published: bool = Field(default=False)  # Whether booking is published to Telegram
     cancelled_at: Optional[datetime] = None
     cancelled_by: Optional[ObjectId] = None
@@ -42,16 +46,33 @@ class Booking(Document):
     consumption_group_id: Optional[int] = None  # Telegram group ID for consumption notifications
     verification_group_id: Optional[int] = None  # Telegram group ID for verification/cleanup notifications
     hrd_notified: bool = Field(default=False)  # Whether HRD has been notified for cleanup
+    cleanup_lease_owner: Optional[str] = None  # Scheduler run currently sending the cleanup notification
+    cleanup_locked_until: Optional[datetime] = None  # Lease expiry; other runs skip the booking until then
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
     class Settings:
         name = "bookings"
         indexes = [
-            [("room_id", 1), ("start_time", 1), ("end_time", 1)],  # Compound index for conflict check
-            "user_id",
-            "status",
-            "booking_number"
+            [("room_id", 1), ("start_time", 1), ("end_time", 1)],  # Conflict check, per-room schedule
+            [("status", 1), ("start_time", 1)],  # Schedules including drafts, dashboard week range
+            [("status", 1), ("published", 1), ("start_time", 1)],  # Published schedule of all rooms (GET /bookings)
+            [("user_id", 1), ("status", 1), ("start_time", 1)],  # /mybooking: a user's active bookings by start
+            [("user_id", 1), ("created_at", -1)],  # GET /bookings/my, newest first
+            [("created_at", -1), ("_id", -1)],  # Keyset pagination for admin booking listing
+            "booking_number",
+            # Recently ended published bookings (admin scheduler status)
+            IndexModel(
+                [("end_time", DESCENDING)],
+                name="published_by_end",
+                partialFilterExpression={"status": "active", "published": True}
+            ),
+            # Bookings still waiting for their cleanup notification, by due time
+            IndexModel(
+                [("hrd_notified", ASCENDING), ("end_time", ASCENDING)],
+                name="pending_cleanup",
+                partialFilterExpression={"hrd_notified": False, "status": "active", "published": True}
+            )
         ]
     
     class Config:
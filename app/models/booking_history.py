@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
-from typing import Optional
-from beanie import Document, Indexed, PydanticObjectId
+from typing import List, Optional
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from bson import ObjectId
 
 
@@ -21,7 +22,7 @@ class HistoryData(BaseModel):
 class BookingHistory(Document):
     """Audit trail for booking changes"""
     
-    booking_id: Indexed(PydanticObjectId)
+    booking_id: PydanticObjectId
     booking_number: str
     changed_by: PydanticObjectId
     action: str  # created, updated, cancelled
@@ -32,11 +33,16 @@ class BookingHistory(Document):
     class Settings:
         name = "booking_history"
         indexes = [
-            "booking_id",
-            "booking_number",
-            "changed_by",
-            "action",
-            "changed_at"
+            # Timeline of a booking / of the changes made by a user (newest first, keyset on _id)
+            IndexModel(
+                [("booking_id", ASCENDING), ("changed_at", DESCENDING), ("_id", DESCENDING)],
+                name="booking_timeline"
+            ),
+            IndexModel(
+                [("changed_by", ASCENDING), ("changed_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_timeline"
+            ),
+            "changed_at"  # Archival range scan
         ]
     
     class Config:
@@ -59,4 +65,27 @@ class BookingHistory(Document):
                 },
                 "changed_at": "2025-02-20T11:00:00Z"
             }
-        }
\ No newline at end of file
+        }
+
+class BookingHistoryArchive(Document):
+    """
+    Archived history of one booking for one calendar month (UTC).
+    Entries are the original booking_history documents, moved here by the archival job.
+    """
+    
+    booking_id: PydanticObjectId
+    booking_number: str
+    month: datetime  # First instant of the month
+    changed_by: List[PydanticObjectId] = []  # Users with entries in this bucket
+    entries: List[dict] = []
+    
+    class Settings:
+        name = "booking_history_archive"
+        indexes = [
+            IndexModel(
+                [("booking_id", ASCENDING), ("month", DESCENDING)],
+                unique=True,
+                name="booking_month_unique"
+            ),
+            IndexModel([("changed_by", ASCENDING), ("month", DESCENDING)], name="user_month")
+        ]
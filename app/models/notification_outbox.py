@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from typing import Optional
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from bson import ObjectId
+
+
+class NotificationOutbox(Document):
+    """Pending Telegram message, delivered in the background by the outbox dispatcher"""
+    
+    chat_id: int  # Target Telegram chat ID
+    message: str
+    parse_mode: Optional[str] = "Markdown"
+    booking_id: Optional[ObjectId] = None  # Booking this notification is about (if any)
+    status: str = Field(default="pending")  # pending, sending, sent, failed
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    locked_until: Optional[datetime] = None  # Lease while a dispatcher is sending it
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    sent_at: Optional[datetime] = None
+    purge_at: Optional[datetime] = None  # Set once sent/failed; removed by TTL index
+    
+    class Settings:
+        name = "notification_outbox"
+        indexes = [
+            [("status", 1), ("next_attempt_at", 1), ("created_at", 1)],  # Dispatcher claim query (both $or branches, and its sort)
+            "booking_id",
+            IndexModel([("purge_at", ASCENDING)], expireAfterSeconds=0, name="purge_at_ttl")
+        ]
+    
+    class Config:
+        arbitrary_types_allowed = True
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import List
+from beanie import Document
+from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING
+from bson import ObjectId
+
+
+class SlotClaim(BaseModel):
+    """Exact part of a booking's time range that falls inside one slot."""
+    
+    start: datetime  # UTC, inside [slot_start, slot_start + BOOKING_SLOT_MINUTES)
+    end: datetime
+    booking_id: ObjectId
+    claim_id: ObjectId  # One per claim call; lets a move release only the old claims
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class RoomSlot(Document):
+    """
+    Fixed-size time slot of a room holding the exact claims of the bookings
+    that touch it. Claims are added with a guarded upsert that only matches
+    when no other booking's claim overlaps, and the unique (room_id,
+    slot_start) index turns a failed match into a duplicate key: concurrent
+    overlapping claims cannot both be stored, while adjacent bookings that
+    share a slot can.
+    """
+    
+    room_id: ObjectId
+    slot_start: datetime  # Slot start (UTC), aligned to BOOKING_SLOT_MINUTES
+    claims: List[SlotClaim] = Field(default_factory=list)
+    expires_at: datetime  # Slot is removed by TTL index once its last booking is long over
+    
+    class Settings:
+        name = "room_slots"
+        indexes = [
+            IndexModel(
+                [("room_id", ASCENDING), ("slot_start", ASCENDING)],
+                unique=True,
+                name="room_slot_unique"
+            ),
+            "claims.booking_id",
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+        ]
+    
+    class Config:
+        arbitrary_types_allowed = True
@@ -1,9 +1,26 @@
 from datetime import datetime, timezone
-from typing import Optional
-from beanie import Document, Indexed
+from typing import List, Optional
+from beanie import Document, Indexed, before_event, Insert, Replace, Save
 from pydantic import Field, EmailStr
 
 
+def build_search_keys(*values: Optional[str]) -> List[str]:
+    """
+    Build lowercased prefix-search keys: each full value plus each of its words.
+    Stored on the user so an anchored regex on a lowercase field can use the index.
+    """
+    keys = set()
+    for value in values:
+        if not value:
+            continue
+        value = value.strip().lower().lstrip("@")
+        if not value:
+            continue
+        keys.add(value)
+        keys.update(value.split())
+    return sorted(keys)
+
+
 class User(Document):
     """User model for Telegram-authenticated users and external app users"""
     
@@ -22,6 +39,12 @@ class User(Document):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     last_login_at: Optional[datetime] = None
+    search_keys: List[str] = Field(default_factory=list)  # Lowercased name/username/division tokens for prefix search
+    
+    @before_event(Insert, Replace, Save)
+    def update_search_keys(self):
+        """Keep search_keys in sync with the searchable fields."""
+        self.search_keys = build_search_keys(self.full_name, self.username, self.division)
     
     class Settings:
         name = "users"
@@ -30,7 +53,9 @@ class User(Document):
             "username",
             "is_admin",
             "is_active",
-            "external_user_id"  # Index for external users lookup
+            "external_user_id",  # Index for external users lookup
+            "search_keys",  # Multikey index for prefix search in user management
+            [("created_at", -1), ("_id", -1)]  # Keyset pagination for user management
         ]
     
     class Config:
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -75,4 +75,25 @@ class BookingResponse(BaseModel):
 class ConflictResponse(BaseModel):
     """Response schema when booking conflicts occur"""
     detail: str
-    conflicting_booking: Optional[BookingResponse] = None
\ No newline at end of file
+    conflicting_booking: Optional[BookingResponse] = None
+
+
+class BookingHistoryResponse(BaseModel):
+    """Response schema for a booking history record"""
+    id: str = Field(alias="_id")
+    booking_id: str
+    booking_number: str
+    changed_by: str
+    action: str
+    old_data: Optional[dict] = None
+    new_data: Optional[dict] = None
+    changed_at: datetime
+    
+    class Config:
+        populate_by_name = True
+
+
+class BookingHistoryListResponse(BaseModel):
+    """Response schema for a page of booking history"""
+    items: List[BookingHistoryResponse]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
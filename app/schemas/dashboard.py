@@ -1,6 +1,23 @@
+from typing import List
+
 from pydantic import BaseModel
 
 
+class RoomUtilization(BaseModel):
+    """Booked time of a room this week"""
+    room_id: str
+    room_name: str
+    bookings: int
+    booked_minutes: int
+    utilization: float  # booked_minutes / operating minutes of the week (0.0 - 1.0+)
+
+
+class HourCount(BaseModel):
+    """Active bookings this week starting in a local hour"""
+    hour: int
+    bookings: int
+
+
 class DashboardStats(BaseModel):
     """Dashboard statistics response"""
     
@@ -18,6 +35,10 @@ class DashboardStats(BaseModel):
     total_users: int
     active_users: int
     
+    # Utilization statistics (this week)
+    room_utilization: List[RoomUtilization] = []
+    peak_hours: List[HourCount] = []
+    
     class Config:
         json_schema_extra = {
             "example": {
@@ -28,6 +49,16 @@ class DashboardStats(BaseModel):
                 "total_rooms": 5,
                 "active_rooms": 4,
                 "total_users": 42,
-                "active_users": 40
+                "active_users": 40,
+                "room_utilization": [
+                    {
+                        "room_id": "507f1f77bcf86cd799439011",
+                        "room_name": "Meeting Room A",
+                        "bookings": 18,
+                        "booked_minutes": 1260,
+                        "utilization": 0.3
+                    }
+                ],
+                "peak_hours": [{"hour": 9, "bookings": 14}, {"hour": 10, "bookings": 11}]
             }
         }
\ No newline at end of file
@@ -18,7 +18,8 @@ class UserManagementResponse(BaseModel):
 class UserListResponse(BaseModel):
     """Response schema for user list"""
     users: List[UserManagementResponse]
-    total: int
+    total: Optional[int] = None  # None when count=none
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 
 class UpdateAdminRequest(BaseModel):
@@ -1,13 +1,39 @@
 """
 Service for managing authentication codes.
 Stores codes in MongoDB with expiration tracking.
+
+Codes are drawn from a counter sequence mapped through a keyed permutation
+of all 6-digit values: consecutive sequence numbers give distinct codes that
+cannot be predicted without SECRET_KEY, so issuing a code is a single insert
+(the counter is reserved in blocks). Expired codes are removed by the TTL
+index on expires_at.
 """
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
-import random
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+
+from pymongo.errors import DuplicateKeyError
 
 from app.core.config import settings
+from app.core.database import get_db
 from app.models.auth_code import AuthCode
+from app.services.counter_service import AUTH_CODE_COUNTER_KEY, SequenceAllocator
+from app.services.auth_code_waiters import auth_code_waiters
+from app.services.index_audit import register_query_shape
+
+
+AUTH_CODE_DIGITS = 6
+AUTH_CODE_HALF_SPACE = 1000  # Feistel halves: 6 digits = 3 + 3
+FEISTEL_ROUNDS = 8
+
+# Indexes replaced by code_unique / expires_at_ttl (same keys, so they must go before Beanie creates those)
+LEGACY_AUTH_CODE_INDEXES = ["code_1", "expires_at_1"]
+
+logger = logging.getLogger(__name__)
 
 
 def convert_utc_to_jakarta(dt: datetime) -> datetime:
@@ -28,16 +54,60 @@ def convert_utc_to_jakarta(dt: datetime) -> datetime:
     return dt.astimezone(settings.timezone)
 
 
+def permute_code(sequence: int, key: bytes) -> str:
+    """
+    Map a sequence number to a 6-digit code with a keyed Feistel permutation.
+    
+    Each round maps (left, right) to (right, left + F(right)), which is
+    invertible, so distinct sequence numbers (mod 10^6) give distinct codes.
+    """
+    left, right = divmod(sequence % (AUTH_CODE_HALF_SPACE ** 2), AUTH_CODE_HALF_SPACE)
+    for round_number in range(FEISTEL_ROUNDS):
+        digest = hmac.new(key, f"{round_number}:{right}".encode(), hashlib.sha256).digest()
+        left, right = right, (left + int.from_bytes(digest[:8], "big")) % AUTH_CODE_HALF_SPACE
+    return f"{left * AUTH_CODE_HALF_SPACE + right:0{AUTH_CODE_DIGITS}d}"
+
+
+async def prepare_auth_codes():
+    """
+    Migrate auth_codes before Beanie creates its indexes: drop the old plain
+    indexes and purge expired codes (older code generation reused codes, which
+    would block the unique index).
+    """
+    collection = get_db()[AuthCode.Settings.name]
+    existing = await collection.index_information()
+    for name in LEGACY_AUTH_CODE_INDEXES:
+        if name in existing:
+            await collection.drop_index(name)
+    
+    result = await collection.delete_many({"expires_at": {"$lt": datetime.now(timezone.utc)}})
+    if result.deleted_count:
+        print(f"✅ Purged {result.deleted_count} expired auth codes")
+
+
+register_query_shape(
+    "auth code by code (verify-code, bot authorization)",
+    AuthCode,
+    lambda: {"code": "123456"}
+)
+
+
 class AuthCodeService:
     """Service for generating and verifying authentication codes."""
     
     def __init__(self):
         """Initialize auth code service."""
         self.code_expiry_minutes = 3  # Codes expire after 3 minutes
+        self.sequence = SequenceAllocator(
+            AUTH_CODE_COUNTER_KEY,
+            "Counter untuk generate kode otorisasi",
+            settings.AUTH_CODE_BLOCK_SIZE
+        )
+        self._code_key = hashlib.sha256(f"auth-code:{settings.SECRET_KEY or ''}".encode()).digest()
     
     async def generate_code(self, telegram_user_id: Optional[int] = None) -> tuple[str, datetime]:
         """
-        Generate a random 6-digit authentication code.
+        Generate a unique 6-digit authentication code.
         
         Args:
             telegram_user_id: Telegram user ID to authorize the code for (optional)
@@ -50,33 +120,32 @@ class AuthCodeService:
         # Get current time in Jakarta timezone
         now = datetime.now(settings.timezone)
         
-        # Generate unique 6-digit random code
+        # Calculate expiration time
+        expires_at_jakarta = now + timedelta(minutes=self.code_expiry_minutes)
+        
+        # Codes only repeat after 10^6 issuances, so a duplicate means the same
+        # code of the previous cycle has not been removed by the TTL monitor yet
         max_attempts = 10
         for _ in range(max_attempts):
-            code = "".join([str(random.randint(0, 9)) for _ in range(6)])
+            code = permute_code(await self.sequence.next(), self._code_key)
             
-            # Check if code already exists
-            existing = await AuthCode.find_one(AuthCode.code == code)
-            # Only use if code doesn't exist or if it's already used
-            if not existing or existing.used:
+            # Store code in database using UTC for consistent storage
+            # MongoDB will store as UTC, we'll convert to Jakarta when reading
+            auth_code = AuthCode(
+                code=code,
+                telegram_user_id=telegram_user_id,  # Optional: Link code to specific user if provided
+                created_at=now.astimezone(timezone.utc),
+                expires_at=expires_at_jakarta.astimezone(timezone.utc),
+                used=False
+            )
+            try:
+                await auth_code.insert()
                 break
+            except DuplicateKeyError:
+                continue
         else:
             raise ValueError("Could not generate unique code after multiple attempts")
         
-        # Calculate expiration time
-        expires_at_jakarta = now + timedelta(minutes=self.code_expiry_minutes)
-        
-        # Store code in database using UTC for consistent storage
-        # MongoDB will store as UTC, we'll convert to Jakarta when reading
-        auth_code = AuthCode(
-            code=code,
-            telegram_user_id=telegram_user_id,  # Optional: Link code to specific user if provided
-            created_at=now.astimezone(timezone.utc),
-            expires_at=expires_at_jakarta.astimezone(timezone.utc),
-            used=False
-        )
-        await auth_code.insert()
-        
         if telegram_user_id:
             print(f"✅ AuthCodeService: Generated and saved code: {code} for user {telegram_user_id}")
         else:
@@ -96,18 +165,18 @@ class AuthCodeService:
         Returns:
             AuthCode object if valid, None otherwise
         """
-        print(f"🔍 AuthCodeService: Searching for code: {code}")
+        logger.debug(f"AuthCodeService: Searching for code: {code}")
         
         # Find code document
         auth_code = await AuthCode.find_one(AuthCode.code == code)
         
-        print(f"🔍 AuthCodeService: Found: {auth_code is not None}")
+        logger.debug(f"AuthCodeService: Found: {auth_code is not None}")
         
         if not auth_code:
-            print(f"🔍 AuthCodeService: Code {code} not found in database")
+            logger.debug(f"AuthCodeService: Code {code} not found in database")
             return None
         
-        print(f"🔍 AuthCodeService: Code details - used={auth_code.used}, has_user_data={auth_code.telegram_user_data is not None}, expires_at={auth_code.expires_at}")
+        logger.debug(f"AuthCodeService: Code details - used={auth_code.used}, has_user_data={auth_code.telegram_user_data is not None}, expires_at={auth_code.expires_at}")
         
         # Get current time in UTC (aware)
         now_utc = datetime.now(timezone.utc).replace(microsecond=0)
@@ -125,28 +194,28 @@ class AuthCodeService:
         now_jakarta = now_utc.astimezone(settings.timezone)
         expires_at_jakarta = expires_at_utc.astimezone(settings.timezone)
         
-        print(f"🔍 AuthCodeService: Current time (UTC): {now_utc}, Expires (UTC): {expires_at_utc}")
-        print(f"🔍 AuthCodeService: Current time (Jakarta): {now_jakarta}, Expires (Jakarta): {expires_at_jakarta}")
+        logger.debug(f"AuthCodeService: Current time (UTC): {now_utc}, Expires (UTC): {expires_at_utc}")
+        logger.debug(f"AuthCodeService: Current time (Jakarta): {now_jakarta}, Expires (Jakarta): {expires_at_jakarta}")
         
         # Check if code is expired (compare aware UTC datetimes)
         if now_utc > expires_at_utc:
-            print(f"🔍 AuthCodeService: Code expired (now={now_utc} > expires_at={expires_at_utc})")
+            logger.debug(f"AuthCodeService: Code expired (now={now_utc} > expires_at={expires_at_utc})")
             return None
         
         # Check if code is already used
         if auth_code.used:
             # If code has user data, it was used by bot - allow verification
             if auth_code.telegram_user_data:
-                print(f"🔍 AuthCodeService: Code used but has user data - allowing verification")
+                logger.debug("AuthCodeService: Code used but has user data - allowing verification")
                 auth_code.expires_at = expires_at_jakarta
                 return auth_code
             # If code is used but has no user data, reject it
-            print(f"🔍 AuthCodeService: Code already used without user data")
+            logger.debug("AuthCodeService: Code already used without user data")
             return None
         
         # Code is valid - update expires_at to Jakarta timezone for consistency
         auth_code.expires_at = expires_at_jakarta
-        print(f"🔍 AuthCodeService: Code is valid!")
+        logger.debug("AuthCodeService: Code is valid!")
         return auth_code
     
     async def mark_code_used(self, code: str, user_data: Dict[str, Any]) -> tuple[bool, str]:
@@ -188,9 +257,44 @@ class AuthCodeService:
         auth_code.used_at = now_jakarta.astimezone(timezone.utc)
         
         await auth_code.save()
+        auth_code_waiters.notify(code)
         print(f"✅ AuthCodeService: Code {code} marked as used by user {requesting_user_id}")
         return True, ""
     
+    async def wait_for_authorization(self, code: str, timeout: float) -> Optional[AuthCode]:
+        """
+        Long-poll variant of verify_code: return as soon as the code has user data
+        (or is invalid/expired), at the latest after `timeout` seconds.
+        
+        Args:
+            code: The authentication code
+            timeout: Maximum seconds to wait while the code is pending
+            
+        Returns:
+            AuthCode object if valid (still pending if the wait timed out), None otherwise
+        """
+        # Subscribe before the first lookup so an authorization in between is not missed
+        event = auth_code_waiters.subscribe(code)
+        try:
+            deadline = time.monotonic() + timeout
+            auth_code = await self.verify_code(code)
+            while auth_code and not auth_code.telegram_user_data:
+                until_expiry = (auth_code.expires_at - datetime.now(settings.timezone)).total_seconds()
+                remaining = min(deadline - time.monotonic(), until_expiry)
+                if remaining <= 0:
+                    break
+                
+                # Periodic re-check covers authorizations on replicas we hear nothing from
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, settings.AUTH_CODE_RECHECK_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+                auth_code = await self.verify_code(code)
+            return auth_code
+        finally:
+            auth_code_waiters.unsubscribe(code, event)
+    
     async def get_code_info(self, code: str) -> Optional[AuthCode]:
         """
         Get information about a code without marking it as used.
@@ -0,0 +1,84 @@
+"""
+In-process registry of requests long-polling an auth code.
+
+GET /auth/verify-code?wait=N subscribes to its code and sleeps until the bot
+authorizes it. AuthCodeService.mark_code_used wakes the waiters of this
+process directly. Authorizations handled by another replica arrive through a
+MongoDB change stream on auth_codes (AUTH_CODE_CHANGE_STREAM_ENABLED), or
+are picked up by the waiter's periodic re-check otherwise.
+"""
+import asyncio
+from typing import Dict, Optional, Set
+
+from app.models.auth_code import AuthCode
+
+
+class AuthCodeWaiters:
+    """Events of waiting requests, keyed by auth code."""
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, code: str) -> asyncio.Event:
+        event = asyncio.Event()
+        self._waiters.setdefault(code, set()).add(event)
+        return event
+
+    def unsubscribe(self, code: str, event: asyncio.Event):
+        events = self._waiters.get(code)
+        if events is None:
+            return
+        events.discard(event)
+        if not events:
+            del self._waiters[code]
+
+    def notify(self, code: str):
+        """Wake every request of this process waiting for the code."""
+        for event in self._waiters.get(code, ()):
+            event.set()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(events) for events in self._waiters.values())
+
+    async def watch_changes(self):
+        """Wake waiters for codes authorized by other replicas (MongoDB change stream)."""
+        pipeline = [{"$match": {
+            "operationType": "update",
+            "updateDescription.updatedFields.used": True
+        }}]
+        while True:
+            try:
+                async with AuthCode.get_motor_collection().watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        document = change.get("fullDocument")
+                        if document:
+                            self.notify(document["code"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Auth code change stream error: {e}")
+                # Waiters may have missed an authorization while disconnected
+                for code in list(self._waiters):
+                    self.notify(code)
+                await asyncio.sleep(5)
+
+    def start_watching(self):
+        """Start change stream watcher in the background."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch_changes())
+
+    async def stop_watching(self):
+        """Stop change stream watcher."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+
+# Global instance
+auth_code_waiters = AuthCodeWaiters()
@@ -0,0 +1,302 @@
+"""
+In-memory interval index of active bookings, grouped per room.
+
+Each room's bookings are kept sorted by start_time together with a running
+maximum of their end times, so conflict checks and schedule lookups are
+answered with a binary search instead of a MongoDB round trip, even when
+older data holds overlapping bookings.
+The index is loaded at startup and kept current by booking_service for this
+process's writes. Writes made by other replicas show up through a periodic
+reload (BOOKING_INDEX_RELOAD_SECONDS) or, with
+BOOKING_INDEX_CHANGE_STREAM_ENABLED, right away through a MongoDB change
+stream on bookings.
+"""
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+from bson import ObjectId
+
+from app.models.booking import Booking
+from app.core.config import settings
+
+
+def to_utc_naive(dt: datetime) -> datetime:
+    """
+    Normalize a datetime to naive UTC (the way MongoDB returns it).
+    Naive datetimes are assumed to be UTC already.
+    """
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def with_utc_naive_times(booking: Booking) -> Booking:
+    """
+    Booking with start/end times as naive UTC (copied if they were tz-aware),
+    so bookings written in this process look like the ones loaded from MongoDB.
+    """
+    start = to_utc_naive(booking.start_time)
+    end = to_utc_naive(booking.end_time)
+    if start is booking.start_time and end is booking.end_time:
+        return booking
+    return booking.copy(update={"start_time": start, "end_time": end})
+
+
+class RoomIntervals:
+    """Sorted bookings of a single room (parallel lists keyed by start_time)."""
+
+    __slots__ = ("starts", "ends", "max_ends", "bookings")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.max_ends: List[datetime] = []  # max(ends[:i + 1])
+        self.bookings: List[Booking] = []
+
+    def _update_max_ends(self, i: int):
+        """Recompute the running maximum of end times from position i on."""
+        del self.max_ends[i:]
+        running = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[i:]:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def add(self, booking: Booking):
+        start = to_utc_naive(booking.start_time)
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, to_utc_naive(booking.end_time))
+        self.bookings.insert(i, booking)
+        self._update_max_ends(i)
+
+    def remove(self, booking_id: str, start: datetime) -> bool:
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if str(self.bookings[i].id) == booking_id:
+                del self.starts[i]
+                del self.ends[i]
+                del self.bookings[i]
+                self._update_max_ends(i)
+                return True
+            i += 1
+        return False
+
+    def find_overlap(
+        self,
+        start: datetime,
+        end: datetime,
+        exclude_booking_id: Optional[str] = None
+    ) -> Optional[Booking]:
+        # Walk back from the last booking starting before the requested end
+        # while some booking at or before i still ends after the requested start
+        i = bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start and (
+                exclude_booking_id is None or str(self.bookings[i].id) != exclude_booking_id
+            ):
+                return self.bookings[i]
+            i -= 1
+        return None
+
+    def between(self, start: datetime, end: datetime) -> List[Booking]:
+        lo = bisect_left(self.starts, start)
+        hi = bisect_right(self.starts, end)
+        return self.bookings[lo:hi]
+
+
+class BookingIndex:
+    """
+    Per-room index of active bookings ending on or after `horizon`.
+
+    Lookups are only answered from memory when `covers()` is True,
+    callers fall back to MongoDB otherwise (cold index or past dates).
+    """
+
+    def __init__(self):
+        self._rooms: Dict[str, RoomIntervals] = {}
+        self._locations: Dict[str, tuple] = {}  # booking_id -> (room_id, start)
+        self.horizon: Optional[datetime] = None
+        self.is_warm: bool = False
+        # Changes made while load() waits for MongoDB, replayed on the fresh data
+        self._pending: Optional[List[Union[Booking, str]]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Load active bookings that have not ended before today (local time)."""
+        now = datetime.now(settings.timezone)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        horizon = to_utc_naive(today_start)
+
+        self._pending = []
+        try:
+            bookings = await Booking.find({
+                "status": "active",
+                "end_time": {"$gte": horizon}
+            }).sort(Booking.start_time).to_list()
+        finally:
+            pending, self._pending = self._pending, None
+
+        self._rooms = {}
+        self._locations = {}
+        for booking in bookings:
+            self._add(booking)
+
+        self.horizon = horizon
+        self.is_warm = True
+        for change in pending:
+            if isinstance(change, str):
+                self._remove(change)
+            else:
+                self.upsert(change)
+        return len(bookings)
+
+    def invalidate(self):
+        """Mark index as cold; lookups fall back to MongoDB until next load()."""
+        self._rooms = {}
+        self._locations = {}
+        self.is_warm = False
+
+    def covers(self, start_time: datetime) -> bool:
+        """Whether every booking relevant to a lookup starting at start_time is indexed."""
+        return self.is_warm and to_utc_naive(start_time) >= self.horizon
+
+    def _add(self, booking: Booking):
+        booking = with_utc_naive_times(booking)
+        room_id = str(booking.room_id)
+        self._rooms.setdefault(room_id, RoomIntervals()).add(booking)
+        self._locations[str(booking.id)] = (room_id, to_utc_naive(booking.start_time))
+
+    def upsert(self, booking: Booking):
+        """Insert or replace a booking; non-active bookings are dropped."""
+        if self._pending is not None:
+            self._pending.append(booking)
+        if not self.is_warm:
+            return
+        self._remove(str(booking.id))
+        if booking.status == "active":
+            self._add(booking)
+
+    def remove(self, booking_id):
+        """Remove a booking by ID (no-op if not indexed)."""
+        if self._pending is not None:
+            self._pending.append(str(booking_id))
+        self._remove(str(booking_id))
+
+    def _remove(self, booking_id: str):
+        location = self._locations.pop(booking_id, None)
+        if location is None:
+            return
+        room_id, start = location
+        room = self._rooms.get(room_id)
+        if room:
+            room.remove(booking_id, start)
+
+    async def refresh_periodically(self, interval: float):
+        """Reload from MongoDB every interval seconds (writes of other replicas, day rollover)."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Booking index reload failed: {e}")
+
+    async def watch_changes(self):
+        """Apply booking writes of every replica as they happen (MongoDB change stream)."""
+        while True:
+            try:
+                async with Booking.get_motor_collection().watch(full_document="updateLookup") as stream:
+                    # Reload once the stream is open so nothing written meanwhile is missed
+                    await self.load()
+                    async for change in stream:
+                        document = change.get("fullDocument")
+                        if document:
+                            self.upsert(Booking.parse_obj(document))
+                        elif change["operationType"] == "delete":
+                            self.remove(change["documentKey"]["_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Booking change stream error: {e}")
+                # Changes may be missed while disconnected; serve from MongoDB meanwhile
+                self.invalidate()
+                await asyncio.sleep(5)
+
+    def start_refreshing(self, interval: float, watch: bool = False):
+        """Keep the index current in the background (periodic reload, optional change stream)."""
+        if interval > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self.refresh_periodically(interval))
+        if watch and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch_changes())
+
+    async def stop_refreshing(self):
+        """Stop background reloads and the change stream watcher."""
+        for task in (self._refresh_task, self._watch_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresh_task = None
+        self._watch_task = None
+
+    def remove_room(self, room_id):
+        """Drop every indexed booking of a room."""
+        room = self._rooms.pop(str(room_id), None)
+        if room:
+            for booking in room.bookings:
+                self._locations.pop(str(booking.id), None)
+
+    def find_conflict(
+        self,
+        room_id: ObjectId,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_booking_id: Optional[ObjectId] = None
+    ) -> Optional[Booking]:
+        """Return an active booking overlapping [start_time, end_time), if any."""
+        room = self._rooms.get(str(room_id))
+        if not room:
+            return None
+        return room.find_overlap(
+            to_utc_naive(start_time),
+            to_utc_naive(end_time),
+            str(exclude_booking_id) if exclude_booking_id else None
+        )
+
+    def get_schedule(
+        self,
+        room_id: ObjectId,
+        start_time: datetime,
+        end_time: datetime,
+        published_only: bool = True
+    ) -> List[Booking]:
+        """Return active bookings of a room starting within [start_time, end_time], sorted by start."""
+        return self.get_schedules(start_time, end_time, [room_id], published_only)
+
+    def get_schedules(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        room_ids: Optional[Iterable[ObjectId]] = None,
+        published_only: bool = True
+    ) -> List[Booking]:
+        """Like get_schedule for several rooms (all indexed rooms if room_ids is None), sorted per room."""
+        keys = self._rooms.keys() if room_ids is None else [str(room_id) for room_id in room_ids]
+        bookings = []
+        for key in keys:
+            room = self._rooms.get(key)
+            if room:
+                bookings.extend(room.between(to_utc_naive(start_time), to_utc_naive(end_time)))
+        if published_only:
+            bookings = [booking for booking in bookings if booking.published]
+        return bookings
+
+
+# Global instance
+booking_index = BookingIndex()
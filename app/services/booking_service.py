@@ -6,26 +6,36 @@ from beanie import PydanticObjectId
 
 from app.models.booking import Booking, UserSnapshot, RoomSnapshot
 from app.core.config import settings
+from app.core.database import get_client
 
 from app.models.booking import Booking, UserSnapshot, RoomSnapshot
-from app.models.booking_history import BookingHistory, HistoryData
+from app.models.booking_history import BookingHistory, BookingHistoryArchive, HistoryData
 from app.models.room import Room
-from app.models.setting import Setting
 from app.models.user import User
 from app.services.conflict_service import (
     check_booking_conflict,
     validate_operating_hours,
     validate_booking_duration,
-    format_conflict_message
+    format_conflict_message,
+    format_slot_conflict_message
+)
+from app.services.booking_index import booking_index
+from app.services.counter_service import booking_number_allocator
+from app.services.settings_service import settings_cache
+from app.services.dashboard_service import invalidate_dashboard_statistics
+from app.services.history_journal import history_journal
+from app.services.index_audit import register_query_shape, sample_id
+from app.services.scheduler_service import schedule_booking_timer, cancel_booking_timer
+from app.services.reservation_service import (
+    claim_room_slots,
+    move_room_slots,
+    release_room_slots
 )
 from app.services.telegram_service import (
     get_telegram_group,
-    notify_new_booking,
+    notify_booking_published,
     notify_booking_updated,
-    notify_booking_cancelled,
-    notify_consumption_group,
-    notify_verification_group_booking,
-    notify_verification_group_cleanup
+    notify_booking_cancelled
 )
 from app.core.config import settings
 
@@ -78,30 +88,23 @@ def format_text_with_links(text: Optional[str]) -> Optional[str]:
 async def generate_booking_number() -> str:
     """
     Generate a unique booking number in format BK-XXXXX.
-    Uses atomic increment in MongoDB settings.
+    Uses atomic increment of the booking counter in MongoDB settings.
     """
-    # Use findOneAndUpdate to atomically increment counter
-    setting = await Setting.find_one(Setting.key == "booking_counter")
-    
-    if not setting:
-        # Initialize counter if not exists
-        setting = Setting(
-            key="booking_counter",
-            value="1",
-            description="Counter untuk generate booking number"
-        )
-        await setting.insert()
-        counter = 1
-    else:
-        # Increment counter
-        counter = int(setting.value) + 1
-        setting.value = str(counter)
-        await setting.save()
+    counter = await booking_number_allocator.next()
     
     # Format as BK-XXXXX (zero-padded 5 digits)
     return f"BK-{counter:05d}"
 
 
+async def generate_booking_numbers(count: int) -> List[str]:
+    """
+    Generate `count` unique booking numbers with a single counter update.
+    Intended for bulk imports.
+    """
+    counters = await booking_number_allocator.reserve(count)
+    return [f"BK-{counter:05d}" for counter in counters]
+
+
 async def create_booking(
     user_id: ObjectId,
     room_id: str,
@@ -174,68 +177,79 @@ async def create_booking(
     
     # Get default consumption group from settings if not provided and has consumption
     if has_consumption and not final_consumption_group_id:
-        setting = await Setting.find_one(Setting.key == "default_consumption_group_id")
-        if setting:
-            try:
-                final_consumption_group_id = int(setting.value)
-            except (ValueError, TypeError):
-                final_consumption_group_id = None
+        final_consumption_group_id = await settings_cache.get_int("default_consumption_group_id")
     
     # Get default verification group from settings if not provided
     if not final_verification_group_id:
-        setting = await Setting.find_one(Setting.key == "default_verification_group_id")
-        if setting:
-            try:
-                final_verification_group_id = int(setting.value)
-            except (ValueError, TypeError):
-                final_verification_group_id = None
-    
-    # Generate booking number
-    booking_number = await generate_booking_number()
-    
-    # Create booking (as draft)
-    booking = Booking(
-        booking_number=booking_number,
-        user_id=user_id,
-        user_snapshot=UserSnapshot(
-            full_name=user.full_name,
-            username=user.username,
-            division=user.division,
-            telegram_id=user.telegram_id
-        ),
-        room_id=ObjectId(room_id),
-        room_snapshot=RoomSnapshot(name=room.name),
-        telegram_group_id=telegram_group_id,  # Store as snapshot
-        title=title,
-        division=division,
-        description=description,
-        start_time=start_time,
-        end_time=end_time,
-        status="active",
-        published=False,  # Start as draft
-        has_consumption=has_consumption,
-        consumption_note=consumption_note,
-        consumption_group_id=final_consumption_group_id,
-        verification_group_id=final_verification_group_id
+        final_verification_group_id = await settings_cache.get_int("default_verification_group_id")
+    
+    # Atomically reserve the room's time slots (guards against concurrent creates)
+    booking_id = PydanticObjectId()
+    reserved, holder_booking_id = await claim_room_slots(
+        ObjectId(room_id),
+        start_time,
+        end_time,
+        booking_id
     )
     
-    await booking.insert()
+    if not reserved:
+        error_msg = await format_slot_conflict_message(holder_booking_id)
+        raise ValueError(error_msg)
     
-    # Create history record
-    await create_history(
-        booking_id=booking.id,
-        booking_number=booking_number,
-        changed_by=user_id,
-        action="created",
-        new_data=HistoryData(
-            room_snapshot={"name": room.name},
-            start_time=start_time,
-            end_time=end_time,
+    # From here on the claim must be released if anything fails
+    try:
+        # Generate booking number
+        booking_number = await generate_booking_number()
+        
+        # Create booking (as draft)
+        booking = Booking(
+            booking_number=booking_number,
+            user_id=user_id,
+            user_snapshot=UserSnapshot(
+                full_name=user.full_name,
+                username=user.username,
+                division=user.division,
+                telegram_id=user.telegram_id
+            ),
+            room_id=ObjectId(room_id),
+            room_snapshot=RoomSnapshot(name=room.name),
+            telegram_group_id=telegram_group_id,  # Store as snapshot
             title=title,
+            division=division,
             description=description,
-            division=division
+            start_time=start_time,
+            end_time=end_time,
+            status="active",
+            published=False,  # Start as draft
+            has_consumption=has_consumption,
+            consumption_note=consumption_note,
+            consumption_group_id=final_consumption_group_id,
+            verification_group_id=final_verification_group_id
         )
-    )
+        booking.id = booking_id
+        
+        history = build_history(
+            booking_id=booking.id,
+            booking_number=booking_number,
+            changed_by=user_id,
+            action="created",
+            new_data=HistoryData(
+                room_snapshot={"name": room.name},
+                start_time=start_time,
+                end_time=end_time,
+                title=title,
+                description=description,
+                division=division
+            )
+        )
+        
+        await write_booking_with_history(booking, history, insert=True)
+    except Exception:
+        await release_room_slots(booking_id)
+        raise
+    booking_index.upsert(booking)
+    invalidate_dashboard_statistics()
+    await schedule_booking_timer(booking)
     
     # Note: No notification sent yet (booking is draft)
     # User must call publish_booking() to publish and send notification
@@ -278,10 +292,7 @@ async def publish_booking(
     # Mark as published
     booking.published = True
     booking.updated_at = datetime.now(settings.timezone)
-    await booking.save()
-    
-    # Create history record
-    await create_history(
+    history = build_history(
         booking_id=booking.id,
         booking_number=booking.booking_number,
         changed_by=user_id,
@@ -295,19 +306,14 @@ async def publish_booking(
             division=booking.division
         )
     )
+    await write_booking_with_history(booking, history)
+    booking_index.upsert(booking)
+    invalidate_dashboard_statistics()
+    await schedule_booking_timer(booking)
     
-    # Send multi-group notifications
-    
-    # 1. Always send to selected group (existing behavior)
-    await notify_new_booking(booking)
-    
-    # 2. Always send to verification group (if configured)
-    if booking.verification_group_id:
-        await notify_verification_group_booking(booking)
-    
-    # 3. Send to consumption group if has consumption (if configured)
-    if booking.has_consumption and booking.consumption_group_id:
-        await notify_consumption_group(booking)
+    # Send multi-group notifications concurrently
+    # (selected group, verification group, consumption group)
+    await notify_booking_published(booking)
     
     return booking
 
@@ -420,15 +426,27 @@ async def update_booking(
         update_data["start_time"] = new_start
         update_data["end_time"] = new_end
     
+    # Move slot reservation when room or time changes
+    old_slot_range = (booking.room_id, booking.start_time, booking.end_time)
+    slots_moved = room_id is not None or bool(start_time or end_time)
+    if slots_moved:
+        reserved, holder_booking_id = await move_room_slots(
+            booking.id,
+            room_id_obj,
+            update_data.get("start_time", booking.start_time),
+            update_data.get("end_time", booking.end_time)
+        )
+        
+        if not reserved:
+            error_msg = await format_slot_conflict_message(holder_booking_id)
+            raise ValueError(error_msg)
+    
     # Apply updates
     for field, value in update_data.items():
         setattr(booking, field, value)
     
     booking.updated_at = datetime.now(settings.timezone)
-    await booking.save()
-    
-    # Create history record
-    await create_history(
+    history = build_history(
         booking_id=booking.id,
         booking_number=booking.booking_number,
         changed_by=user_id,
@@ -443,6 +461,18 @@ async def update_booking(
             division=booking.division
         )
     )
+    try:
+        await write_booking_with_history(booking, history)
+    except Exception:
+        if slots_moved:
+            # The booking still holds its old range; hand the new slots back
+            reserved, _ = await move_room_slots(booking.id, *old_slot_range)
+            if not reserved:
+                print(f"⚠️  Could not restore room slots of {booking.booking_number}")
+        raise
+    booking_index.upsert(booking)
+    invalidate_dashboard_statistics()
+    await schedule_booking_timer(booking)
     
     # Send notification only if booking is published (not draft)
     if booking.published:
@@ -480,15 +510,28 @@ async def cancel_booking(
     if booking.user_id != user_id and not is_admin:
         raise ValueError("Anda tidak memiliki akses untuk membatalkan booking ini")
     
-    # Cancel booking
+    return await cancel_active_booking(booking, user_id)
+
+
+async def cancel_active_booking(
+    booking: Booking,
+    user_id: ObjectId,
+    notify: bool = True
+) -> Booking:
+    """
+    Cancel a loaded active booking: write it with its history, drop it from
+    the index, dashboard cache and timers, and free its room slots.
+    
+    Args:
+        booking: Active booking (permissions already checked)
+        user_id: User cancelling the booking
+        notify: Send the cancellation notification
+    """
     booking.status = "cancelled"
     booking.cancelled_at = datetime.now(settings.timezone)
     booking.cancelled_by = user_id
     booking.updated_at = datetime.now(settings.timezone)
-    await booking.save()
-    
-    # Create history record
-    await create_history(
+    history = build_history(
         booking_id=booking.id,
         booking_number=booking.booking_number,
         changed_by=user_id,
@@ -500,9 +543,14 @@ async def cancel_booking(
             title=booking.title
         )
     )
+    await write_booking_with_history(booking, history)
+    booking_index.upsert(booking)
+    invalidate_dashboard_statistics()
+    await schedule_booking_timer(booking)
+    await release_room_slots(booking.id)
     
-    # Send notification
-    await notify_booking_cancelled(booking)
+    if notify:
+        await notify_booking_cancelled(booking)
     
     return booking
 
@@ -533,11 +581,18 @@ async def delete_booking(
     if booking.user_id != user_id and not is_admin:
         raise ValueError("Anda tidak memiliki akses untuk menghapus booking ini")
     
-    # Delete booking history records first
+    # Delete booking history records first (including ones still buffered)
+    await history_journal.flush()
     await BookingHistory.find(BookingHistory.booking_id == booking_obj_id).delete_many()
+    await BookingHistoryArchive.find(BookingHistoryArchive.booking_id == booking_obj_id).delete_many()
     
     # Delete booking
     await booking.delete()
+    booking_index.remove(booking_obj_id)
+    invalidate_dashboard_statistics()
+    if booking.published:
+        await cancel_booking_timer(booking_obj_id)
+    await release_room_slots(booking_obj_id)
     
     return {
         "message": "Booking berhasil dihapus secara permanen",
@@ -546,7 +601,7 @@ async def delete_booking(
     }
 
 
-async def create_history(
+def build_history(
     booking_id: PydanticObjectId,
     booking_number: str,
     changed_by: ObjectId,
@@ -554,8 +609,8 @@ async def create_history(
     old_data: Optional[HistoryData] = None,
     new_data: Optional[HistoryData] = None
 ) -> BookingHistory:
-    """Create a booking history record."""
-    history = BookingHistory(
+    """Build a booking history record (written by write_booking_with_history)."""
+    return BookingHistory(
         booking_id=ObjectId(booking_id),
         booking_number=booking_number,
         changed_by=changed_by,
@@ -563,19 +618,61 @@ async def create_history(
         old_data=old_data,
         new_data=new_data
     )
-    await history.insert()
-    return history
 
 
-async def get_user_bookings(user_id: ObjectId, status: Optional[str] = None) -> List[Booking]:
-    """Get all bookings for a user, optionally filtered by status."""
+async def write_booking_with_history(booking: Booking, history: BookingHistory, insert: bool = False):
+    """
+    Write a booking and its history record.
+    
+    In transactional journal mode both are committed in one MongoDB transaction.
+    Otherwise only the booking is written inline and the history record goes
+    to the write-behind journal (or is written inline too if the journal is full).
+    """
+    if history_journal.transactional:
+        async with await get_client().start_session() as session:
+            async with session.start_transaction():
+                if insert:
+                    await booking.insert(session=session)
+                else:
+                    await booking.save(session=session)
+                await history.insert(session=session)
+        return
+    
+    if insert:
+        await booking.insert()
+    else:
+        await booking.save()
+    if not history_journal.record(history):
+        # Journal full (MongoDB has been failing): write inline instead of buffering more
+        await history.insert()
+
+
+async def get_user_bookings(
+    user_id: ObjectId,
+    status: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> List[Booking]:
+    """
+    Get all bookings for a user, optionally filtered by status.
+    With a projection, raw documents are returned instead of Booking models.
+    """
     query = {"user_id": user_id}
     if status:
         query["status"] = status
     
+    if projection is not None:
+        return await Booking.get_motor_collection().find(query, projection).sort("created_at", -1).to_list(None)
     return await Booking.find(query).sort(-Booking.created_at).to_list()
 
 
+register_query_shape(
+    "bookings of a user (GET /bookings/my)",
+    Booking,
+    lambda: {"user_id": sample_id(), "status": "active"},
+    sort=[("created_at", -1)]
+)
+
+
 async def get_booking_by_number(booking_number: str) -> Optional[Booking]:
     """Get a booking by its booking number."""
     return await Booking.find_one(Booking.booking_number == booking_number)
\ No newline at end of file
@@ -1,21 +1,23 @@
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from typing import Optional, Tuple
 from bson import ObjectId
 from app.models.booking import Booking
-from app.models.setting import Setting
+from app.services.booking_index import booking_index
+from app.services.index_audit import register_query_shape, sample_id, sample_now
+from app.services.settings_service import settings_cache
 from app.core.config import settings
 
 
 async def get_operating_hours() -> Tuple[time, time]:
     """
-    Get operating hours from settings.
+    Get operating hours from settings (cached).
     Returns (start_time, end_time) as time objects.
     """
-    start_setting = await Setting.find_one(Setting.key == "operating_hours_start")
-    end_setting = await Setting.find_one(Setting.key == "operating_hours_end")
+    start_value = await settings_cache.get("operating_hours_start")
+    end_value = await settings_cache.get("operating_hours_end")
     
-    start_hour, start_minute = map(int, start_setting.value.split(":")) if start_setting else (8, 0)
-    end_hour, end_minute = map(int, end_setting.value.split(":")) if end_setting else (18, 0)
+    start_hour, start_minute = map(int, start_value.split(":")) if start_value else (8, 0)
+    end_hour, end_minute = map(int, end_value.split(":")) if end_value else (18, 0)
     
     return time(start_hour, start_minute), time(end_hour, end_minute)
 
@@ -100,9 +102,22 @@ async def check_booking_conflict(
         end_time: Proposed booking end time
         exclude_booking_id: If provided, exclude this booking from conflict check (for updates)
     
+    Answered from the in-memory booking index when it covers the requested
+    range, otherwise falls back to MongoDB.
+    
     Returns:
         (has_conflict, conflicting_booking)
     """
+    # Fast path: in-memory interval index
+    if booking_index.covers(start_time):
+        conflicting_booking = booking_index.find_conflict(
+            room_id,
+            start_time,
+            end_time,
+            exclude_booking_id=exclude_booking_id
+        )
+        return (conflicting_booking is not None), conflicting_booking
+    
     # Build base query
     query = {
         "room_id": room_id,
@@ -122,6 +137,18 @@ async def check_booking_conflict(
     return (conflicting_booking is not None), conflicting_booking
 
 
+register_query_shape(
+    "conflict check (check_booking_conflict)",
+    Booking,
+    lambda: {
+        "room_id": sample_id(),
+        "status": "active",
+        "start_time": {"$lt": sample_now() + timedelta(hours=1)},
+        "end_time": {"$gt": sample_now()}
+    }
+)
+
+
 async def format_conflict_message(conflicting_booking: Booking) -> str:
     """
     Format a user-friendly conflict message.
@@ -147,3 +174,14 @@ async def format_conflict_message(conflicting_booking: Booking) -> str:
     message += f" pukul {start_str}–{end_str} WIB di {room_name}"
     
     return message
+
+
+async def format_slot_conflict_message(holder_booking_id: Optional[ObjectId]) -> str:
+    """
+    Format conflict message when a concurrent booking won the slot reservation.
+    """
+    conflicting_booking = await Booking.get(holder_booking_id) if holder_booking_id else None
+    if conflicting_booking:
+        return await format_conflict_message(conflicting_booking)
+    
+    return "Ruangan sedang dibooking oleh pengguna lain pada jam tersebut. Silakan coba lagi."
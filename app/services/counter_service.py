@@ -0,0 +1,95 @@
+"""
+Atomic counters stored in the settings collection.
+
+Counters keep their string `value` (so they still show up in the admin
+settings screen) and are incremented server-side with a single
+find_one_and_update pipeline update - no read-modify-write race.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import List
+
+from pymongo import ReturnDocument
+
+from app.models.setting import Setting
+from app.core.config import settings
+
+
+BOOKING_COUNTER_KEY = "booking_counter"
+AUTH_CODE_COUNTER_KEY = "auth_code_counter"
+# Incremented on every booking / login code; the settings cache ignores their changes
+COUNTER_KEYS = [BOOKING_COUNTER_KEY, AUTH_CODE_COUNTER_KEY]
+
+
+async def increment_counter(key: str, amount: int = 1, description: str = None) -> int:
+    """
+    Atomically add `amount` to a counter setting and return the new value.
+    Creates the counter (starting from 0) if it does not exist yet.
+    """
+    current_value = {
+        "$convert": {"input": "$value", "to": "long", "onError": 0, "onNull": 0}
+    }
+    document = await Setting.get_motor_collection().find_one_and_update(
+        {"key": key},
+        [
+            {
+                "$set": {
+                    "value": {"$toString": {"$add": [current_value, amount]}},
+                    "description": {"$ifNull": ["$description", description]},
+                    "updated_at": datetime.now(timezone.utc)
+                }
+            }
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return int(document["value"])
+
+
+class SequenceAllocator:
+    """
+    Hands out values of a counter.
+    
+    With block_size == 1 every value is a single atomic $inc round trip.
+    With block_size > 1 the worker reserves a block of values at once and
+    serves them from memory; values stay unique across workers but are no
+    longer strictly chronological, and unused values of a block are skipped
+    when the process restarts.
+    """
+    
+    def __init__(self, key: str, description: str, block_size: int = 1):
+        self.key = key
+        self.description = description
+        self.block_size = max(1, block_size)
+        self._next = 0
+        self._end = 0  # Exclusive end of the reserved block
+        self._lock = asyncio.Lock()
+    
+    async def reserve(self, count: int) -> List[int]:
+        """Reserve `count` consecutive values in one round trip (bulk imports)."""
+        last = await increment_counter(self.key, count, self.description)
+        return list(range(last - count + 1, last + 1))
+    
+    async def next(self) -> int:
+        """Get the next counter value."""
+        if self.block_size == 1:
+            return (await self.reserve(1))[0]
+        
+        async with self._lock:
+            if self._next >= self._end:
+                block = await self.reserve(self.block_size)
+                self._next, self._end = block[0], block[-1] + 1
+            value = self._next
+            self._next += 1
+            return value
+
+
+class BookingNumberAllocator(SequenceAllocator):
+    """Hands out booking counter values."""
+    
+    def __init__(self, block_size: int = 1):
+        super().__init__(BOOKING_COUNTER_KEY, "Counter untuk generate booking number", block_size)
+
+
+# Global instance
+booking_number_allocator = BookingNumberAllocator(settings.BOOKING_NUMBER_BLOCK_SIZE)
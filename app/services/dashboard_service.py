@@ -1,22 +1,140 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-from app.models.booking import Booking
+from app.models.booking import Booking, BOOKING_STATUSES
 from app.models.room import Room
 from app.models.user import User
+from app.services.conflict_service import get_operating_hours
+from app.services.index_audit import register_query_shape, sample_now
 from app.core.config import settings
 
 
+# Short-lived cache of the last computed statistics (invalidated on booking writes)
+_stats_cache: Optional[Dict[str, Any]] = None
+_stats_cached_at: float = 0.0
+
+
+def invalidate_dashboard_statistics():
+    """Drop cached dashboard statistics; called after every booking write."""
+    global _stats_cache
+    _stats_cache = None
+
+
+def _in_range(field: str, start: datetime, end: datetime) -> Dict[str, Any]:
+    """Aggregation expression: start <= $field < end."""
+    return {"$and": [{"$gte": [field, start]}, {"$lt": [field, end]}]}
+
+
+def _count_if(condition: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+async def _aggregate_bookings(
+    today_start: datetime,
+    today_end: datetime,
+    week_start: datetime,
+    week_end: datetime
+) -> Dict[str, Any]:
+    """
+    Booking counts, per-room booked minutes and start-hour histogram for the week,
+    in a single $facet aggregation over this week's bookings.
+    """
+    is_active = {"$eq": ["$status", "active"]}
+    is_today = _in_range("$start_time", today_start, today_end)
+    
+    pipeline = [
+        # Listing every status lets the (status, start_time) index serve the range
+        {"$match": {
+            "status": {"$in": BOOKING_STATUSES},
+            "start_time": {"$gte": week_start, "$lt": week_end}
+        }},
+        {"$facet": {
+            "counts": [
+                {"$group": {
+                    "_id": None,
+                    "bookings_this_week": {"$sum": 1},
+                    "bookings_today": _count_if(is_today),
+                    "active_bookings_this_week": _count_if(is_active),
+                    "active_bookings_today": _count_if({"$and": [is_active, is_today]})
+                }}
+            ],
+            "rooms": [
+                {"$match": {"status": "active"}},
+                {"$group": {
+                    "_id": "$room_id",
+                    "bookings": {"$sum": 1},
+                    "booked_minutes": {"$sum": {
+                        "$divide": [{"$subtract": ["$end_time", "$start_time"]}, 60000]
+                    }}
+                }}
+            ],
+            "hours": [
+                {"$match": {"status": "active"}},
+                {"$group": {
+                    "_id": {"$hour": {"date": "$start_time", "timezone": settings.TIMEZONE}},
+                    "bookings": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ]
+        }}
+    ]
+    
+    result = await Booking.get_motor_collection().aggregate(pipeline).to_list(length=1)
+    return result[0] if result else {"counts": [], "rooms": [], "hours": []}
+
+
+register_query_shape(
+    "dashboard week range (_aggregate_bookings)",
+    Booking,
+    lambda: {
+        "status": {"$in": BOOKING_STATUSES},
+        "start_time": {"$gte": sample_now() - timedelta(days=7), "$lt": sample_now()}
+    }
+)
+
+
+async def _aggregate_rooms() -> List[Dict[str, Any]]:
+    """All rooms (id, name, is_active) - the room catalog is small."""
+    return await Room.get_motor_collection().find(
+        {}, {"name": 1, "is_active": 1}
+    ).sort("name", 1).to_list(length=None)
+
+
+async def _aggregate_users() -> Dict[str, int]:
+    """Total and active user counts in one aggregation."""
+    result = await User.get_motor_collection().aggregate([
+        {"$group": {
+            "_id": None,
+            "total_users": {"$sum": 1},
+            "active_users": _count_if({"$eq": ["$is_active", True]})
+        }}
+    ]).to_list(length=1)
+    return result[0] if result else {"total_users": 0, "active_users": 0}
+
+
 async def get_dashboard_statistics() -> Dict[str, Any]:
     """
     Get comprehensive dashboard statistics.
     
+    Served from a short-TTL cache (DASHBOARD_STATS_CACHE_TTL_SECONDS) that is
+    dropped on every booking write. The booking, room and user queries run
+    concurrently, so a cache miss costs one round trip.
+    
     Returns:
         Dictionary containing:
         - Booking statistics (today, this week, active)
         - Room statistics (total, active)
         - User statistics (total, active)
+        - Room utilization this week (booked share of operating hours)
+        - Peak hours this week (active bookings by local start hour)
     """
+    global _stats_cache, _stats_cached_at
+    
+    if _stats_cache is not None and time.monotonic() - _stats_cached_at < settings.DASHBOARD_STATS_CACHE_TTL_SECONDS:
+        return _stats_cache
+    
     # Get current time in configured timezone (Asia/Jakarta)
     now = datetime.now(settings.timezone)
     
@@ -38,55 +156,49 @@ async def get_dashboard_statistics() -> Dict[str, Any]:
     week_start = datetime.utcfromtimestamp(week_start_local.timestamp())
     week_end = datetime.utcfromtimestamp(week_end_local.timestamp())
     
-    # Query bookings for today (all statuses)
-    bookings_today = await Booking.find({
-        "start_time": {
-            "$gte": today_start,
-            "$lt": today_end
-        }
-    }).count()
-    
-    # Query bookings for this week (all statuses)
-    bookings_this_week = await Booking.find({
-        "start_time": {
-            "$gte": week_start,
-            "$lt": week_end
-        }
-    }).count()
-    
-    # Query active bookings for today
-    active_bookings_today = await Booking.find({
-        "status": "active",
-        "start_time": {
-            "$gte": today_start,
-            "$lt": today_end
-        }
-    }).count()
-    
-    # Query active bookings for this week
-    active_bookings_this_week = await Booking.find({
-        "status": "active",
-        "start_time": {
-            "$gte": week_start,
-            "$lt": week_end
-        }
-    }).count()
-    
-    # Query room statistics
-    total_rooms = await Room.find().count()
-    active_rooms = await Room.find({"is_active": True}).count()
-    
-    # Query user statistics
-    total_users = await User.find().count()
-    active_users = await User.find({"is_active": True}).count()
-    
-    return {
-        "bookings_today": bookings_today,
-        "bookings_this_week": bookings_this_week,
-        "active_bookings_today": active_bookings_today,
-        "active_bookings_this_week": active_bookings_this_week,
-        "total_rooms": total_rooms,
-        "active_rooms": active_rooms,
-        "total_users": total_users,
-        "active_users": active_users
-    }
\ No newline at end of file
+    bookings, rooms, users, (open_time, close_time) = await asyncio.gather(
+        _aggregate_bookings(today_start, today_end, week_start, week_end),
+        _aggregate_rooms(),
+        _aggregate_users(),
+        get_operating_hours()
+    )
+    
+    counts = bookings["counts"][0] if bookings["counts"] else {}
+    
+    # Utilization: booked minutes vs. operating minutes over the 7-day week
+    operating_minutes = (
+        (close_time.hour * 60 + close_time.minute) - (open_time.hour * 60 + open_time.minute)
+    ) * 7
+    booked_by_room = {row["_id"]: row for row in bookings["rooms"]}
+    room_utilization = []
+    for room in rooms:
+        row = booked_by_room.get(room["_id"], {})
+        booked_minutes = int(row.get("booked_minutes", 0))
+        room_utilization.append({
+            "room_id": str(room["_id"]),
+            "room_name": room.get("name", ""),
+            "bookings": row.get("bookings", 0),
+            "booked_minutes": booked_minutes,
+            "utilization": round(booked_minutes / operating_minutes, 4) if operating_minutes > 0 else 0.0
+        })
+    
+    # Peak hours: all 24 local hours, zero-filled
+    bookings_by_hour = {row["_id"]: row["bookings"] for row in bookings["hours"]}
+    peak_hours = [{"hour": hour, "bookings": bookings_by_hour.get(hour, 0)} for hour in range(24)]
+    
+    stats = {
+        "bookings_today": counts.get("bookings_today", 0),
+        "bookings_this_week": counts.get("bookings_this_week", 0),
+        "active_bookings_today": counts.get("active_bookings_today", 0),
+        "active_bookings_this_week": counts.get("active_bookings_this_week", 0),
+        "total_rooms": len(rooms),
+        "active_rooms": sum(1 for room in rooms if room.get("is_active") is True),
+        "total_users": users["total_users"],
+        "active_users": users["active_users"],
+        "room_utilization": room_utilization,
+        "peak_hours": peak_hours
+    }
+    
+    _stats_cache = stats
+    _stats_cached_at = time.monotonic()
+    return stats
@@ -0,0 +1,212 @@
+"""
+Write-behind journal for booking history.
+
+Booking mutations hand their BookingHistory record to the journal instead of
+inserting it inline. Records are buffered in memory and written with
+insert_many when a batch is full or the flush interval elapses, and once more
+on shutdown. Records get their _id when they are buffered, so a batch that
+failed halfway can be retried without creating duplicates.
+
+A batch that fails because MongoDB is unreachable stays buffered and is
+retried. Records MongoDB rejects on their own (validation, size) are logged
+in full and dropped, so one bad record cannot hold back the ones after it.
+The buffer is capped at HISTORY_JOURNAL_MAX_BUFFERED records; beyond that
+booking_service writes history inline again, which slows requests down
+instead of growing memory while the database is down.
+
+Records still buffered when the process dies are lost. HISTORY_JOURNAL_MODE
+"auto" (default) therefore writes history in the same transaction as the
+booking whenever MongoDB runs as a replica set or sharded cluster, and only
+falls back to buffering on a standalone server, which has no transactions.
+"""
+import asyncio
+from typing import List, Optional
+
+from beanie import PydanticObjectId
+from pymongo.errors import (
+    BulkWriteError,
+    ConnectionFailure,
+    ExecutionTimeout,
+    PyMongoError,
+    WTimeoutError
+)
+
+from app.models.booking_history import BookingHistory
+from app.core.database import get_client
+from app.core.config import settings
+
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed write may succeed when retried unchanged (MongoDB unreachable, overloaded)."""
+    if isinstance(error, (ConnectionFailure, ExecutionTimeout, WTimeoutError)):
+        return True
+    return isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError")
+
+
+class HistoryJournal:
+    """Buffers BookingHistory records and writes them in batches in the background."""
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0, max_buffered: int = 10000):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_buffered = max(self.batch_size, max_buffered)
+        # Resolved by resolve_mode() at startup; "auto" behaves as buffered until then
+        self.mode = settings.HISTORY_JOURNAL_MODE
+        self._buffer: List[BookingHistory] = []
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self._written = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._dropped = 0
+
+    @property
+    def transactional(self) -> bool:
+        return self.mode == "transactional"
+
+    async def resolve_mode(self) -> str:
+        """Pick transactional or buffered for mode "auto" from the server topology."""
+        if self.mode == "auto":
+            hello = await get_client().admin.command("hello")
+            supports_transactions = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+            self.mode = "transactional" if supports_transactions else "buffered"
+        return self.mode
+
+    def record(self, history: BookingHistory) -> bool:
+        """
+        Buffer a history record; a full batch wakes the flusher.
+
+        Returns:
+            False if the buffer is full (the caller writes the record itself)
+        """
+        if len(self._buffer) >= self.max_buffered:
+            return False
+        if history.id is None:
+            history.id = PydanticObjectId()
+        self._buffer.append(history)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background flusher and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"❌ History journal: {len(self._buffer)} records not written on shutdown: {e}")
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  History journal flush failed, {len(self._buffer)} records kept for retry: {e}")
+
+    async def flush(self) -> int:
+        """
+        Write every buffered record. Returns number written.
+
+        Raises:
+            PyMongoError: If MongoDB could not be reached (the batch stays buffered)
+        """
+        written = 0
+        async with self._lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:len(batch)]
+                try:
+                    written += await self._write_batch(batch)
+                except BaseException:
+                    # Includes cancellation mid-write: retrying is safe since _ids are fixed
+                    self._requeue(batch)
+                    raise
+                self._flushes += 1
+        return written
+
+    async def _write_batch(self, batch: List[BookingHistory]) -> int:
+        """
+        Insert a batch, dropping records MongoDB rejects on their own.
+
+        Raises:
+            PyMongoError: On transient failures (nothing dropped, the caller requeues)
+        """
+        written = len(batch)
+        try:
+            await BookingHistory.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            details = e.details or {}
+            if details.get("writeConcernErrors"):
+                raise
+            rejected = [
+                error for error in details.get("writeErrors", [])
+                if error.get("code") != DUPLICATE_KEY_ERROR
+            ]
+            for error in rejected:
+                self._drop(batch[error["index"]], error.get("errmsg", f"code {error.get('code')}"))
+            written -= len(rejected)
+        except Exception as e:
+            if is_transient(e):
+                raise
+            if len(batch) == 1:
+                self._drop(batch[0], str(e))
+                return 0
+            # Raised for the batch as a whole (e.g. an oversized record): write one by one to find the bad ones
+            written = 0
+            for history in batch:
+                written += await self._write_batch([history])
+            return written
+        self._written += written
+        return written
+
+    def _drop(self, history: BookingHistory, reason: str):
+        """Log a record MongoDB will never accept, in full, and drop it."""
+        self._dropped += 1
+        print(f"❌ History journal: dropped record {history.id} ({reason}): {history.json()}")
+
+    def _requeue(self, batch: List[BookingHistory]):
+        self._failed_flushes += 1
+        self._buffer[:0] = batch
+
+    def get_metrics(self) -> dict:
+        return {
+            "mode": self.mode,
+            "buffered": len(self._buffer),
+            "written": self._written,
+            "flushes": self._flushes,
+            "failed_flushes": self._failed_flushes,
+            "dropped": self._dropped
+        }
+
+
+# Global instance
+history_journal = HistoryJournal(
+    batch_size=settings.HISTORY_JOURNAL_BATCH_SIZE,
+    flush_interval=settings.HISTORY_JOURNAL_FLUSH_SECONDS,
+    max_buffered=settings.HISTORY_JOURNAL_MAX_BUFFERED
+)
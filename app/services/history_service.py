@@ -0,0 +1,186 @@
+"""
+Booking history queries and archival.
+
+Recent history lives in booking_history. The archival job moves records older
+than HISTORY_ARCHIVE_AFTER_MONTHS into booking_history_archive, one bucket
+document per booking and month, so the hot collection (and its indexes) stays
+small. Timeline queries read both and merge them on (changed_at, _id).
+"""
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.booking_history import BookingHistory, BookingHistoryArchive
+from app.services.history_journal import history_journal
+from app.services.index_audit import register_query_shape, sample_id
+from app.api.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.core.config import settings
+
+
+HISTORY_ARCHIVE_JOB_ID = "archive_booking_history"
+HISTORY_SORT = [("changed_at", -1), ("_id", -1)]
+HISTORY_MAX_PAGE_SIZE = 200
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def get_archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Start (naive UTC) of the oldest month kept in booking_history."""
+    now = now or datetime.now(timezone.utc)
+    months = now.year * 12 + now.month - 1 - settings.HISTORY_ARCHIVE_AFTER_MONTHS
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+async def find_archived_history(
+    bucket_filter: Dict[str, Any],
+    entry_filter: Dict[str, Any],
+    cursor: Optional[str],
+    limit: int
+) -> List[dict]:
+    """Unwind matching archive buckets and return entries after the cursor, newest first."""
+    bucket_query = dict(bucket_filter)
+    if cursor:
+        changed_at, _ = decode_cursor(cursor)
+        bucket_query["month"] = {"$lte": changed_at}
+
+    entry_query = dict(entry_filter)
+    entry_query.update(keyset_filter("changed_at", cursor))
+
+    pipeline = [
+        {"$match": bucket_query},
+        {"$unwind": "$entries"},
+        {"$replaceRoot": {"newRoot": "$entries"}},
+        {"$match": entry_query},
+        {"$sort": dict(HISTORY_SORT)},
+        {"$limit": limit}
+    ]
+    return await BookingHistoryArchive.get_motor_collection().aggregate(pipeline).to_list(None)
+
+
+async def get_history_page(
+    entry_filter: Dict[str, Any],
+    bucket_filter: Dict[str, Any],
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Page through history records matching entry_filter, newest first.
+
+    Args:
+        entry_filter: Filter on history records (served by a timeline index)
+        bucket_filter: Equivalent filter on archive buckets
+        cursor: Cursor returned for the previous page
+        limit: Page size
+
+    Returns:
+        (raw history documents, next_cursor)
+    """
+    # Read-your-writes for changes made through this process
+    await history_journal.flush()
+
+    query = dict(entry_filter)
+    query.update(keyset_filter("changed_at", cursor))
+    documents = await BookingHistory.get_motor_collection().find(query).sort(HISTORY_SORT).limit(limit + 1).to_list(None)
+
+    # Archived records are all older than the cutoff, so a full page of newer
+    # records means the archive cannot contribute to this page
+    if len(documents) <= limit or documents[-1]["changed_at"] < get_archive_cutoff():
+        archived = await find_archived_history(bucket_filter, entry_filter, cursor, limit + 1)
+        if archived:
+            # An interrupted archival run leaves records in both collections until the
+            # next run deletes them; keep one copy of each
+            merged = {document["_id"]: document for document in archived}
+            merged.update((document["_id"], document) for document in documents)
+            documents = sorted(
+                merged.values(),
+                key=lambda document: (document["changed_at"], document["_id"]),
+                reverse=True
+            )[:limit + 1]
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1]["changed_at"], documents[-1]["_id"])
+
+    return documents, next_cursor
+
+
+register_query_shape(
+    "booking timeline (GET /bookings/{id}/history)",
+    BookingHistory,
+    lambda: {"booking_id": sample_id()},
+    sort=HISTORY_SORT
+)
+register_query_shape(
+    "changes made by a user (GET /admin/users/{id}/history)",
+    BookingHistory,
+    lambda: {"changed_by": sample_id()},
+    sort=HISTORY_SORT
+)
+
+
+async def archive_booking_history() -> int:
+    """
+    Move history records older than the archive cutoff into monthly buckets.
+
+    Each round copies a batch into the buckets, then deletes it from
+    booking_history. The copy is idempotent: buckets are upserted and
+    entries are upserted by _id, so copying a record twice keeps one entry.
+    A run interrupted between the two steps leaves the batch in both
+    collections (timeline queries show it once, see get_history_page); the
+    next run copies it again as a no-op and completes the delete.
+    Returns number of records archived.
+    """
+    if settings.HISTORY_ARCHIVE_AFTER_MONTHS <= 0:
+        return 0
+
+    cutoff = get_archive_cutoff()
+    collection = BookingHistory.get_motor_collection()
+    archived = 0
+
+    while True:
+        documents = await collection.find(
+            {"changed_at": {"$lt": cutoff}}
+        ).sort("changed_at", 1).limit(settings.HISTORY_ARCHIVE_BATCH_SIZE).to_list(None)
+        if not documents:
+            break
+
+        def bucket_key(document: dict):
+            return document["booking_id"], month_start(document["changed_at"])
+
+        operations = []
+        for (booking_id, month), entries in groupby(sorted(documents, key=bucket_key), key=bucket_key):
+            entries = list(entries)
+            entry_ids = [entry["_id"] for entry in entries]
+            # Replace entries already in the bucket by _id (upsert per entry)
+            operations.append(UpdateOne(
+                {"booking_id": booking_id, "month": month},
+                [{"$set": {
+                    "booking_number": {"$ifNull": ["$booking_number", {"$literal": entries[0]["booking_number"]}]},
+                    "entries": {"$concatArrays": [
+                        {"$filter": {
+                            "input": {"$ifNull": ["$entries", []]},
+                            "cond": {"$not": [{"$in": ["$$this._id", entry_ids]}]}
+                        }},
+                        {"$literal": entries}
+                    ]},
+                    "changed_by": {"$setUnion": [
+                        {"$ifNull": ["$changed_by", []]},
+                        {"$literal": list({entry["changed_by"] for entry in entries})}
+                    ]}
+                }}],
+                upsert=True
+            ))
+
+        await BookingHistoryArchive.get_motor_collection().bulk_write(operations, ordered=False)
+        await collection.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+        archived += len(documents)
+
+    if archived:
+        print(f"✅ Archived {archived} booking history records older than {cutoff.date()}")
+    return archived
+
@@ -0,0 +1,145 @@
+"""
+Query-shape registry and index audit.
+
+Every hot MongoDB query registers its shape with representative values,
+right next to the code issuing it (register_query_shape at module level), so
+a changed query and its audited shape are edited together. The audit runs
+explain() on each one and flags plans that scan the whole collection
+(COLLSCAN) or sort in memory (SORT stage), so a missing or mismatched index
+shows up at startup or in check_indexes.py instead of in production latency.
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Type
+
+from beanie import Document
+from bson import ObjectId
+
+from app.models.booking import Booking
+from app.models.booking_history import BookingHistory
+from app.models.notification_outbox import NotificationOutbox
+from app.models.room_slot import RoomSlot
+
+
+# Indexes superseded by (longer) compound indexes declared on the models
+SUPERSEDED_INDEXES = {
+    Booking: ["user_id_1", "status_1"],
+    BookingHistory: ["booking_id_1", "booking_number_1", "changed_by_1", "action_1"],
+    NotificationOutbox: ["status_1_next_attempt_at_1"],
+    RoomSlot: ["booking_id_1"]  # Claims moved into the claims array
+}
+
+
+class QueryShape(NamedTuple):
+    name: str
+    model: Type[Document]
+    build_filter: Callable[[], Dict[str, Any]]  # Called at audit time (filters use the current time)
+    sort: Optional[List[tuple]] = None
+
+
+class AuditResult(NamedTuple):
+    shape: QueryShape
+    stages: List[str]
+    indexes: List[str]
+    collscan: bool
+    in_memory_sort: bool
+
+    @property
+    def ok(self) -> bool:
+        return not self.collscan and not self.in_memory_sort
+
+
+QUERY_SHAPES: List[QueryShape] = []
+
+
+def register_query_shape(
+    name: str,
+    model: Type[Document],
+    build_filter: Callable[[], Dict[str, Any]],
+    sort: Optional[List[tuple]] = None
+):
+    QUERY_SHAPES.append(QueryShape(name, model, build_filter, sort))
+
+
+def sample_now() -> datetime:
+    """Current time for shape filters (shapes are built at audit time)."""
+    return datetime.now(timezone.utc)
+
+
+def sample_id() -> ObjectId:
+    """Representative ObjectId for shape filters."""
+    return ObjectId()
+
+
+def _collect_plan(plan: Any, stages: List[str], indexes: List[str]):
+    """Walk an explain() plan tree collecting stage and index names."""
+    if isinstance(plan, list):
+        for item in plan:
+            _collect_plan(item, stages, indexes)
+        return
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if "indexName" in plan:
+        indexes.append(plan["indexName"])
+    for key in ("queryPlan", "inputStage", "inputStages", "thenStage", "elseStage"):
+        if key in plan:
+            _collect_plan(plan[key], stages, indexes)
+
+
+async def explain_query_shape(shape: QueryShape) -> AuditResult:
+    cursor = shape.model.get_motor_collection().find(shape.build_filter())
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+    explanation = await cursor.explain()
+
+    stages: List[str] = []
+    indexes: List[str] = []
+    _collect_plan(explanation["queryPlanner"]["winningPlan"], stages, indexes)
+    return AuditResult(
+        shape=shape,
+        stages=stages,
+        indexes=indexes,
+        collscan="COLLSCAN" in stages,
+        in_memory_sort="SORT" in stages
+    )
+
+
+async def audit_indexes(verbose: bool = False) -> List[AuditResult]:
+    """
+    Explain every registered query shape and report plans without a usable index.
+
+    Returns:
+        Audit results of all shapes (check `.ok`)
+    """
+    results = [await explain_query_shape(shape) for shape in QUERY_SHAPES]
+
+    problems = [result for result in results if not result.ok]
+    for result in results:
+        if result.ok and not verbose:
+            continue
+        flags = []
+        if result.collscan:
+            flags.append("COLLSCAN")
+        if result.in_memory_sort:
+            flags.append("in-memory SORT")
+        icon = "✅" if result.ok else "⚠️ "
+        detail = ", ".join(flags) if flags else "index " + ", ".join(result.indexes)
+        print(f"{icon} {result.shape.model.get_collection_name()}: {result.shape.name} → {detail}")
+
+    if problems:
+        print(f"⚠️  Index audit: {len(problems)} of {len(results)} query shapes are not covered by an index")
+    else:
+        print(f"✅ Index audit: all {len(results)} query shapes use an index")
+    return results
+
+
+async def drop_superseded_indexes():
+    """Drop indexes that compound indexes declared on the models now cover."""
+    for model, names in SUPERSEDED_INDEXES.items():
+        collection = model.get_motor_collection()
+        existing = await collection.index_information()
+        for name in names:
+            if name in existing:
+                await collection.drop_index(name)
+                print(f"✅ Dropped superseded {model.get_collection_name()} index {name}")
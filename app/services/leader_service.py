@@ -0,0 +1,156 @@
+"""
+Leader election across replicas through a MongoDB lease.
+
+Every process serves HTTP, but only the holder of the lease runs scheduled
+jobs. The leader renews the lease every heartbeat; if it dies, another
+replica takes over once the lease expires. Expiry is evaluated with the
+MongoDB server clock ($$NOW), so clock skew between replicas does not matter.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.database import get_db
+
+
+LEASE_COLLECTION = "leases"
+
+
+class LeaderElection:
+    """Holds (or waits for) the named lease and reports leadership changes."""
+    
+    def __init__(self, name: str, ttl: int = 30, heartbeat: int = 10):
+        self.name = name
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_demoted: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_heartbeat: Optional[Callable[[], None]] = None
+    
+    async def try_acquire(self) -> bool:
+        """Acquire the lease, or renew it if we already hold it. Returns whether we hold it."""
+        try:
+            lease = await get_db()[LEASE_COLLECTION].find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$expr": {"$or": [
+                        {"$eq": ["$holder", self.holder]},
+                        {"$lt": ["$expires_at", "$$NOW"]}
+                    ]}
+                },
+                [{"$set": {
+                    "holder": self.holder,
+                    "expires_at": {"$add": ["$$NOW", self.ttl * 1000]},
+                    "renewed_at": "$$NOW"
+                }}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lease exists and is held by another replica
+            return False
+        return lease is not None and lease.get("holder") == self.holder
+    
+    async def release(self):
+        """Give up the lease so another replica can take over immediately."""
+        await get_db()[LEASE_COLLECTION].delete_one({"_id": self.name, "holder": self.holder})
+    
+    def start(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        on_heartbeat: Optional[Callable[[], None]] = None
+    ):
+        """
+        Start campaigning in the background.
+        
+        Args:
+            on_elected: Called when this process becomes leader
+            on_demoted: Called when this process loses the lease
+            on_heartbeat: Called on every heartbeat while leader
+        """
+        if self._task is None:
+            self._on_elected = on_elected
+            self._on_demoted = on_demoted
+            self._on_heartbeat = on_heartbeat
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        """Stop campaigning and release the lease if held."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        
+        if self.is_leader:
+            self.is_leader = False
+            await self._on_demoted()
+            try:
+                await self.release()
+            except Exception as e:
+                print(f"⚠️  Could not release {self.name} lease: {e}")
+    
+    async def run(self):
+        while True:
+            try:
+                holds_lease = await self.try_acquire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Cannot prove we still hold the lease: step down
+                print(f"⚠️  Leader election error: {e}")
+                holds_lease = False
+            
+            try:
+                if holds_lease and not self.is_leader:
+                    self.is_leader = True
+                    print(f"👑 {self.holder} is now leader for {self.name}")
+                    await self._on_elected()
+                elif not holds_lease and self.is_leader:
+                    self.is_leader = False
+                    print(f"⚠️  {self.holder} lost leadership for {self.name}")
+                    await self._on_demoted()
+                elif self.is_leader and self._on_heartbeat:
+                    self._on_heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Never keep running jobs in a half-switched state: stand down
+                # completely and campaign again on the next heartbeat
+                print(f"⚠️  Leadership change for {self.name} failed: {e}")
+                await self.step_down()
+            
+            await asyncio.sleep(self.heartbeat)
+    
+    async def step_down(self):
+        """Stop acting as leader and hand the lease back (best effort)."""
+        self.is_leader = False
+        try:
+            await self._on_demoted()
+        except Exception as e:
+            print(f"⚠️  Could not stop {self.name} jobs: {e}")
+        try:
+            await self.release()
+        except Exception as e:
+            print(f"⚠️  Could not release {self.name} lease: {e}")
+
+
+# Global instance
+scheduler_leader = LeaderElection(
+    "scheduler",
+    ttl=settings.LEADER_LEASE_SECONDS,
+    heartbeat=settings.LEADER_HEARTBEAT_SECONDS
+)
@@ -0,0 +1,311 @@
+"""
+Persistent notification outbox.
+
+Notifications are written to the notification_outbox collection and the API
+returns immediately. A background dispatcher claims due entries (with a
+lease, so entries of a crashed process are picked up again), delivers them
+with retries, exponential backoff and per-chat rate limiting.
+
+A process has at most one entry per chat in flight: entries of a chat that
+is still sending are left unclaimed, so a burst for one group cannot fill
+every delivery slot while other chats wait. The lease is renewed while an
+entry waits in the send queue (flood control can hold it for minutes), so
+other replicas never reclaim and resend an entry that is still on its way.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from app.models.notification_outbox import NotificationOutbox
+from app.services.index_audit import register_query_shape, sample_now
+from app.core.config import settings
+
+
+LEASE_SECONDS = 300
+LEASE_RENEWALS = 3  # Renewals per lease period while an entry is being delivered
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 1800
+
+
+def get_retry_after_seconds(error: RetryAfter) -> float:
+    """RetryAfter.retry_after is an int in PTB 21 and a timedelta in later versions."""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+async def enqueue_notification(
+    chat_id: int,
+    message: str,
+    parse_mode: Optional[str] = "Markdown",
+    booking_id: Optional[ObjectId] = None
+) -> NotificationOutbox:
+    """Write a notification to the outbox and wake the local dispatcher."""
+    entry = NotificationOutbox(
+        chat_id=chat_id,
+        message=message,
+        parse_mode=parse_mode,
+        booking_id=booking_id
+    )
+    await entry.insert()
+    outbox_dispatcher.wake()
+    return entry
+
+
+async def enqueue_notifications(
+    targets: List[Tuple[int, str]],
+    parse_mode: Optional[str] = "Markdown",
+    booking_id: Optional[ObjectId] = None
+) -> List[NotificationOutbox]:
+    """Write several notifications (chat_id, message) to the outbox in one round trip."""
+    entries = [
+        NotificationOutbox(
+            chat_id=chat_id,
+            message=message,
+            parse_mode=parse_mode,
+            booking_id=booking_id
+        )
+        for chat_id, message in targets
+    ]
+    if entries:
+        await NotificationOutbox.insert_many(entries)
+        outbox_dispatcher.wake()
+    return entries
+
+
+async def claim_next_entry(skip_chat_ids: Iterable[int] = ()) -> Optional[dict]:
+    """
+    Atomically claim the next due outbox entry.
+    Entries stuck in "sending" past their lease (crashed process) are reclaimed.
+    
+    Args:
+        skip_chat_ids: Chats with an entry already in flight in this process
+    """
+    now = datetime.now(timezone.utc)
+    query = {
+        "$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lt": now}}
+        ]
+    }
+    skip_chat_ids = list(skip_chat_ids)
+    if skip_chat_ids:
+        query["chat_id"] = {"$nin": skip_chat_ids}
+    return await NotificationOutbox.get_motor_collection().find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": "sending",
+                "locked_until": now + timedelta(seconds=LEASE_SECONDS)
+            }
+        },
+        sort=[("next_attempt_at", 1), ("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+register_query_shape(
+    "next due outbox entry (claim_next_entry)",
+    NotificationOutbox,
+    lambda: {
+        "$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": sample_now()}},
+            {"status": "sending", "locked_until": {"$lt": sample_now()}}
+        ],
+        "chat_id": {"$nin": [-100]}
+    },
+    sort=[("next_attempt_at", 1), ("created_at", 1)]
+)
+
+
+async def renew_lease(entry_id: ObjectId):
+    """Extend the lease of an entry that is still being delivered."""
+    await NotificationOutbox.get_motor_collection().update_one(
+        {"_id": entry_id, "status": "sending"},
+        {"$set": {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=LEASE_SECONDS)}}
+    )
+
+
+async def mark_sent(entry_id: ObjectId):
+    now = datetime.now(timezone.utc)
+    await NotificationOutbox.get_motor_collection().update_one(
+        {"_id": entry_id},
+        {
+            "$set": {
+                "status": "sent",
+                "sent_at": now,
+                "locked_until": None,
+                "purge_at": now + timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+            },
+            "$inc": {"attempts": 1}
+        }
+    )
+
+
+async def mark_failed(entry_id: ObjectId, error: str):
+    now = datetime.now(timezone.utc)
+    await NotificationOutbox.get_motor_collection().update_one(
+        {"_id": entry_id},
+        {
+            "$set": {
+                "status": "failed",
+                "last_error": error,
+                "locked_until": None,
+                "purge_at": now + timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+            },
+            "$inc": {"attempts": 1}
+        }
+    )
+
+
+async def reschedule(entry_id: ObjectId, delay_seconds: float, error: str, count_attempt: bool = True):
+    update = {
+        "$set": {
+            "status": "pending",
+            "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+            "last_error": error,
+            "locked_until": None
+        }
+    }
+    if count_attempt:
+        update["$inc"] = {"attempts": 1}
+    await NotificationOutbox.get_motor_collection().update_one({"_id": entry_id}, update)
+
+
+class OutboxDispatcher:
+    """Background task delivering outbox entries."""
+
+    def __init__(self, concurrency: int = 8, chat_min_interval: float = 3.0):
+        self.chat_min_interval = chat_min_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._busy_chats: Set[int] = set()
+        self._chat_last_sent: Dict[int, float] = {}
+        self._deliver: Optional[Callable[[int, str, Optional[str]], Awaitable[None]]] = None
+
+    def start(self, deliver: Callable[[int, str, Optional[str]], Awaitable[None]]):
+        """
+        Start dispatching in the background.
+
+        Args:
+            deliver: Coroutine function (chat_id, message, parse_mode) that sends
+                     the message and raises TelegramError on failure
+        """
+        if self._task is None:
+            self._deliver = deliver
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop dispatching; unfinished entries are reclaimed after their lease expires."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(self._task, *self._in_flight, return_exceptions=True)
+        self._task = None
+
+    def wake(self):
+        """Signal that new entries are due."""
+        self._wakeup.set()
+
+    async def run(self):
+        while True:
+            # Cleared before claiming, so a wake-up during the claim is not lost
+            self._wakeup.clear()
+            try:
+                claimed = await self.dispatch_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Outbox dispatcher error: {e}")
+                claimed = 0
+
+            if claimed == 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_due(self) -> int:
+        """Claim and start delivering every due entry of a chat not already sending. Returns number claimed."""
+        claimed = 0
+        while True:
+            await self._semaphore.acquire()
+            try:
+                entry = await claim_next_entry(self._busy_chats)
+            except Exception:
+                self._semaphore.release()
+                raise
+
+            if entry is None:
+                self._semaphore.release()
+                return claimed
+
+            self._busy_chats.add(entry["chat_id"])
+            task = asyncio.create_task(self.deliver_entry(entry))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+            claimed += 1
+
+    async def keep_lease(self, entry_id: ObjectId):
+        """Renew an entry's lease until cancelled (delivery finished)."""
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / LEASE_RENEWALS)
+            try:
+                await renew_lease(entry_id)
+            except Exception as e:
+                print(f"⚠️  Outbox: could not renew lease of {entry_id}: {e}")
+
+    async def deliver_entry(self, entry: dict):
+        chat_id = entry["chat_id"]
+        lease = asyncio.create_task(self.keep_lease(entry["_id"]))
+        try:
+            # Per-chat rate limit
+            wait = self._chat_last_sent.get(chat_id, 0) + self.chat_min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                await self._deliver(chat_id, entry["message"], entry.get("parse_mode"))
+            except RetryAfter as e:
+                # Flood control surfaced by the deliver function (the send queue waits it out itself):
+                # wait as instructed, does not count as an attempt
+                await reschedule(entry["_id"], get_retry_after_seconds(e), str(e), count_attempt=False)
+            except (BadRequest, Forbidden) as e:
+                # Chat not found, bot removed/blocked, malformed message: retrying won't help
+                print(f"❌ Outbox: giving up on message to {chat_id}: {e}")
+                await mark_failed(entry["_id"], str(e))
+            except Exception as e:
+                attempts = entry.get("attempts", 0) + 1
+                if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    print(f"❌ Outbox: message to {chat_id} failed after {attempts} attempts: {e}")
+                    await mark_failed(entry["_id"], str(e))
+                else:
+                    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+                    await reschedule(entry["_id"], delay, str(e))
+            else:
+                await mark_sent(entry["_id"])
+            finally:
+                self._chat_last_sent[chat_id] = time.monotonic()
+        finally:
+            lease.cancel()
+            self._busy_chats.discard(chat_id)
+            self._semaphore.release()
+            # The chat's next entry can be claimed now
+            self.wake()
+
+
+# Global instance
+outbox_dispatcher = OutboxDispatcher(
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    chat_min_interval=settings.OUTBOX_CHAT_MIN_INTERVAL_SECONDS
+)
@@ -0,0 +1,319 @@
+"""
+Atomic room reservation using per-room slot claims.
+
+Every booking stores the exact part of its time range that falls inside each
+BOOKING_SLOT_MINUTES slot it touches, as a claim in that slot's room_slots
+document. A claim is added with an upsert whose filter only matches when no
+other booking's claim in the slot overlaps; when it does not match, the
+upsert tries to insert a second document for the slot and the unique
+(room_id, slot_start) index rejects it. That turns the claim into a
+race-free check-and-insert without any global lock: a contended create
+either claims all of its slots in a single bulk_write round trip or hits a
+duplicate key and loses. Because claims are exact, back-to-back bookings
+that meet inside a slot (10:00-10:20 and 10:20-10:40) do not conflict.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.models.booking import Booking
+from app.models.room_slot import RoomSlot
+from app.services.booking_index import to_utc_naive
+from app.services.index_audit import register_query_shape, sample_id
+from app.core.config import settings
+
+
+SLOT_EPOCH = datetime(1970, 1, 1)
+DUPLICATE_KEY_ERROR = 11000
+
+
+def get_slot_ranges(start_time: datetime, end_time: datetime) -> List[Tuple[datetime, datetime, datetime]]:
+    """
+    Split [start_time, end_time) along the slot grid.
+    
+    Returns:
+        (slot_start, claim_start, claim_end) per touched slot, all naive UTC
+    """
+    slot_size = timedelta(minutes=settings.BOOKING_SLOT_MINUTES)
+    start = to_utc_naive(start_time)
+    end = to_utc_naive(end_time)
+    
+    slot = SLOT_EPOCH + ((start - SLOT_EPOCH) // slot_size) * slot_size
+    ranges = []
+    while slot < end:
+        ranges.append((slot, max(slot, start), min(slot + slot_size, end)))
+        slot += slot_size
+    return ranges
+
+
+def build_claim_operations(
+    room_id: ObjectId,
+    ranges: List[Tuple[datetime, datetime, datetime]],
+    booking_id: ObjectId,
+    claim_id: ObjectId,
+    expires_at: datetime
+) -> List[UpdateOne]:
+    """
+    Build the guarded upserts that add a booking's claims to its slots.
+    The filter skips claims of the same booking, so a move may overlap the
+    booking's own old range.
+    """
+    return [
+        UpdateOne(
+            {
+                "room_id": room_id,
+                "slot_start": slot,
+                "claims": {"$not": {"$elemMatch": {
+                    "start": {"$lt": claim_end},
+                    "end": {"$gt": claim_start},
+                    "booking_id": {"$ne": booking_id}
+                }}}
+            },
+            {
+                "$push": {"claims": {
+                    "start": claim_start,
+                    "end": claim_end,
+                    "booking_id": booking_id,
+                    "claim_id": claim_id
+                }},
+                "$max": {"expires_at": expires_at}
+            },
+            upsert=True
+        )
+        for slot, claim_start, claim_end in ranges
+    ]
+
+
+def get_duplicate_key_errors(error: BulkWriteError) -> Tuple[List[int], bool]:
+    """
+    Indexes of the operations that hit a duplicate key.
+    
+    Returns:
+        (indexes, duplicate_only) - duplicate_only is False if anything else failed
+    """
+    details = error.details or {}
+    write_errors = details.get("writeErrors", [])
+    duplicate_only = not details.get("writeConcernErrors") and all(
+        item.get("code") == DUPLICATE_KEY_ERROR for item in write_errors
+    )
+    return [item["index"] for item in write_errors], duplicate_only
+
+
+async def pull_claim(
+    room_id: ObjectId,
+    ranges: List[Tuple[datetime, datetime, datetime]],
+    claim_id: ObjectId
+):
+    """Remove the claims added by one claim call."""
+    await RoomSlot.get_motor_collection().update_many(
+        {"room_id": room_id, "slot_start": {"$in": [slot for slot, _, _ in ranges]}},
+        {"$pull": {"claims": {"claim_id": claim_id}}}
+    )
+
+
+async def insert_slots(
+    room_id: ObjectId,
+    ranges: List[Tuple[datetime, datetime, datetime]],
+    booking_id: ObjectId,
+    claim_id: ObjectId,
+    expires_at: datetime
+) -> Tuple[bool, Optional[ObjectId]]:
+    """
+    Add claims to their slots in one round trip.
+    A duplicate key either means another booking's claim overlaps or a
+    concurrent upsert created the slot document first; the failed claims are
+    retried once to tell the two apart. On conflict, rolls back the claims
+    added by this call.
+    
+    Returns:
+        (reserved, holder_booking_id) - holder is the booking owning the overlapping claim
+    """
+    if not ranges:
+        return True, None
+    
+    collection = RoomSlot.get_motor_collection()
+    pending = ranges
+    for _ in range(2):
+        try:
+            await collection.bulk_write(
+                build_claim_operations(room_id, pending, booking_id, claim_id, expires_at),
+                ordered=False
+            )
+            return True, None
+        except BulkWriteError as e:
+            failed, duplicate_only = get_duplicate_key_errors(e)
+            if not duplicate_only:
+                await pull_claim(room_id, ranges, claim_id)
+                raise
+            pending = [pending[index] for index in failed]
+        except Exception:
+            await pull_claim(room_id, ranges, claim_id)
+            raise
+    
+    # Roll back the claims we did manage to add
+    await pull_claim(room_id, ranges, claim_id)
+    
+    contended_slot, claim_start, claim_end = pending[0]
+    document = await collection.find_one(
+        {"room_id": room_id, "slot_start": contended_slot},
+        {"claims": 1}
+    )
+    for claim in (document or {}).get("claims", []):
+        if claim["booking_id"] != booking_id and claim["start"] < claim_end and claim["end"] > claim_start:
+            return False, claim["booking_id"]
+    return False, None
+
+
+register_query_shape(
+    "claims of a slot (insert_slots)",
+    RoomSlot,
+    lambda: {"room_id": sample_id(), "slot_start": datetime(2025, 1, 1, 9)}
+)
+
+
+async def claim_room_slots(
+    room_id: ObjectId,
+    start_time: datetime,
+    end_time: datetime,
+    booking_id: ObjectId
+) -> Tuple[bool, Optional[ObjectId]]:
+    """
+    Atomically reserve a room for [start_time, end_time) on behalf of a booking.
+    
+    Returns:
+        (reserved, holder_booking_id)
+    """
+    expires_at = to_utc_naive(end_time) + timedelta(days=settings.BOOKING_SLOT_RETENTION_DAYS)
+    ranges = get_slot_ranges(start_time, end_time)
+    return await insert_slots(room_id, ranges, booking_id, ObjectId(), expires_at)
+
+
+async def move_room_slots(
+    booking_id: ObjectId,
+    room_id: ObjectId,
+    start_time: datetime,
+    end_time: datetime
+) -> Tuple[bool, Optional[ObjectId]]:
+    """
+    Move a booking's slot claims to a new room/time range.
+    New claims are added first; the booking's old claims are only released
+    once that succeeds.
+    
+    Returns:
+        (reserved, holder_booking_id)
+    """
+    claim_id = ObjectId()
+    expires_at = to_utc_naive(end_time) + timedelta(days=settings.BOOKING_SLOT_RETENTION_DAYS)
+    reserved, holder_id = await insert_slots(
+        room_id,
+        get_slot_ranges(start_time, end_time),
+        booking_id,
+        claim_id,
+        expires_at
+    )
+    if not reserved:
+        return False, holder_id
+    
+    await RoomSlot.get_motor_collection().update_many(
+        {"claims.booking_id": booking_id},
+        {"$pull": {"claims": {"booking_id": booking_id, "claim_id": {"$ne": claim_id}}}}
+    )
+    return True, None
+
+
+async def release_room_slots(booking_id: ObjectId):
+    """Release every slot claim of a booking (cancel/delete)."""
+    await RoomSlot.get_motor_collection().update_many(
+        {"claims.booking_id": booking_id},
+        {"$pull": {"claims": {"booking_id": booking_id}}}
+    )
+
+
+register_query_shape(
+    "slot claims of a booking (move_room_slots, release_room_slots)",
+    RoomSlot,
+    lambda: {"claims.booking_id": sample_id()}
+)
+
+
+async def release_room(room_id: ObjectId):
+    """Release every slot claim of a room (room deletion)."""
+    await RoomSlot.get_motor_collection().delete_many({"room_id": room_id})
+
+
+async def backfill_room_slots():
+    """
+    Record claims for upcoming active bookings whose claims are missing
+    (bookings created before slot reservation existed, or claims stored in
+    the old one-booking-per-slot layout) or laid out on another grid
+    (BOOKING_SLOT_MINUTES changed).
+    
+    Existing bookings are recorded as they are, even where legacy data
+    overlaps, so every booking keeps guarding its range and the next startup
+    finds nothing to do. Called at startup; safe to run concurrently from
+    several workers.
+    """
+    collection = RoomSlot.get_motor_collection()
+    legacy = await collection.delete_many({"claims": {"$exists": False}})
+    if legacy.deleted_count:
+        print(f"✅ Removed {legacy.deleted_count} slot claims of the old layout")
+    
+    now = to_utc_naive(datetime.now(settings.timezone))
+    bookings = await Booking.find({
+        "status": "active",
+        "end_time": {"$gte": now}
+    }).to_list()
+    
+    if not bookings:
+        return
+    
+    claimed = {}
+    async for document in collection.find(
+        {"claims.booking_id": {"$in": [booking.id for booking in bookings]}},
+        {"room_id": 1, "slot_start": 1, "claims.booking_id": 1}
+    ):
+        for claim in document["claims"]:
+            claimed.setdefault(claim["booking_id"], set()).add((document["room_id"], document["slot_start"]))
+    
+    backfilled = 0
+    for booking in bookings:
+        ranges = get_slot_ranges(booking.start_time, booking.end_time)
+        held = claimed.get(booking.id)
+        if held == {(booking.room_id, slot) for slot, _, _ in ranges}:
+            continue
+        if held:
+            await release_room_slots(booking.id)
+        if not ranges:
+            continue
+        
+        claim_id = ObjectId()
+        expires_at = to_utc_naive(booking.end_time) + timedelta(days=settings.BOOKING_SLOT_RETENTION_DAYS)
+        operations = [
+            UpdateOne(
+                # No overlap guard: the booking already exists
+                {"room_id": booking.room_id, "slot_start": slot, "claims.booking_id": {"$ne": booking.id}},
+                {
+                    "$push": {"claims": {
+                        "start": claim_start,
+                        "end": claim_end,
+                        "booking_id": booking.id,
+                        "claim_id": claim_id
+                    }},
+                    "$max": {"expires_at": expires_at}
+                },
+                upsert=True
+            )
+            for slot, claim_start, claim_end in ranges
+        ]
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Another worker backfilling the same slot - the next startup fills any gap
+            print(f"⚠️  Slot backfill for {booking.booking_number}: {len(e.details.get('writeErrors', []))} slots skipped")
+        backfilled += 1
+    
+    if backfilled:
+        print(f"✅ Backfilled room slots for {backfilled} bookings")
@@ -0,0 +1,94 @@
+"""
+In-process cache of the room catalog.
+
+Rooms change rarely but are listed on every page of the frontend. The
+catalog keeps the serialized JSON of all rooms and of active rooms,
+together with an ETag (content hash, identical across replicas) and a
+Last-Modified time. Room writes invalidate it; the TTL bounds staleness
+for writes made through other workers.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.room import Room
+from app.schemas.room import RoomResponse
+from app.core.config import settings
+
+
+class CatalogEntry(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+
+def build_room_response(room: Room) -> RoomResponse:
+    return RoomResponse(
+        _id=str(room.id),
+        name=room.name,
+        capacity=room.capacity,
+        facilities=room.facilities,
+        location=room.location,
+        is_active=room.is_active,
+        created_at=room.created_at
+    )
+
+
+def _build_entry(rooms: List[Room], last_modified: datetime) -> CatalogEntry:
+    body = json.dumps(
+        jsonable_encoder([build_room_response(room) for room in rooms]),
+        separators=(",", ":")
+    ).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return CatalogEntry(body, etag, last_modified)
+
+
+class RoomCatalog:
+    """Serialized room lists (all / active only), reloaded after invalidation or TTL."""
+    
+    def __init__(self, ttl: int = 60):
+        self.ttl = ttl
+        self._entries: Dict[bool, CatalogEntry] = {}
+        self._loaded_at: Optional[float] = None
+        self._generation = 0  # Bumped by invalidate(); a refresh racing a write stays stale
+        self._lock = asyncio.Lock()
+    
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+    
+    async def refresh(self):
+        """Load all rooms with one query and serialize both variants."""
+        generation = self._generation
+        rooms = await Room.find().sort(Room.name).to_list()
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        previous = self._entries
+        entries = {}
+        for active_only, variant in ((False, rooms), (True, [room for room in rooms if room.is_active])):
+            entry = _build_entry(variant, last_modified)
+            # Unchanged content keeps its original Last-Modified
+            if active_only in previous and previous[active_only].etag == entry.etag:
+                entry = previous[active_only]
+            entries[active_only] = entry
+        self._entries = entries
+        self._loaded_at = time.monotonic() if generation == self._generation else None
+    
+    def invalidate(self):
+        """Force a reload on next access (call after any room write)."""
+        self._generation += 1
+        self._loaded_at = None
+    
+    async def get(self, active_only: bool = False) -> CatalogEntry:
+        if not self.is_fresh():
+            async with self._lock:
+                if not self.is_fresh():
+                    await self.refresh()
+        return self._entries[active_only]
+
+
+# Global instance
+room_catalog = RoomCatalog(ttl=settings.ROOM_CATALOG_TTL_SECONDS)
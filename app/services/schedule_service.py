@@ -0,0 +1,106 @@
+"""
+Shared room schedule lookups.
+
+Bookings of every requested room are fetched with one query (or straight
+from the in-memory booking index when it covers the range) and grouped by
+room in memory, instead of one query per room.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.models.booking import Booking
+from app.services.booking_index import booking_index, to_utc_naive
+from app.services.index_audit import register_query_shape, sample_id, sample_now
+
+
+def get_day_range(start_date: date, end_date: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """Datetime range covering start_date through end_date (defaults to start_date), inclusive."""
+    return (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date or start_date, datetime.max.time())
+    )
+
+
+async def find_scheduled_bookings(
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    room_ids: Optional[Iterable[ObjectId]] = None,
+    published_only: bool = True,
+    projection: Optional[dict] = None
+) -> List[Booking]:
+    """
+    Active bookings starting within [start_time, end_time], sorted by start_time.
+    
+    Args:
+        start_time: Range start (None for no date filter)
+        end_time: Range end (required with start_time)
+        room_ids: Restrict to these rooms (None for all rooms)
+        published_only: Exclude draft bookings
+        projection: When answered from MongoDB, return raw documents with this projection
+                    (index hits still return Booking models)
+    """
+    room_ids = [ObjectId(room_id) for room_id in room_ids] if room_ids is not None else None
+    
+    if start_time is not None and booking_index.covers(start_time):
+        bookings = booking_index.get_schedules(start_time, end_time, room_ids, published_only)
+        return sorted(bookings, key=lambda booking: to_utc_naive(booking.start_time))
+    
+    query = {"status": "active"}
+    if published_only:
+        query["published"] = True
+    if room_ids is not None:
+        query["room_id"] = room_ids[0] if len(room_ids) == 1 else {"$in": room_ids}
+    if start_time is not None:
+        query["start_time"] = {"$gte": start_time, "$lte": end_time}
+    
+    if projection is not None:
+        return await Booking.get_motor_collection().find(query, projection).sort("start_time", 1).to_list(None)
+    return await Booking.find(query).sort(Booking.start_time).to_list()
+
+
+register_query_shape(
+    "published schedule of all rooms (GET /bookings)",
+    Booking,
+    lambda: {
+        "status": "active",
+        "published": True,
+        "start_time": {"$gte": sample_now(), "$lte": sample_now() + timedelta(days=1)}
+    },
+    sort=[("start_time", 1)]
+)
+register_query_shape(
+    "published schedule of a room (GET /rooms/{id}/schedule)",
+    Booking,
+    lambda: {
+        "status": "active",
+        "published": True,
+        "room_id": sample_id(),
+        "start_time": {"$gte": sample_now(), "$lte": sample_now() + timedelta(days=1)}
+    },
+    sort=[("start_time", 1)]
+)
+register_query_shape(
+    "schedule including drafts (bot /schedule)",
+    Booking,
+    lambda: {
+        "status": "active",
+        "start_time": {"$gte": sample_now(), "$lte": sample_now() + timedelta(days=1)}
+    },
+    sort=[("start_time", 1)]
+)
+
+
+async def get_schedule_by_room(
+    start_time: datetime,
+    end_time: datetime,
+    room_ids: Optional[Iterable[ObjectId]] = None,
+    published_only: bool = True
+) -> Dict[str, List[Booking]]:
+    """Same as find_scheduled_bookings, grouped by room ID (string), each list sorted by start_time."""
+    schedule: Dict[str, List[Booking]] = defaultdict(list)
+    for booking in await find_scheduled_bookings(start_time, end_time, room_ids, published_only):
+        schedule[str(booking.room_id)].append(booking)
+    return schedule
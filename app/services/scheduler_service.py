@@ -1,13 +1,171 @@
 """
 Scheduler service for automatic background tasks.
 Handles cleanup notifications for ended bookings.
+
+Every published booking gets a one-shot timer job firing at its end_time,
+kept in a MongoDB job store so timers survive restarts. A low-frequency
+sweep (check_and_notify_ended_bookings) reconciles anything a timer missed.
+
+The scheduler starts paused in every replica (so any replica can add
+timers to the shared job store) and only the elected leader resumes it.
+The job store is synchronous (pymongo), so the scheduler looks up and
+updates due jobs in a worker thread rather than on the event loop.
 """
-from datetime import datetime
-from typing import List
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import List, Optional, Tuple
+
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.schedulers.asyncio import AsyncIOScheduler, run_in_event_loop
+from apscheduler.schedulers.base import STATE_STOPPED
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.mongodb import MongoDBJobStore
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
 
 from app.models.booking import Booking
 from app.services.telegram_service import notify_verification_group_cleanup
+from app.services.index_audit import register_query_shape, sample_now
 from app.core.config import settings
+from app.core.database import get_client_config
+
+
+BOOKING_TIMER_JOBSTORE = "booking_timers"
+
+class ThreadSafeAsyncIOExecutor(AsyncIOExecutor):
+    """AsyncIOExecutor that accepts jobs from any thread (the scheduler submits them from a worker thread)."""
+    
+    def _do_submit_job(self, job, run_times):
+        self._eventloop.call_soon_threadsafe(partial(super()._do_submit_job, job, run_times))
+
+
+class ThreadedJobStoreScheduler(AsyncIOScheduler):
+    """
+    AsyncIOScheduler that processes due jobs in a worker thread.
+    
+    AsyncIOScheduler calls _process_jobs on the event loop at every wakeup, and
+    that queries and updates every job store; with the pymongo job store each
+    wakeup would block all requests for a MongoDB round trip or more. Jobs
+    still run on the event loop. Wakeups arriving while a round is in flight
+    are coalesced into one more round.
+    """
+    
+    _processing = False
+    _wakeup_pending = False
+    
+    @run_in_event_loop
+    def wakeup(self):
+        self._stop_timer()
+        if self._processing:
+            self._wakeup_pending = True
+            return
+        self._processing = True
+        self._eventloop.create_task(self._process_jobs_in_thread())
+    
+    async def _process_jobs_in_thread(self):
+        wait_seconds: Optional[float] = None
+        try:
+            self._wakeup_pending = True
+            while self._wakeup_pending:
+                self._wakeup_pending = False
+                try:
+                    wait_seconds = await asyncio.to_thread(self._process_jobs)
+                except Exception:
+                    self._logger.exception("Error processing jobs")
+                    wait_seconds = self.jobstore_retry_interval
+        finally:
+            self._processing = False
+        if self.state != STATE_STOPPED:
+            self._start_timer(wait_seconds)
+    
+    def _create_default_executor(self):
+        return ThreadSafeAsyncIOExecutor()
+
+
+# Create scheduler instance
+scheduler = ThreadedJobStoreScheduler()
+
+
+def _pending_cleanup_query(now: datetime) -> dict:
+    """Ended bookings still waiting for their cleanup notification (matches the pending_cleanup partial index)."""
+    return {
+        "hrd_notified": False,
+        "status": "active",
+        "published": True,
+        "end_time": {"$lt": now}
+    }
+
+
+register_query_shape(
+    "pending cleanup notifications (scheduler sweep)",
+    Booking,
+    lambda: _pending_cleanup_query(sample_now()),
+    sort=[("end_time", 1)]
+)
+
+
+async def _claim_cleanup_batch(ids: List[ObjectId], owner: str, now: datetime) -> List[Booking]:
+    """
+    Lease a batch of bookings to this run so other replicas skip them.
+    Returns the bookings actually leased (others may have been taken meanwhile).
+    """
+    await Booking.get_motor_collection().update_many(
+        {
+            **_pending_cleanup_query(now),
+            "_id": {"$in": ids},
+            "$or": [
+                {"cleanup_locked_until": None},
+                {"cleanup_locked_until": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {
+                "cleanup_lease_owner": owner,
+                "cleanup_locked_until": now + timedelta(seconds=settings.SCHEDULER_CLEANUP_LEASE_SECONDS)
+            }
+        }
+    )
+    return await Booking.find({"_id": {"$in": ids}, "cleanup_lease_owner": owner}).to_list()
+
+
+async def _process_cleanup_batch(ids: List[ObjectId], owner: str, now: datetime) -> Tuple[int, int]:
+    """
+    Lease, notify concurrently and mark a batch with a single bulk_write.
+    Failed bookings only have their lease released, so the next run retries them.
+    
+    Returns:
+        (notified, failed)
+    """
+    bookings = await _claim_cleanup_batch(ids, owner, now)
+    if not bookings:
+        return 0, 0
+    
+    semaphore = asyncio.Semaphore(settings.SCHEDULER_CLEANUP_CONCURRENCY)
+    
+    async def notify(booking: Booking):
+        async with semaphore:
+            await notify_verification_group_cleanup(booking)
+    
+    results = await asyncio.gather(*(notify(booking) for booking in bookings), return_exceptions=True)
+    
+    operations = []
+    failed = 0
+    for booking, result in zip(bookings, results):
+        release = {"$unset": {"cleanup_lease_owner": "", "cleanup_locked_until": ""}}
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"[Scheduler] ✗ Cleanup notification failed for booking {booking.booking_number}: {result}")
+            operations.append(UpdateOne({"_id": booking.id, "cleanup_lease_owner": owner}, release))
+        else:
+            operations.append(UpdateOne(
+                {"_id": booking.id, "cleanup_lease_owner": owner},
+                {"$set": {"hrd_notified": True, "updated_at": now}, **release}
+            ))
+    
+    await Booking.get_motor_collection().bulk_write(operations, ordered=False)
+    return len(bookings) - failed, failed
 
 
 async def check_and_notify_ended_bookings():
@@ -19,65 +177,40 @@ async def check_and_notify_ended_bookings():
     - end_time is in the past
     - hrd_notified is False
     
-    For each booking found, it:
-    1. Sends cleanup notification to verification group
-    2. Marks hrd_notified = True
+    Bookings are streamed from the pending_cleanup partial index in batches of
+    SCHEDULER_CLEANUP_BATCH_SIZE. For each batch it:
+    1. Leases the bookings, so concurrent replicas do not notify them twice
+    2. Sends cleanup notifications to the verification groups concurrently
+    3. Marks hrd_notified = True with a single bulk_write
     """
-    print(f"[Scheduler] =======================================")
-    print(f"[Scheduler] check_and_notify_ended_bookings() called")
-    
     now = datetime.now(settings.timezone)
-    print(f"[Scheduler] Current time (Asia/Jakarta): {now}")
-    print(f"[Scheduler] settings.timezone: {settings.timezone}")
-    print(f"[Scheduler] UTC now: {datetime.utcnow()}")
+    owner = uuid.uuid4().hex
+    notified = 0
+    failed = 0
     
-    # Find bookings that need cleanup notification
-    query = {
-        "status": "active",
-        "published": True,
-        "end_time": {"$lt": now},
-        "hrd_notified": False
-    }
-    print(f"[Scheduler] Query: {query}")
-    
-    bookings = await Booking.find(query).to_list()
+    cursor = Booking.get_motor_collection().find(
+        _pending_cleanup_query(now),
+        {"_id": 1},
+        sort=[("end_time", 1)],
+        batch_size=settings.SCHEDULER_CLEANUP_BATCH_SIZE
+    )
     
-    print(f"[Scheduler] Found {len(bookings)} bookings needing cleanup notification")
+    batch: List[ObjectId] = []
+    async for document in cursor:
+        batch.append(document["_id"])
+        if len(batch) >= settings.SCHEDULER_CLEANUP_BATCH_SIZE:
+            batch_notified, batch_failed = await _process_cleanup_batch(batch, owner, now)
+            notified += batch_notified
+            failed += batch_failed
+            batch = []
     
-    if not bookings:
-        print(f"[Scheduler] No bookings to process")
-        return
+    if batch:
+        batch_notified, batch_failed = await _process_cleanup_batch(batch, owner, now)
+        notified += batch_notified
+        failed += batch_failed
     
-    for booking in bookings:
-        print(f"[Scheduler] --------------------------------------")
-        print(f"[Scheduler] Processing booking: {booking.booking_number}")
-        print(f"[Scheduler]   - Room: {booking.room_snapshot.name}")
-        print(f"[Scheduler]   - Start: {booking.start_time}")
-        print(f"[Scheduler]   - End: {booking.end_time}")
-        print(f"[Scheduler]   - Status: {booking.status}")
-        print(f"[Scheduler]   - Published: {booking.published}")
-        print(f"[Scheduler]   - HRD Notified: {booking.hrd_notified}")
-        print(f"[Scheduler]   - Verification Group ID: {booking.verification_group_id}")
-        
-        try:
-            # Send cleanup notification
-            print(f"[Scheduler]   - Sending notification to verification group...")
-            await notify_verification_group_cleanup(booking)
-            
-            # Mark as notified
-            booking.hrd_notified = True
-            booking.updated_at = now
-            await booking.save()
-            
-            print(f"[Scheduler] ✓ Cleanup notification sent for booking {booking.booking_number}")
-            print(f"[Scheduler] ✓ hrd_notified set to True")
-            
-        except Exception as e:
-            print(f"[Scheduler] ✗ Error processing booking {booking.booking_number}: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    print(f"[Scheduler] =======================================")
+    if notified or failed:
+        print(f"[Scheduler] Cleanup notifications: {notified} sent, {failed} failed")
 
 
 async def get_pending_cleanup_count() -> int:
@@ -89,12 +222,7 @@ async def get_pending_cleanup_count() -> int:
     """
     now = datetime.now(settings.timezone)
     
-    count = await Booking.find({
-        "status": "active",
-        "published": True,
-        "end_time": {"$lt": now},
-        "hrd_notified": False
-    }).count()
+    count = await Booking.find(_pending_cleanup_query(now)).count()
     
     return count
 
@@ -117,4 +245,149 @@ async def get_recent_ended_bookings(limit: int = 10) -> List[Booking]:
         "end_time": {"$lt": now}
     }).sort(-Booking.end_time).limit(limit).to_list()
     
-    return bookings
\ No newline at end of file
+    return bookings
+
+
+register_query_shape(
+    "recently ended bookings (GET /admin/scheduler/status)",
+    Booking,
+    lambda: {"status": "active", "published": True, "end_time": {"$lt": sample_now()}},
+    sort=[("end_time", -1)]
+)
+
+
+def add_booking_timer_store():
+    """
+    Register the persistent job store holding booking end timers.
+    APScheduler job stores are synchronous, so it gets its own pymongo client.
+    """
+    scheduler.add_jobstore(
+        MongoDBJobStore(
+            database=settings.MONGODB_DB_NAME,
+            collection=settings.BOOKING_TIMER_COLLECTION,
+            client=MongoClient(settings.MONGODB_URL, **get_client_config())
+        ),
+        alias=BOOKING_TIMER_JOBSTORE
+    )
+
+
+def get_booking_timer_id(booking_id) -> str:
+    return f"booking_end_{booking_id}"
+
+
+async def notify_booking_ended(booking_id: str):
+    """Timer job: send the cleanup notification of a single booking at its end_time."""
+    now = datetime.now(settings.timezone)
+    notified, failed = await _process_cleanup_batch([ObjectId(booking_id)], uuid.uuid4().hex, now)
+    if notified:
+        print(f"[Scheduler] Cleanup notification sent for booking {booking_id}")
+
+
+async def schedule_booking_timer(booking: Booking):
+    """
+    Create, move or drop the end timer of a booking after it was written.
+    Only active, published bookings still waiting for their cleanup notification keep a timer.
+    The job store is synchronous (pymongo), so its calls run in a worker thread.
+    """
+    if not scheduler.running:
+        return
+    
+    if booking.status != "active" or not booking.published or booking.hrd_notified:
+        # Drafts never got a timer, so there is nothing to remove
+        if booking.published:
+            await cancel_booking_timer(booking.id)
+        return
+    
+    end_time = booking.end_time
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+    
+    await asyncio.to_thread(
+        scheduler.add_job,
+        notify_booking_ended,
+        'date',
+        run_date=end_time,
+        args=[str(booking.id)],
+        id=get_booking_timer_id(booking.id),
+        name=f"Cleanup notification for {booking.booking_number}",
+        jobstore=BOOKING_TIMER_JOBSTORE,
+        misfire_grace_time=None,  # Late (e.g. after downtime) still fires
+        replace_existing=True
+    )
+
+
+def _remove_booking_timer(booking_id):
+    try:
+        scheduler.remove_job(get_booking_timer_id(booking_id), jobstore=BOOKING_TIMER_JOBSTORE)
+    except JobLookupError:
+        pass
+
+
+async def cancel_booking_timer(booking_id):
+    """Drop the end timer of a booking (no-op if it has none)."""
+    if not scheduler.running:
+        return
+    await asyncio.to_thread(_remove_booking_timer, booking_id)
+
+
+async def get_booking_timer_jobs() -> list:
+    """Pending booking end timers (read from the job store in a worker thread)."""
+    if not scheduler.running:
+        return []
+    return await asyncio.to_thread(scheduler.get_jobs, jobstore=BOOKING_TIMER_JOBSTORE)
+
+
+async def sync_booking_timers():
+    """
+    Create missing end timers for upcoming bookings (e.g. published before
+    timers existed). Call after the scheduler has started.
+    """
+    existing = {job.id for job in await get_booking_timer_jobs()}
+    bookings = await Booking.find({
+        "hrd_notified": False,
+        "status": "active",
+        "published": True,
+        "end_time": {"$gte": datetime.now(settings.timezone)}
+    }).to_list()
+    
+    created = 0
+    for booking in bookings:
+        if get_booking_timer_id(booking.id) not in existing:
+            await schedule_booking_timer(booking)
+            created += 1
+    
+    if created:
+        print(f"✅ Created end timers for {created} upcoming bookings")
+
+
+SWEEP_JOB_ID = "cleanup_notifications"
+
+
+register_query_shape(
+    "upcoming end timers (sync_booking_timers)",
+    Booking,
+    lambda: {
+        "hrd_notified": False,
+        "status": "active",
+        "published": True,
+        "end_time": {"$gte": sample_now()}
+    }
+)
+
+
+async def resume_scheduled_jobs():
+    """Leader elected: run jobs in this process, catching up on anything missed."""
+    scheduler.resume()
+    await sync_booking_timers()
+    # Job store calls take the scheduler's job store lock, which a processing round may hold
+    await asyncio.to_thread(
+        scheduler.modify_job,
+        SWEEP_JOB_ID,
+        jobstore="default",
+        next_run_time=datetime.now(timezone.utc)
+    )
+
+
+async def pause_scheduled_jobs():
+    """Leadership lost: stop running jobs (timers stay in the shared job store)."""
+    scheduler.pause()
@@ -0,0 +1,93 @@
+"""
+Cached access to application settings (Setting documents).
+
+The settings collection is tiny, so the whole collection is loaded in a
+single query and served from memory until the TTL expires or the cache is
+explicitly invalidated (admin updates, optional MongoDB change stream).
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+from app.models.setting import Setting
+from app.services.counter_service import COUNTER_KEYS
+from app.core.config import settings
+
+
+class SettingsCache:
+    """In-process key -> value cache of the settings collection."""
+    
+    def __init__(self, ttl_seconds: int = 60):
+        self.ttl_seconds = ttl_seconds
+        self._values: Dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+    
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl_seconds
+        )
+    
+    async def refresh(self):
+        """Reload all settings with a single query."""
+        settings_list = await Setting.find().to_list()
+        self._values = {setting.key: setting.value for setting in settings_list}
+        self._loaded_at = time.monotonic()
+    
+    def invalidate(self):
+        """Drop cached values; the next read reloads from MongoDB."""
+        self._loaded_at = None
+    
+    async def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a setting value by key."""
+        if not self.is_fresh():
+            async with self._lock:
+                # Another coroutine may have refreshed while we waited
+                if not self.is_fresh():
+                    await self.refresh()
+        return self._values.get(key, default)
+    
+    async def get_int(self, key: str) -> Optional[int]:
+        """Get a setting value as int (None if missing, empty or invalid)."""
+        value = await self.get(key)
+        try:
+            return int(value) if value else None
+        except (ValueError, TypeError):
+            return None
+    
+    async def watch_changes(self):
+        """Invalidate on settings changes (MongoDB change stream), ignoring counter increments."""
+        # Deletes carry no fullDocument and still invalidate
+        pipeline = [{"$match": {"fullDocument.key": {"$nin": COUNTER_KEYS}}}]
+        while True:
+            try:
+                async with Setting.get_motor_collection().watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        self.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Settings change stream error: {e}")
+                self.invalidate()
+                await asyncio.sleep(5)
+    
+    def start_watching(self):
+        """Start change stream watcher in the background."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch_changes())
+    
+    async def stop_watching(self):
+        """Stop change stream watcher."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+
+# Global instance
+settings_cache = SettingsCache(settings.SETTINGS_CACHE_TTL_SECONDS)
@@ -0,0 +1,251 @@
+"""
+Rate-limit aware send queue for the Telegram bot.
+
+Every outgoing message waits for a token from a global bucket and from the
+bucket of its chat, so bursts degrade into delays instead of flood errors.
+RetryAfter pauses the chat and the message is retried, never dropped.
+Messages queued for the same chat while it is throttled are coalesced into
+a single Telegram message.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from telegram import Bot
+from telegram.error import RetryAfter
+
+from app.services.outbox_service import get_retry_after_seconds
+
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+LATENCY_SAMPLE_SIZE = 500
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self.refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.refill()
+        self.tokens -= 1
+
+
+class QueuedMessage:
+    __slots__ = ("text", "parse_mode", "future", "enqueued_at", "solo")
+
+    def __init__(self, text: str, parse_mode: Optional[str], future: asyncio.Future):
+        self.text = text
+        self.parse_mode = parse_mode
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.solo = False  # Never coalesced (set after its merged batch was rejected)
+
+
+class ChatState:
+    __slots__ = ("pending", "bucket", "blocked_until", "busy")
+
+    def __init__(self, bucket: TokenBucket):
+        self.pending: Deque[QueuedMessage] = deque()
+        self.bucket = bucket
+        self.blocked_until = 0.0
+        self.busy = False
+
+
+class TelegramSendQueue:
+    """
+    Queue in front of Bot.send_message with one token bucket per chat plus a global bucket.
+    Messages to the same chat are delivered in order, one request at a time.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float = 25.0,
+        chat_messages_per_minute: int = 20,
+        chat_burst: int = 3,
+        coalesce_max_messages: int = 5
+    ):
+        self.bot = bot
+        self.chat_rate = chat_messages_per_minute / 60.0
+        self.chat_burst = chat_burst
+        self.coalesce_max_messages = max(1, coalesce_max_messages)
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[int, ChatState] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._sending: Set[asyncio.Task] = set()
+
+        # Metrics
+        self._sent = 0
+        self._failed = 0
+        self._coalesced = 0
+        self._retry_after = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+    async def send(self, chat_id: int, text: str, parse_mode: Optional[str] = "Markdown"):
+        """
+        Queue a message and wait until it is delivered.
+
+        Raises:
+            TelegramError: If Telegram rejects the message (flood control is retried, not raised)
+        """
+        self.ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = ChatState(TokenBucket(self.chat_rate, self.chat_burst))
+            self._chats[chat_id] = state
+        state.pending.append(QueuedMessage(text, parse_mode, future))
+        self._wakeup.set()
+        await future
+
+    def ensure_worker(self):
+        """Start the worker task lazily in the running event loop."""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def run(self):
+        while True:
+            next_wake = self.dispatch_ready()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=next_wake)
+            except asyncio.TimeoutError:
+                pass
+
+    def dispatch_ready(self) -> Optional[float]:
+        """
+        Start a send for every chat whose buckets allow it.
+
+        Returns:
+            Seconds until the next throttled chat may send (None if nothing is waiting)
+        """
+        next_wake = None
+        now = time.monotonic()
+        for chat_id, state in self._chats.items():
+            if state.busy or not state.pending:
+                continue
+
+            wait = max(
+                state.blocked_until - now,
+                state.bucket.delay(),
+                self._global_bucket.delay()
+            )
+            if wait > 0:
+                next_wake = wait if next_wake is None else min(next_wake, wait)
+                continue
+
+            self._global_bucket.consume()
+            state.bucket.consume()
+            state.busy = True
+            task = asyncio.create_task(self.send_batch(chat_id, state, self.take_batch(state)))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+        return next_wake
+
+    def take_batch(self, state: ChatState) -> List[QueuedMessage]:
+        """Pop the next message of a chat, merging queued followers with the same parse mode."""
+        batch = [state.pending.popleft()]
+        if batch[0].solo:
+            return batch
+        length = len(batch[0].text)
+        while state.pending and len(batch) < self.coalesce_max_messages:
+            candidate = state.pending[0]
+            if candidate.solo or candidate.parse_mode != batch[0].parse_mode:
+                break
+            if length + 2 + len(candidate.text) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                break
+            batch.append(state.pending.popleft())
+            length += 2 + len(candidate.text)
+        return batch
+
+    async def send_batch(self, chat_id: int, state: ChatState, batch: List[QueuedMessage]):
+        try:
+            await self.bot.send_message(
+                chat_id=chat_id,
+                text="\n\n".join(item.text for item in batch),
+                parse_mode=batch[0].parse_mode
+            )
+        except RetryAfter as e:
+            # Flood control: pause this chat and retry the same batch first
+            self._retry_after += 1
+            state.blocked_until = time.monotonic() + get_retry_after_seconds(e)
+            state.pending.extendleft(reversed(batch))
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad message fails the merged text; retry each on its own so only it fails
+                for item in batch:
+                    item.solo = True
+                state.pending.extendleft(reversed(batch))
+                return
+            self._failed += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        else:
+            now = time.monotonic()
+            self._sent += len(batch)
+            self._coalesced += len(batch) - 1
+            for item in batch:
+                self._latencies.append(now - item.enqueued_at)
+                if not item.future.done():
+                    item.future.set_result(None)
+        finally:
+            state.busy = False
+            self._wakeup.set()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and delivery latency (seconds)."""
+        depth_by_chat = {
+            chat_id: len(state.pending) for chat_id, state in self._chats.items() if state.pending
+        }
+        now = time.monotonic()
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3)
+
+        return {
+            "queue_depth": sum(depth_by_chat.values()),
+            "queue_depth_by_chat": depth_by_chat,
+            "throttled_chats": [
+                chat_id for chat_id, state in self._chats.items() if state.blocked_until > now
+            ],
+            "sent": self._sent,
+            "failed": self._failed,
+            "coalesced": self._coalesced,
+            "retry_after": self._retry_after,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": round(latencies[-1], 3) if latencies else None
+        }
@@ -1,15 +1,31 @@
+import asyncio
 from datetime import datetime, timezone
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Any
 from telegram import Bot, Chat
 from telegram.error import TelegramError
+from bson import ObjectId
 
 from app.core.config import settings
 from app.models.booking import Booking
 from app.models.telegram_group import TelegramGroup
+from app.services.outbox_service import enqueue_notification, enqueue_notifications
+from app.services.telegram_send_queue import TelegramSendQueue
 
 
 bot = Bot(token=settings.BOT_TOKEN)
 
+# Every message sent through the module-level bot goes through this rate-limited queue
+send_queue = TelegramSendQueue(
+    bot,
+    global_rate=settings.TELEGRAM_GLOBAL_MESSAGES_PER_SECOND,
+    chat_messages_per_minute=settings.TELEGRAM_CHAT_MESSAGES_PER_MINUTE,
+    chat_burst=settings.TELEGRAM_CHAT_BURST,
+    coalesce_max_messages=settings.TELEGRAM_COALESCE_MAX_MESSAGES
+)
+
+# Bounds concurrent sends of fan_out_messages across all chats
+fanout_semaphore = asyncio.Semaphore(settings.TELEGRAM_FANOUT_CONCURRENCY)
+
 
 async def send_telegram_message(chat_id: int, message: str, parse_mode: str = "Markdown") -> bool:
     """
@@ -24,17 +40,92 @@ async def send_telegram_message(chat_id: int, message: str, parse_mode: str = "M
         True if successful, False otherwise
     """
     try:
-        await bot.send_message(
-            chat_id=chat_id,
-            text=message,
-            parse_mode=parse_mode
-        )
+        await deliver_telegram_message(chat_id, message, parse_mode)
         return True
     except TelegramError as e:
         print(f"Error sending Telegram message: {e}")
         return False
 
 
+async def deliver_telegram_message(chat_id: int, message: str, parse_mode: Optional[str] = "Markdown"):
+    """
+    Send a message to a Telegram chat through the rate-limited send queue.
+    Flood control (RetryAfter) is waited out by the queue; other errors raise TelegramError.
+    Used by the notification outbox dispatcher, which handles retries.
+    """
+    await send_queue.send(chat_id, message, parse_mode)
+
+
+async def queue_telegram_message(
+    chat_id: int,
+    message: str,
+    parse_mode: str = "Markdown",
+    booking_id: Optional[ObjectId] = None
+) -> bool:
+    """
+    Queue a notification in the persistent outbox (delivered in the background).
+    Sends inline when the outbox is disabled.
+    
+    Returns:
+        True if queued/sent, False otherwise
+    """
+    if settings.NOTIFICATION_OUTBOX_ENABLED:
+        await enqueue_notification(chat_id, message, parse_mode, booking_id=booking_id)
+        return True
+    return await send_telegram_message(chat_id, message, parse_mode)
+
+
+async def fan_out_messages(
+    targets: List[Tuple[int, str]],
+    parse_mode: str = "Markdown",
+    booking_id: Optional[ObjectId] = None
+) -> List[Dict[str, Any]]:
+    """
+    Send messages to several chats concurrently.
+    
+    Different chats are sent in parallel (bounded by TELEGRAM_FANOUT_CONCURRENCY),
+    messages to the same chat are sent one after another in order.
+    Per-chat and global rate limits are enforced by the send queue.
+    With the outbox enabled all messages are queued with a single insert.
+    
+    Args:
+        targets: List of (chat_id, message)
+    
+    Returns:
+        Per-message results in target order:
+        [{"chat_id": int, "success": bool, "error": Optional[str]}]
+    """
+    if not targets:
+        return []
+    
+    if settings.NOTIFICATION_OUTBOX_ENABLED:
+        await enqueue_notifications(targets, parse_mode, booking_id=booking_id)
+        return [{"chat_id": chat_id, "success": True, "error": None} for chat_id, _ in targets]
+    
+    # Group by chat to keep per-chat ordering
+    messages_by_chat: Dict[int, List[Tuple[int, str]]] = {}
+    for index, (chat_id, message) in enumerate(targets):
+        messages_by_chat.setdefault(chat_id, []).append((index, message))
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+    
+    async def send_to_chat(chat_id: int, messages: List[Tuple[int, str]]):
+        for index, message in messages:
+            error = None
+            try:
+                async with fanout_semaphore:
+                    await deliver_telegram_message(chat_id, message, parse_mode)
+            except TelegramError as e:
+                error = str(e)
+                print(f"Error sending Telegram message to {chat_id}: {error}")
+            results[index] = {"chat_id": chat_id, "success": error is None, "error": error}
+    
+    await asyncio.gather(*(
+        send_to_chat(chat_id, messages) for chat_id, messages in messages_by_chat.items()
+    ))
+    return results
+
+
 async def get_telegram_group(group_id: int) -> Optional[TelegramGroup]:
     """
     Get Telegram group by ID.
@@ -211,14 +302,8 @@ def format_time_range(start: datetime, end: datetime) -> str:
     return f"{start.strftime('%H:%M')} – {end.strftime('%H:%M')} WIB"
 
 
-async def notify_new_booking(booking: Booking):
-    """
-    Send notification for new booking to Telegram group.
-    Uses telegram_group_id from booking object.
-    """
-    # Use telegram_group_id from booking (snapshot)
-    group_id = booking.telegram_group_id
-    
+def build_new_booking_message(booking: Booking) -> str:
+    """Build the booking info message (new booking / verification group)."""
     # Format username with @ tag if available
     # For external users: use telegram_username if provided, otherwise use full_name
     # For Telegram users: use username
@@ -243,7 +328,37 @@ async def notify_new_booking(booking: Booking):
         f"Rekan-rekan yang membutuhkan ruangan pada jam tersebut diharapkan dapat berkoordinasi langsung dengan @{username_display}. Terima kasih."
     )
     
-    await send_telegram_message(group_id, message)
+    return message
+
+
+async def notify_new_booking(booking: Booking):
+    """
+    Send notification for new booking to Telegram group.
+    Uses telegram_group_id from booking object.
+    """
+    await queue_telegram_message(booking.telegram_group_id, build_new_booking_message(booking), booking_id=booking.id)
+
+
+async def notify_booking_published(booking: Booking) -> List[Dict[str, Any]]:
+    """
+    Send publish notifications to all target groups concurrently:
+    1. Selected group (always)
+    2. Verification group (if configured)
+    3. Consumption group (if booking has consumption and group is configured)
+    
+    Returns:
+        Per-chat results from fan_out_messages
+    """
+    booking_message = build_new_booking_message(booking)
+    targets = [(booking.telegram_group_id, booking_message)]
+    
+    if booking.verification_group_id:
+        targets.append((booking.verification_group_id, booking_message))
+    
+    if booking.has_consumption and booking.consumption_group_id:
+        targets.append((booking.consumption_group_id, build_consumption_message(booking)))
+    
+    return await fan_out_messages(targets, booking_id=booking.id)
 
 
 async def notify_booking_updated(booking: Booking, old_data: dict):
@@ -279,7 +394,7 @@ async def notify_booking_updated(booking: Booking, old_data: dict):
         f"Mohon perhatikan perubahan jadwal. Terima kasih."
     )
     
-    await send_telegram_message(group_id, message)
+    await queue_telegram_message(group_id, message, booking_id=booking.id)
 
 
 async def notify_booking_cancelled(booking: Booking):
@@ -315,7 +430,7 @@ async def notify_booking_cancelled(booking: Booking):
         f"Ruangan kini tersedia pada jam tersebut. Terima kasih."
     )
     
-    await send_telegram_message(group_id, message)
+    await queue_telegram_message(group_id, message, booking_id=booking.id)
 
 
 async def test_notification(group_id: int) -> bool:
@@ -343,16 +458,8 @@ async def test_notification(group_id: int) -> bool:
     return await send_telegram_message(group_id, message)
 
 
-async def notify_consumption_group(booking: Booking):
-    """
-    Send notification to consumption group.
-    
-    Args:
-        booking: Booking object with consumption details
-    """
-    if not booking.consumption_group_id:
-        return
-    
+def build_consumption_message(booking: Booking) -> str:
+    """Build the consumption request message."""
     # Format username with @ tag if available
     # For external users: use telegram_username if provided, otherwise use full_name
     # For Telegram users: use username
@@ -373,7 +480,20 @@ async def notify_consumption_group(booking: Booking):
         f"Mohon bantu menyiapkan konsumsi sesuai permintaan. Terima kasih."
     )
     
-    await send_telegram_message(booking.consumption_group_id, message)
+    return message
+
+
+async def notify_consumption_group(booking: Booking):
+    """
+    Send notification to consumption group.
+    
+    Args:
+        booking: Booking object with consumption details
+    """
+    if not booking.consumption_group_id:
+        return
+    
+    await queue_telegram_message(booking.consumption_group_id, build_consumption_message(booking), booking_id=booking.id)
 
 
 async def notify_verification_group_booking(booking: Booking):
@@ -386,31 +506,7 @@ async def notify_verification_group_booking(booking: Booking):
     if not booking.verification_group_id:
         return
     
-    # Format username with @ tag if available
-    # For external users: use telegram_username if provided, otherwise use full_name
-    # For Telegram users: use username
-    if booking.user_snapshot.external_user_id:
-        # External user from Katalis app
-        username_display = booking.user_snapshot.telegram_username if booking.user_snapshot.telegram_username else booking.user_snapshot.full_name
-    else:
-        # Telegram user
-        username_display = booking.user_snapshot.username if booking.user_snapshot.username else booking.user_snapshot.full_name
-    
-    # Get division - try booking.division first, then user_snapshot.division
-    division = booking.division if booking.division else booking.user_snapshot.division
-    
-    message = (
-        f"📍 INFO BOOKING: {booking.room_snapshot.name.upper()}\n\n"
-        f"Informasi reservasi untuk hari {format_date_indonesian(booking.start_time)}:\n\n"
-        f"◽️ Jam: {format_time_range(booking.start_time, booking.end_time)}\n"
-        f"◽️ Divisi: {division if division else '-'}\n"
-        f"◽️ Keperluan: {booking.title}\n"
-        f"◽️ Deskripsi: {booking.description if booking.description else '-'}\n\n"
-        f"◽️ PIC: {booking.user_snapshot.full_name} — @{username_display}\n\n"
-        f"Rekan-rekan yang membutuhkan ruangan pada jam tersebut diharapkan dapat berkoordinasi langsung dengan @{username_display}. Terima kasih."
-    )
-    
-    await send_telegram_message(booking.verification_group_id, message)
+    await queue_telegram_message(booking.verification_group_id, build_new_booking_message(booking), booking_id=booking.id)
 
 
 async def notify_verification_group_cleanup(booking: Booking):
@@ -444,4 +540,9 @@ async def notify_verification_group_cleanup(booking: Booking):
         f"Mohon bantu dilakukan perapian/kebersihan ruangan setelah penggunaan. Terima kasih."
     )
     
-    await send_telegram_message(booking.verification_group_id, message)
+    await queue_telegram_message(booking.verification_group_id, message, booking_id=booking.id)
+
+
+def get_send_queue_metrics() -> Dict[str, Any]:
+    """Get queue depth and latency metrics of the Telegram send queue."""
+    return send_queue.get_metrics()
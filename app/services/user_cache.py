@@ -0,0 +1,70 @@
+"""
+In-process cache of authenticated users.
+
+get_current_user runs on every API request; caching the User document by
+user ID and external user ID (bounded LRU with TTL) saves the MongoDB
+lookup. Writes that change identity-relevant fields (admin/active flags,
+avatar, login updates) invalidate the entry; the TTL bounds staleness for
+changes made by other workers.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.models.user import User
+from app.core.config import settings
+
+
+class UserCache:
+    """Bounded LRU + TTL cache of User documents keyed by ID and external user ID."""
+
+    def __init__(self, max_size: int = 1000, ttl: int = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[User, float]]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[User]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user
+
+    def _set(self, key: str, user: User, expires_at: float):
+        self._entries[key] = (user, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_by_id(self, user_id: str) -> Optional[User]:
+        return self._get(f"id:{user_id}")
+
+    def get_by_external_id(self, external_user_id: str) -> Optional[User]:
+        return self._get(f"ext:{external_user_id}")
+
+    def put(self, user: User):
+        """Cache a user under its ID (and external user ID, if any)."""
+        expires_at = time.monotonic() + self.ttl
+        self._set(f"id:{user.id}", user, expires_at)
+        if user.external_user_id:
+            self._set(f"ext:{user.external_user_id}", user, expires_at)
+
+    def invalidate(self, user: User):
+        """Drop a user after its document changed."""
+        self._entries.pop(f"id:{user.id}", None)
+        if user.external_user_id:
+            self._entries.pop(f"ext:{user.external_user_id}", None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Global instance
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,77 @@
+"""
+User management queries.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from app.models.user import User, build_search_keys
+from app.api.pagination import encode_cursor, keyset_filter
+from app.services.index_audit import register_query_shape
+
+
+async def search_users(
+    role: Optional[str] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    count: str = "exact"
+) -> Tuple[List[User], Optional[int], Optional[str]]:
+    """
+    Page through users, newest first, with optional role filter and prefix search.
+    
+    Args:
+        role: 'admin' to return admins only
+        search: Case-insensitive prefix matched against full name, username and division words
+        cursor: Cursor returned for the previous page
+        limit: Page size
+        count: 'exact' (count_documents), 'estimate' (collection metadata, only without filters) or 'none'
+    
+    Returns:
+        (users, total, next_cursor)
+    """
+    filters = {}
+    if role == "admin":
+        filters["is_admin"] = True
+    
+    if search:
+        # Whole values are stored as keys too, so multi-word prefixes match as well
+        prefix = search.strip().lower().lstrip("@")
+        filters["search_keys"] = {"$regex": f"^{re.escape(prefix)}"}
+    
+    query = dict(filters)
+    query.update(keyset_filter("created_at", cursor))
+    
+    users = await User.find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list()
+    
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+    
+    total = None
+    if count == "estimate" and not filters:
+        total = await User.get_motor_collection().estimated_document_count()
+    elif count in ("exact", "estimate"):
+        total = await User.get_motor_collection().count_documents(filters)
+    
+    return users, total, next_cursor
+
+
+register_query_shape(
+    "users, newest first (GET /admin/users)",
+    User,
+    lambda: {},
+    sort=[("created_at", -1), ("_id", -1)]
+)
+
+
+async def backfill_user_search_keys():
+    """Populate search_keys for users created before prefix search existed."""
+    users = await User.find({"search_keys": {"$exists": False}}).to_list()
+    for user in users:
+        await User.get_motor_collection().update_one(
+            {"_id": user.id},
+            {"$set": {"search_keys": build_search_keys(user.full_name, user.username, user.division)}}
+        )
+    if users:
+        print(f"✅ Backfilled search keys for {len(users)} users")
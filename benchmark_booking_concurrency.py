@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for booking creation.
+
+Fires hundreds of simultaneous POST /api/v1/bookings for the same room and
+verifies that exactly one booking wins each contended time slot.
+
+Requires a running backend (BASE_URL) connected to the same MongoDB.
+
+Usage:
+    python benchmark_booking_concurrency.py [BASE_URL] [REQUESTS] [SLOTS]
+    python benchmark_booking_concurrency.py http://localhost:8000 300 3
+"""
+
+import asyncio
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.core.security import create_access_token
+from app.models.user import User
+from app.models.room import Room
+from app.models.booking import Booking
+from app.models.booking_history import BookingHistory
+from app.models.setting import Setting
+from app.models.telegram_group import TelegramGroup
+from app.models.room_slot import RoomSlot
+
+
+BASE_URL = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+TOTAL_REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+SLOT_COUNT = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+BENCHMARK_ROOM_NAME = "Benchmark Concurrency Room"
+BENCHMARK_GROUP_ID = -1009999999999
+
+
+async def setup_fixtures():
+    """Create (or reuse) the benchmark room, telegram group and admin user."""
+    room = await Room.find_one(Room.name == BENCHMARK_ROOM_NAME)
+    if not room:
+        room = Room(name=BENCHMARK_ROOM_NAME, capacity=10, location="Benchmark")
+        await room.insert()
+
+    group = await TelegramGroup.find_one(TelegramGroup.group_id == BENCHMARK_GROUP_ID)
+    if not group:
+        group = TelegramGroup(group_id=BENCHMARK_GROUP_ID, group_name="Benchmark Group")
+        await group.insert()
+
+    user = await User.find_one(User.is_admin == True)
+    if not user:
+        raise RuntimeError("No admin user found - log in once as admin before running the benchmark")
+
+    return room, group, user
+
+
+async def cleanup(room: Room):
+    """Remove bookings and slot claims created by the benchmark."""
+    bookings = await Booking.find(Booking.room_id == room.id).to_list()
+    for booking in bookings:
+        await BookingHistory.find(BookingHistory.booking_id == booking.id).delete_many()
+    await Booking.find(Booking.room_id == room.id).delete_many()
+    await RoomSlot.find(RoomSlot.room_id == room.id).delete_many()
+
+
+async def post_booking(client: httpx.AsyncClient, token: str, payload: dict):
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/bookings",
+        json=payload,
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return response.status_code, time.perf_counter() - started
+
+
+async def run_benchmark():
+    print("=" * 70)
+    print("🏁 BENCHMARK: Concurrent POST /bookings for a single room")
+    print("=" * 70)
+
+    await connect_to_mongo()
+    await init_beanie_models([User, Room, Booking, BookingHistory, Setting, TelegramGroup, RoomSlot])
+
+    room, group, user = await setup_fixtures()
+    await cleanup(room)
+    token = create_access_token(data={"sub": str(user.id)})
+
+    # Contended slots tomorrow, one hour each (admin token bypasses operating hours)
+    base = (datetime.now(timezone.utc) + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    slots = [(base + timedelta(hours=i), base + timedelta(hours=i + 1)) for i in range(SLOT_COUNT)]
+
+    payloads = []
+    for i in range(TOTAL_REQUESTS):
+        start, end = slots[i % SLOT_COUNT]
+        payloads.append({
+            "room_id": str(room.id),
+            "telegram_group_id": group.group_id,
+            "title": f"Benchmark {i}",
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat()
+        })
+
+    print(f"\n📋 Room: {room.name} ({room.id})")
+    print(f"📋 Requests: {TOTAL_REQUESTS} across {SLOT_COUNT} slots")
+
+    limits = httpx.Limits(max_connections=TOTAL_REQUESTS)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(post_booking(client, token, payload) for payload in payloads))
+        elapsed = time.perf_counter() - started
+
+    status_counts = Counter(status_code for status_code, _ in results)
+    latencies = sorted(latency for _, latency in results)
+
+    print(f"\n⏱️  Total wall time: {elapsed:.2f}s ({TOTAL_REQUESTS / elapsed:.0f} req/s)")
+    print(f"⏱️  Latency p50: {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f} ms")
+    print(f"📊 Status codes: {dict(status_counts)}")
+
+    # Verify exactly one winner per slot in the database
+    all_ok = True
+    for start, end in slots:
+        winners = await Booking.find({
+            "room_id": room.id,
+            "status": "active",
+            "start_time": {"$lt": end},
+            "end_time": {"$gt": start}
+        }).count()
+        ok = winners == 1
+        all_ok = all_ok and ok
+        print(f"  {'✅' if ok else '❌'} {start.isoformat()} → {winners} active booking(s)")
+
+    if status_counts.get(201, 0) != SLOT_COUNT:
+        all_ok = False
+        print(f"❌ Expected {SLOT_COUNT} successful creates, got {status_counts.get(201, 0)}")
+
+    await cleanup(room)
+    await close_mongo_connection()
+
+    print("\n" + ("✅ PASS: exactly one winner per slot" if all_ok else "❌ FAIL: double booking detected"))
+    return all_ok
+
+
+if __name__ == "__main__":
+    success = asyncio.run(run_benchmark())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for booking list endpoints.
+
+Compares, at 1k and 10k bookings:
+- model path: Booking.find().to_list() -> convert_booking_to_response ->
+  response_model validation + jsonable_encoder -> JSON (what list endpoints did)
+- fast path: raw Motor find with BOOKING_RESPONSE_PROJECTION -> orjson
+
+Requires MongoDB (same settings as the backend). Bookings are inserted for a
+dedicated benchmark room and removed afterwards.
+
+Usage:
+    python benchmark_booking_serialization.py [SIZES] [ROUNDS]
+    python benchmark_booking_serialization.py 1000,10000 5
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.booking import Booking
+from app.schemas.booking import BookingResponse
+from app.api.serializers import BOOKING_RESPONSE_PROJECTION, serialize_bookings, convert_booking_to_response
+
+
+SIZES = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 10000]
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+BENCHMARK_ROOM_ID = ObjectId("000000000000000000000bec")
+
+
+def build_documents(count: int) -> List[dict]:
+    """Booking documents shaped like the ones the API writes."""
+    base = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    user_id = ObjectId()
+    documents = []
+    for i in range(count):
+        start = base + timedelta(hours=i)
+        documents.append({
+            "booking_number": f"BENCH-{i:06d}",
+            "user_id": user_id,
+            "user_snapshot": {"full_name": "Benchmark User", "username": "bench", "division": "IT", "telegram_id": 1},
+            "room_id": BENCHMARK_ROOM_ID,
+            "room_snapshot": {"name": "Benchmark Serialization Room"},
+            "telegram_group_id": -1009999999999,
+            "title": f"Benchmark booking {i}",
+            "division": "IT",
+            "description": "Weekly sync with the whole team, agenda in the shared doc.",
+            "start_time": start,
+            "end_time": start + timedelta(minutes=45),
+            "status": "active",
+            "published": True,
+            "has_consumption": i % 3 == 0,
+            "consumption_note": "Snacks for 10" if i % 3 == 0 else None,
+            "hrd_notified": False,
+            "created_at": base,
+            "updated_at": base
+        })
+    return documents
+
+
+async def model_path(response_field) -> bytes:
+    bookings = await Booking.find({"room_id": BENCHMARK_ROOM_ID}).sort(Booking.start_time).to_list()
+    content = [convert_booking_to_response(booking) for booking in bookings]
+    # What FastAPI does with response_model=List[BookingResponse]
+    encoded = await serialize_response(field=response_field, response_content=content)
+    return JSONResponse(content=encoded).body
+
+
+async def fast_path() -> bytes:
+    documents = await Booking.get_motor_collection().find(
+        {"room_id": BENCHMARK_ROOM_ID}, BOOKING_RESPONSE_PROJECTION
+    ).sort("start_time", 1).to_list(None)
+    return serialize_bookings(documents)
+
+
+async def measure(path, *args) -> List[float]:
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        await path(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def run_benchmark():
+    print("=" * 70)
+    print("🏁 BENCHMARK: Booking list serialization (model path vs fast path)")
+    print("=" * 70)
+
+    await connect_to_mongo()
+    await init_beanie_models([Booking])
+    collection = Booking.get_motor_collection()
+    response_field = create_model_field(name="Response_bookings", type_=List[BookingResponse])
+
+    try:
+        for size in SIZES:
+            await collection.delete_many({"room_id": BENCHMARK_ROOM_ID})
+            await collection.insert_many(build_documents(size))
+
+            # Same output from both paths
+            model_body, fast_body = await model_path(response_field), await fast_path()
+            same_output = model_body == fast_body
+
+            model_timings = await measure(model_path, response_field)
+            fast_timings = await measure(fast_path)
+            model_ms = statistics.median(model_timings) * 1000
+            fast_ms = statistics.median(fast_timings) * 1000
+
+            print(f"\n📋 {size} bookings ({ROUNDS} rounds, median incl. query)")
+            print(f"  Model path: {model_ms:8.1f} ms")
+            print(f"  Fast path:  {fast_ms:8.1f} ms  ({model_ms / fast_ms:.1f}x faster)")
+            print(f"  {'✅' if same_output else '⚠️ '} Output {'identical' if same_output else 'differs'} ({len(fast_body)} bytes)")
+    finally:
+        await collection.delete_many({"room_id": BENCHMARK_ROOM_ID})
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,46 @@
+"""
+Audit MongoDB indexes against the registered query shapes.
+Runs explain() on every hot query and flags COLLSCANs and in-memory sorts.
+
+Query shapes are registered by the modules issuing the queries, so the app is
+imported first. Indexes are created by Beanie on init, so the audit sees the
+indexes the current code declares.
+
+Usage:
+    python check_indexes.py
+"""
+import asyncio
+import sys
+
+import app.main  # noqa: F401 - registers the query shapes of every module
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.services.index_audit import QUERY_SHAPES, audit_indexes
+from app.services.auth_code_service import prepare_auth_codes
+
+
+async def check_indexes() -> bool:
+    await connect_to_mongo()
+    await prepare_auth_codes()  # Same index migration as app startup
+    await init_beanie_models(list({shape.model for shape in QUERY_SHAPES}))
+
+    print("=" * 80)
+    print("🔍 INDEX AUDIT")
+    print("=" * 80)
+
+    results = await audit_indexes(verbose=True)
+
+    for result in results:
+        if not result.ok:
+            print(f"\n⚠️  {result.shape.name}")
+            print(f"     Filter: {result.shape.build_filter()}")
+            print(f"     Sort: {result.shape.sort}")
+            print(f"     Plan: {' <- '.join(result.stages)}")
+
+    await close_mongo_connection()
+    print("=" * 80)
+    return all(result.ok for result in results)
+
+
+if __name__ == "__main__":
+    success = asyncio.run(check_indexes())
+    sys.exit(0 if success else 1)
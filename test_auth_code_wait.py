@@ -0,0 +1,162 @@
+"""
+Behaviour checks for Telegram login codes: unique code generation, expiry,
+and the verify-code long-poll waking up when the bot authorizes the code.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards.
+
+Usage:
+    python test_auth_code_wait.py
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.auth_code import AuthCode
+from app.models.setting import Setting
+from app.services.auth_code_service import AuthCodeService, permute_code
+from app.services.auth_code_waiters import auth_code_waiters
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+TELEGRAM_USER = {"id": 123456789, "first_name": "Budi", "username": "budi"}
+
+
+async def insert_code(code: str, expires_in: timedelta) -> AuthCode:
+    now = datetime.now(timezone.utc)
+    auth_code = AuthCode(code=code, created_at=now, expires_at=now + expires_in)
+    await auth_code.insert()
+    return auth_code
+
+
+async def test_codes_are_unique():
+    """Consecutive sequence numbers map to distinct 6-digit codes that do not look sequential."""
+    key = b"test-key"
+    codes = [permute_code(sequence, key) for sequence in range(20000)]
+    assert len(set(codes)) == len(codes), "permutation is collision-free"
+    assert all(len(code) == 6 and code.isdigit() for code in codes)
+    assert sum(int(b) - int(a) == 1 for a, b in zip(codes, codes[1:])) < 10, "codes are not sequential"
+    assert permute_code(42, key) == permute_code(42 + 10 ** 6, key), "sequence wraps after 10^6 codes"
+    assert permute_code(42, key) != permute_code(42, b"other-key"), "codes depend on the key"
+
+    service = AuthCodeService()
+    generated = {(await service.generate_code())[0] for _ in range(20)}
+    assert len(generated) == 20
+    print("✅ Codes unique, 6 digits, keyed and non-sequential")
+
+
+async def test_expired_code_is_rejected():
+    """Expired codes fail verification and do not hold a long-poll open."""
+    service = AuthCodeService()
+    await insert_code("100001", timedelta(seconds=-1))
+    assert await service.verify_code("100001") is None
+
+    started = time.monotonic()
+    assert await service.wait_for_authorization("100001", timeout=5) is None
+    assert time.monotonic() - started < 1, "no wait for an expired code"
+
+    # A code expiring during the long-poll ends it at expiry, not at the timeout
+    await insert_code("100002", timedelta(seconds=1))
+    started = time.monotonic()
+    auth_code = await service.wait_for_authorization("100002", timeout=10)
+    assert auth_code is None or auth_code.telegram_user_data is None, "never authorized"
+    assert time.monotonic() - started < 3
+    print("✅ Expired codes rejected, long-poll ends at expiry")
+
+
+async def test_long_poll_wakes_on_authorization():
+    """The long-poll returns as soon as the bot authorizes the code in this process."""
+    service = AuthCodeService()
+    code, _ = await service.generate_code()
+
+    started = time.monotonic()
+    waiter = asyncio.create_task(service.wait_for_authorization(code, timeout=10))
+    await asyncio.sleep(0.3)
+    assert not waiter.done(), "pending code keeps the request waiting"
+    assert auth_code_waiters.waiting == 1
+
+    success, error = await service.mark_code_used(code, TELEGRAM_USER)
+    assert success, error
+    auth_code = await asyncio.wait_for(waiter, timeout=2)
+    assert auth_code is not None and auth_code.telegram_user_data["id"] == TELEGRAM_USER["id"]
+    assert time.monotonic() - started < 2, "woken by the authorization, not by the timeout"
+    assert auth_code_waiters.waiting == 0, "waiter unsubscribed"
+
+    success, error = await service.mark_code_used(code, TELEGRAM_USER)
+    assert not success and error == "Code already used"
+    print("✅ Long-poll woken by authorization")
+
+
+async def test_long_poll_sees_other_replicas():
+    """Authorizations written by another replica are picked up by the periodic re-check."""
+    service = AuthCodeService()
+    code, _ = await service.generate_code()
+    recheck_seconds = settings.AUTH_CODE_RECHECK_SECONDS
+    settings.AUTH_CODE_RECHECK_SECONDS = 0.3
+    try:
+        waiter = asyncio.create_task(service.wait_for_authorization(code, timeout=10))
+        await asyncio.sleep(0.1)
+        # Written directly: no in-process notification reaches the waiter
+        await AuthCode.get_motor_collection().update_one(
+            {"code": code},
+            {"$set": {"used": True, "telegram_user_data": TELEGRAM_USER, "used_at": datetime.now(timezone.utc)}}
+        )
+        auth_code = await asyncio.wait_for(waiter, timeout=2)
+        assert auth_code is not None and auth_code.telegram_user_data is not None
+    finally:
+        settings.AUTH_CODE_RECHECK_SECONDS = recheck_seconds
+    print("✅ Long-poll sees authorizations from other replicas")
+
+
+async def test_long_poll_times_out():
+    """A code nobody authorizes is returned still pending once the wait times out."""
+    service = AuthCodeService()
+    code, _ = await service.generate_code()
+
+    started = time.monotonic()
+    auth_code = await service.wait_for_authorization(code, timeout=0.5)
+    elapsed = time.monotonic() - started
+    assert auth_code is not None and auth_code.telegram_user_data is None
+    assert 0.4 < elapsed < 2, f"returned after {elapsed:.1f}s"
+    print("✅ Long-poll times out with the code still pending")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Auth codes and verify-code long-poll")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+    await init_beanie_models([AuthCode, Setting])
+
+    passed = True
+    try:
+        for test in (
+            test_codes_are_unique,
+            test_expired_code_is_rejected,
+            test_long_poll_wakes_on_authorization,
+            test_long_poll_sees_other_replicas,
+            test_long_poll_times_out
+        ):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
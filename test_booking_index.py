@@ -0,0 +1,167 @@
+"""
+Behaviour checks for the in-memory booking index (no database needed).
+
+Bookings written by this process carry tz-aware times while bookings loaded
+from MongoDB carry naive UTC times; the index must treat both the same.
+
+Usage:
+    python test_booking_index.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+
+from app.core.config import settings
+from app.models.booking import Booking, UserSnapshot, RoomSnapshot
+from app.services.booking_index import BookingIndex, booking_index
+from app.services.schedule_service import find_scheduled_bookings
+
+
+ROOM_ID = ObjectId()
+OTHER_ROOM_ID = ObjectId()
+
+
+def make_booking(start: datetime, end: datetime, room_id: ObjectId = ROOM_ID, published: bool = True) -> Booking:
+    # construct() skips the collection lookup of Booking(), so no init_beanie is needed
+    return Booking.construct(
+        id=PydanticObjectId(),
+        booking_number=f"BK-{ObjectId()}",
+        user_id=ObjectId(),
+        user_snapshot=UserSnapshot(full_name="Budi Santoso", telegram_id=123456789),
+        room_id=room_id,
+        room_snapshot=RoomSnapshot(name="Ruang Meeting 1"),
+        telegram_group_id=-100,
+        title="Rapat",
+        start_time=start,
+        end_time=end,
+        published=published
+    )
+
+
+def warm_index() -> BookingIndex:
+    index = BookingIndex()
+    index.horizon = datetime(2000, 1, 1)
+    index.is_warm = True
+    return index
+
+
+def local(hour: int, minute: int = 0) -> datetime:
+    """Tomorrow at hour:minute local time (tz-aware, as written by booking_service)."""
+    day = datetime.now(settings.timezone).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=settings.timezone)
+
+
+def naive_utc(dt: datetime) -> datetime:
+    """Same instant as naive UTC (as loaded from MongoDB)."""
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def test_mixed_naive_and_aware_times():
+    """Aware and naive UTC bookings share one timeline."""
+    index = warm_index()
+    aware = make_booking(local(9), local(10))
+    loaded = make_booking(naive_utc(local(10)), naive_utc(local(11)))
+    index.upsert(aware)
+    index.upsert(loaded)
+
+    assert aware.start_time.tzinfo is not None, "caller's booking must not be modified"
+    schedule = index.get_schedule(ROOM_ID, local(0), local(23))
+    assert [booking.id for booking in schedule] == [aware.id, loaded.id]
+    assert all(booking.start_time.tzinfo is None for booking in schedule), "index stores naive UTC"
+
+    # Overlaps are found whichever representation the query uses
+    assert index.find_conflict(ROOM_ID, local(9, 30), local(9, 45)).id == aware.id
+    assert index.find_conflict(ROOM_ID, naive_utc(local(10, 30)), naive_utc(local(10, 45))).id == loaded.id
+    # Back-to-back bookings do not conflict
+    assert index.find_conflict(ROOM_ID, local(11), local(12)) is None
+    assert index.find_conflict(ROOM_ID, naive_utc(local(8)), naive_utc(local(9))) is None
+    print("✅ Mixed naive/aware bookings: ordered, overlaps found, adjacency allowed")
+
+
+async def test_update_and_cancel():
+    """Moving a booking frees its old range; cancelled bookings leave the index."""
+    index = warm_index()
+    booking = make_booking(local(9), local(10))
+    index.upsert(booking)
+
+    moved = booking.copy(update={"start_time": local(13), "end_time": local(14)})
+    index.upsert(moved)
+    assert index.find_conflict(ROOM_ID, local(9), local(10)) is None
+    assert index.find_conflict(ROOM_ID, local(13, 30), local(15)).id == booking.id
+    # An update does not conflict with the booking itself
+    assert index.find_conflict(ROOM_ID, local(13), local(14), exclude_booking_id=booking.id) is None
+
+    index.upsert(moved.copy(update={"status": "cancelled"}))
+    assert index.find_conflict(ROOM_ID, local(13), local(14)) is None
+    assert index.get_schedule(ROOM_ID, local(0), local(23)) == []
+    print("✅ Update moves the booking, cancel removes it")
+
+
+async def test_overlapping_legacy_bookings():
+    """An earlier, longer booking is still found when later (overlapping) bookings end sooner."""
+    index = warm_index()
+    all_day = make_booking(local(8), local(17))
+    index.upsert(all_day)
+    index.upsert(make_booking(local(9), local(10)))
+    index.upsert(make_booking(local(11), local(12)))
+
+    assert index.find_conflict(ROOM_ID, local(14), local(15)).id == all_day.id
+    assert index.find_conflict(ROOM_ID, local(14), local(15), exclude_booking_id=all_day.id) is None
+    assert index.find_conflict(ROOM_ID, local(17), local(18)) is None
+
+    index.remove(all_day.id)
+    assert index.find_conflict(ROOM_ID, local(14), local(15)) is None, "running max end shrinks on removal"
+    assert index.find_conflict(ROOM_ID, local(11, 30), local(13)) is not None
+    print("✅ Overlapping bookings: a covering earlier booking is found")
+
+
+async def test_schedule_sorts_mixed_times():
+    """find_scheduled_bookings sorts index hits across rooms without comparing naive and aware times."""
+    booking_index.horizon = datetime(2000, 1, 1)
+    booking_index.is_warm = True
+    try:
+        first = make_booking(local(8), local(9), room_id=OTHER_ROOM_ID)
+        second = make_booking(naive_utc(local(9)), naive_utc(local(10)))
+        third = make_booking(local(10), local(11), room_id=OTHER_ROOM_ID)
+        draft = make_booking(local(12), local(13), published=False)
+        for booking in (third, second, first, draft):
+            booking_index.upsert(booking)
+
+        published = await find_scheduled_bookings(local(0), local(23))
+        assert [booking.id for booking in published] == [first.id, second.id, third.id]
+
+        everything = await find_scheduled_bookings(local(0), local(23), published_only=False)
+        assert [booking.id for booking in everything] == [first.id, second.id, third.id, draft.id]
+    finally:
+        booking_index.invalidate()
+    print("✅ Schedules across rooms sorted by start time")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Booking index")
+    print("=" * 60)
+
+    passed = True
+    for test in (
+        test_mixed_naive_and_aware_times,
+        test_update_and_cancel,
+        test_overlapping_legacy_bookings,
+        test_schedule_sorts_mixed_times
+    ):
+        try:
+            await test()
+        except Exception as e:
+            passed = False
+            print(f"❌ {test.__name__} failed: {e!r}")
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,96 @@
+"""
+Behaviour checks for booking number allocation: concurrent allocations get
+unique numbers, with and without block reservation, and the counter keeps
+counting from an existing value.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards.
+
+Usage:
+    python test_booking_number.py
+"""
+import asyncio
+import sys
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.setting import Setting
+from app.services.counter_service import BOOKING_COUNTER_KEY, BookingNumberAllocator
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+
+
+async def counter_value() -> int:
+    setting = await Setting.find_one(Setting.key == BOOKING_COUNTER_KEY)
+    return int(setting.value)
+
+
+async def test_concurrent_allocations_are_unique():
+    """Simultaneous allocations from several workers never hand out a number twice."""
+    await Setting.get_motor_collection().delete_many({})
+    workers = [BookingNumberAllocator() for _ in range(4)]
+    numbers = await asyncio.gather(*(workers[i % 4].next() for i in range(100)))
+
+    assert sorted(numbers) == list(range(1, 101)), "one round trip per number, no gaps"
+    assert await counter_value() == 100
+    print("✅ Concurrent allocations unique")
+
+
+async def test_block_reservation():
+    """Block reservation serves numbers from memory; workers still never collide."""
+    await Setting.get_motor_collection().delete_many({})
+    workers = [BookingNumberAllocator(block_size=10) for _ in range(3)]
+    numbers = await asyncio.gather(*(workers[i % 3].next() for i in range(45)))
+
+    assert len(set(numbers)) == 45, "numbers unique across workers"
+    assert await counter_value() == 60, "each worker reserved whole blocks"
+    assert await workers[0].next() not in numbers
+    print("✅ Block reservation unique across workers")
+
+
+async def test_continues_existing_counter():
+    """An existing counter (e.g. from the old read-modify-write code) keeps counting."""
+    await Setting.get_motor_collection().delete_many({})
+    await Setting(key=BOOKING_COUNTER_KEY, value="41", description="Counter untuk generate booking number").insert()
+
+    allocator = BookingNumberAllocator()
+    assert await allocator.next() == 42
+    assert await allocator.reserve(3) == [43, 44, 45]
+    print("✅ Existing counter continued")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Booking number allocation")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+    await init_beanie_models([Setting])
+
+    passed = True
+    try:
+        for test in (
+            test_concurrent_allocations_are_unique,
+            test_block_reservation,
+            test_continues_existing_counter
+        ):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,129 @@
+"""
+Behaviour checks for booking history archival and the paginated timeline:
+old records move into monthly buckets, the timeline pages through both
+collections in order, and interrupted or repeated archival runs never show
+or store a record twice.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards.
+
+Usage:
+    python test_history_archive.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.booking_history import BookingHistory, BookingHistoryArchive
+from app.services.history_service import archive_booking_history, get_archive_cutoff, get_history_page
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+BOOKING_ID = PydanticObjectId()
+USER_ID = PydanticObjectId()
+
+
+async def insert_history(count: int) -> list:
+    """`count` records one week apart, the oldest well before the archive cutoff. Returns their _ids, newest first."""
+    newest = datetime.now(timezone.utc).replace(tzinfo=None)
+    records = [
+        BookingHistory(
+            id=PydanticObjectId(),
+            booking_id=BOOKING_ID,
+            booking_number="BK-00001",
+            changed_by=USER_ID,
+            action="updated",
+            changed_at=newest - timedelta(weeks=i)
+        )
+        for i in range(count)
+    ]
+    await BookingHistory.insert_many(records)
+    return [record.id for record in records]
+
+
+async def timeline(limit: int) -> list:
+    """_ids of the booking's whole timeline, read page by page."""
+    ids, cursor = [], None
+    while True:
+        documents, cursor = await get_history_page({"booking_id": BOOKING_ID}, {"booking_id": BOOKING_ID}, cursor, limit)
+        ids.extend(document["_id"] for document in documents)
+        if cursor is None:
+            return ids
+
+
+async def reset():
+    await BookingHistory.get_motor_collection().delete_many({})
+    await BookingHistoryArchive.get_motor_collection().delete_many({})
+
+
+async def test_archive_and_timeline():
+    """Archived and recent records read as one ordered timeline across page boundaries."""
+    await reset()
+    expected = await insert_history(60)
+    cutoff = get_archive_cutoff()
+
+    archived = await archive_booking_history()
+    assert archived > 0 and await BookingHistory.find({"changed_at": {"$lt": cutoff}}).count() == 0
+    assert await BookingHistory.count() == 60 - archived
+    assert all(bucket.month < cutoff for bucket in await BookingHistoryArchive.find().to_list())
+
+    for limit in (7, 50, 200):
+        assert await timeline(limit) == expected, f"timeline with page size {limit}"
+    assert await archive_booking_history() == 0, "nothing left to archive"
+    print(f"✅ {archived} records archived, timeline complete and ordered")
+
+
+async def test_interrupted_run():
+    """A run stopped between copy and delete shows each record once and finishes on the next run."""
+    await reset()
+    expected = await insert_history(60)
+    documents = await BookingHistory.get_motor_collection().find({"changed_at": {"$lt": get_archive_cutoff()}}).to_list(None)
+
+    # Copy done, delete never happened
+    await archive_booking_history()
+    await BookingHistory.get_motor_collection().insert_many(documents)
+    assert await timeline(10) == expected, "records in both collections shown once"
+
+    assert await archive_booking_history() == len(documents)
+    entries = [entry["_id"] for bucket in await BookingHistoryArchive.find().to_list() for entry in bucket.entries]
+    assert len(entries) == len(set(entries)) == len(documents), "copied again without duplicate entries"
+    assert await timeline(10) == expected
+    print("✅ Interrupted archival: no duplicates, completed by the next run")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Booking history archive")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    settings.HISTORY_ARCHIVE_AFTER_MONTHS = 6
+    settings.HISTORY_ARCHIVE_BATCH_SIZE = 8
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+    await init_beanie_models([BookingHistory, BookingHistoryArchive])
+
+    passed = True
+    try:
+        for test in (test_archive_and_timeline, test_interrupted_run):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
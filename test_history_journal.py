@@ -0,0 +1,174 @@
+"""
+Behaviour checks for the booking history journal: batched writes, retry
+after MongoDB failures, dropping records MongoDB rejects, the buffer cap and
+the journal mode.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards.
+
+Usage:
+    python test_history_journal.py
+"""
+import asyncio
+import sys
+
+from beanie import PydanticObjectId
+from pymongo.errors import AutoReconnect
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.booking_history import BookingHistory
+from app.services.history_journal import HistoryJournal
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+
+
+def make_history(action: str = "updated") -> BookingHistory:
+    return BookingHistory(
+        booking_id=PydanticObjectId(),
+        booking_number="BK-00001",
+        changed_by=PydanticObjectId(),
+        action=action
+    )
+
+
+def collection():
+    return BookingHistory.get_motor_collection()
+
+
+async def test_batches_are_written():
+    """Buffered records are written in batches, once each, even when a batch is retried."""
+    await collection().delete_many({})
+    journal = HistoryJournal(batch_size=2, flush_interval=60)
+    records = [make_history() for _ in range(5)]
+    assert all(journal.record(history) for history in records)
+
+    assert await journal.flush() == 5
+    assert await collection().count_documents({}) == 5
+
+    # A record that was already written (batch retried after a timeout) is not duplicated
+    journal.record(records[0])
+    journal.record(make_history())
+    await journal.flush()
+    assert await collection().count_documents({}) == 6
+    assert journal.get_metrics()["buffered"] == 0
+    print("✅ Records written in batches, retries do not duplicate")
+
+
+async def test_transient_failure_is_retried():
+    """A batch that fails because MongoDB is unreachable stays buffered and is written later."""
+    await collection().delete_many({})
+    journal = HistoryJournal(batch_size=10, flush_interval=60)
+    for _ in range(3):
+        journal.record(make_history())
+
+    insert_many = BookingHistory.insert_many
+    failures = [AutoReconnect("connection closed")]
+
+    async def flaky_insert_many(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await insert_many(*args, **kwargs)
+
+    BookingHistory.insert_many = flaky_insert_many
+    try:
+        try:
+            await journal.flush()
+        except AutoReconnect:
+            pass
+        else:
+            raise AssertionError("transient failure not reported")
+        assert journal.get_metrics()["buffered"] == 3, "nothing dropped while MongoDB is down"
+        assert await journal.flush() == 3
+    finally:
+        BookingHistory.insert_many = insert_many
+    assert await collection().count_documents({}) == 3
+    assert journal.get_metrics()["dropped"] == 0
+    print("✅ Transient failure: batch kept and retried")
+
+
+async def test_rejected_record_is_dropped():
+    """A record MongoDB rejects on its own is dropped; the records around it are written."""
+    await collection().delete_many({})
+    await database.get_db().command({
+        "collMod": BookingHistory.get_collection_name(),
+        "validator": {"action": {"$ne": "rejected"}}
+    })
+    try:
+        journal = HistoryJournal(batch_size=10, flush_interval=60)
+        for action in ("created", "rejected", "updated"):
+            journal.record(make_history(action))
+        journal.record(make_history("cancelled"))
+
+        assert await journal.flush() == 3
+        metrics = journal.get_metrics()
+        assert metrics["buffered"] == 0 and metrics["dropped"] == 1, metrics
+        assert sorted(await collection().distinct("action")) == ["cancelled", "created", "updated"]
+    finally:
+        await database.get_db().command({
+            "collMod": BookingHistory.get_collection_name(),
+            "validator": {}
+        })
+    print("✅ Rejected record dropped, later records not blocked")
+
+
+async def test_buffer_is_capped():
+    """Once the buffer is full, record() refuses so the caller writes inline."""
+    journal = HistoryJournal(batch_size=2, flush_interval=60, max_buffered=3)
+    assert all(journal.record(make_history()) for _ in range(3))
+    assert not journal.record(make_history()), "full buffer refuses more records"
+    assert journal.get_metrics()["buffered"] == 3
+    print("✅ Buffer capped")
+
+
+async def test_auto_mode():
+    """Mode auto resolves to transactional on replica sets and buffered on a standalone server."""
+    journal = HistoryJournal()
+    journal.mode = "auto"
+    hello = await database.client.admin.command("hello")
+    expected = "transactional" if hello.get("setName") or hello.get("msg") == "isdbgrid" else "buffered"
+    assert await journal.resolve_mode() == expected
+    assert journal.transactional == (expected == "transactional")
+
+    journal.mode = "buffered"
+    assert await journal.resolve_mode() == "buffered", "explicit mode is kept"
+    print(f"✅ Auto mode resolved to {expected}")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Booking history journal")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+    await init_beanie_models([BookingHistory])
+
+    passed = True
+    try:
+        for test in (
+            test_batches_are_written,
+            test_transient_failure_is_retried,
+            test_rejected_record_is_dropped,
+            test_buffer_is_capped,
+            test_auto_mode
+        ):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,161 @@
+"""
+Behaviour checks for leader election: one lease holder at a time, handover
+on release and on lease expiry, and standing down when a callback fails.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards.
+
+Usage:
+    python test_leader_election.py
+"""
+import asyncio
+import sys
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection
+from app.services.leader_service import LeaderElection
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+
+
+async def wait_until(condition, timeout: float = 5.0) -> bool:
+    """Poll condition (plain or coroutine function) until it holds or the timeout passes."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        result = condition()
+        if asyncio.iscoroutine(result):
+            result = await result
+        if result or loop.time() >= deadline:
+            return bool(result)
+        await asyncio.sleep(0.05)
+
+
+async def test_single_holder_and_release():
+    """Only one replica holds the lease; releasing it lets the other take over at once."""
+    first = LeaderElection("test-release", ttl=30)
+    second = LeaderElection("test-release", ttl=30)
+
+    results = await asyncio.gather(first.try_acquire(), second.try_acquire())
+    assert sorted(results) == [False, True], "exactly one replica wins a contended lease"
+    leader, follower = (first, second) if results[0] else (second, first)
+
+    assert await leader.try_acquire(), "leader renews its own lease"
+    assert not await follower.try_acquire(), "follower cannot take a live lease"
+
+    await follower.release()
+    assert not await follower.try_acquire(), "release by a non-holder has no effect"
+
+    await leader.release()
+    assert await follower.try_acquire(), "follower takes over right after release"
+    assert not await leader.try_acquire(), "former leader is now a follower"
+    await follower.release()
+    print("✅ One holder at a time; release hands over immediately")
+
+
+async def test_handover_on_expiry():
+    """A leader that stops renewing (crashed) loses the lease once it expires."""
+    crashed = LeaderElection("test-expiry", ttl=1)
+    standby = LeaderElection("test-expiry", ttl=1)
+
+    assert await crashed.try_acquire()
+    assert not await standby.try_acquire()
+    await asyncio.sleep(1.5)
+    assert await standby.try_acquire(), "standby takes over an expired lease"
+    assert not await crashed.try_acquire(), "old leader cannot take the lease back"
+    await standby.release()
+    print("✅ Expired lease taken over by standby")
+
+
+async def test_callbacks_follow_leadership():
+    """run() reports elections and demotions; stop() releases the lease for the next replica."""
+    events = []
+    first = LeaderElection("test-run", ttl=2, heartbeat=1)
+    second = LeaderElection("test-run", ttl=2, heartbeat=1)
+
+    async def on_elected(name):
+        events.append(("elected", name))
+
+    async def on_demoted(name):
+        events.append(("demoted", name))
+
+    first.start(lambda: on_elected("first"), lambda: on_demoted("first"))
+    assert await wait_until(lambda: first.is_leader), "first replica elected"
+    second.start(lambda: on_elected("second"), lambda: on_demoted("second"))
+    await asyncio.sleep(1.5)
+    assert not second.is_leader, "second replica stays standby"
+
+    await first.stop()
+    assert ("demoted", "first") in events
+    assert await wait_until(lambda: second.is_leader, timeout=3), "second replica elected after stop"
+    await second.stop()
+    assert events == [
+        ("elected", "first"),
+        ("demoted", "first"),
+        ("elected", "second"),
+        ("demoted", "second")
+    ], events
+    print("✅ Callbacks follow leadership; stop hands over")
+
+
+async def test_failed_callback_stands_down():
+    """A leader whose on_elected fails stops its jobs, gives the lease back and campaigns again."""
+    demoted = []
+    failing = LeaderElection("test-failure", ttl=30, heartbeat=1)
+    standby = LeaderElection("test-failure", ttl=30)
+
+    async def on_elected():
+        raise RuntimeError("scheduler did not resume")
+
+    async def on_demoted():
+        demoted.append(True)
+
+    failing.start(on_elected, on_demoted)
+    try:
+        assert await wait_until(lambda: bool(demoted)), "jobs stopped after the failure"
+        assert not failing.is_leader
+        # Lease released instead of waiting 30s for it to expire
+        assert await wait_until(standby.try_acquire, timeout=0.5), "lease handed back"
+        await asyncio.sleep(1.5)
+        assert not failing.is_leader, "failed replica does not steal the lease back"
+    finally:
+        await failing.stop()
+        await standby.release()
+    print("✅ Failed election callback stands down and releases the lease")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Leader election")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+
+    passed = True
+    try:
+        for test in (
+            test_single_holder_and_release,
+            test_handover_on_expiry,
+            test_callbacks_follow_leadership,
+            test_failed_callback_stands_down
+        ):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
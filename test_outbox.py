@@ -0,0 +1,241 @@
+"""
+Behaviour checks for the notification outbox: claiming due entries, lease
+recovery and renewal, retry/backoff of failed deliveries, and one entry per
+chat in flight.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards. Nothing is sent to Telegram.
+
+Usage:
+    python test_outbox.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from telegram.error import BadRequest, RetryAfter, TimedOut
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.notification_outbox import NotificationOutbox
+from app.services import outbox_service
+from app.services.outbox_service import (
+    BACKOFF_BASE_SECONDS,
+    OutboxDispatcher,
+    claim_next_entry,
+    enqueue_notification
+)
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+
+
+def collection():
+    return NotificationOutbox.get_motor_collection()
+
+
+async def make_due(entry_id):
+    """Pretend the backoff delay has passed."""
+    await collection().update_one(
+        {"_id": entry_id},
+        {"$set": {"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+    )
+
+
+async def deliver_once(outcome) -> dict:
+    """Queue one message, let a dispatcher deliver it with the given outcome (None or an exception), return the entry."""
+    async def deliver(chat_id, message, parse_mode):
+        if outcome is not None:
+            raise outcome
+
+    entry = await enqueue_notification(-100, "Halo")
+    dispatcher = OutboxDispatcher(concurrency=1, chat_min_interval=0)
+    dispatcher.start(deliver)
+    try:
+        for _ in range(100):
+            document = await collection().find_one({"_id": entry.id})
+            # Rescheduled entries are pending again, with the error recorded
+            if document["status"] in ("sent", "failed") or (document["status"] == "pending" and document.get("last_error")):
+                return document
+            await asyncio.sleep(0.05)
+        raise AssertionError(f"entry not processed, still {document['status']}")
+    finally:
+        await dispatcher.stop()
+
+
+async def test_claim_order_and_exclusivity():
+    """Due entries are claimed oldest first, each by one claimer only."""
+    await collection().delete_many({})
+    now = datetime.now(timezone.utc)
+    later = await enqueue_notification(-100, "kedua")
+    earlier = await enqueue_notification(-100, "pertama")
+    await collection().update_one({"_id": earlier.id}, {"$set": {"next_attempt_at": now - timedelta(minutes=2)}})
+    await collection().update_one({"_id": later.id}, {"$set": {"next_attempt_at": now - timedelta(minutes=1)}})
+    not_due = await enqueue_notification(-100, "nanti")
+    await collection().update_one({"_id": not_due.id}, {"$set": {"next_attempt_at": now + timedelta(minutes=5)}})
+
+    claims = await asyncio.gather(claim_next_entry(), claim_next_entry(), claim_next_entry())
+    claimed = [claim["_id"] for claim in claims if claim]
+    assert sorted(claimed) == sorted([earlier.id, later.id]), "both due entries claimed once, future one left"
+
+    assert await claim_next_entry() is None, "nothing left to claim"
+    document = await collection().find_one({"_id": earlier.id})
+    assert document["status"] == "sending" and document["locked_until"] is not None
+
+    sequential = []
+    await collection().update_many({"_id": {"$in": claimed}}, {"$set": {"status": "pending"}})
+    while (claim := await claim_next_entry()) is not None:
+        sequential.append(claim["_id"])
+    assert sequential == [earlier.id, later.id], "oldest next_attempt_at first"
+    print("✅ Due entries claimed once each, oldest first; future entries wait")
+
+
+async def test_expired_lease_is_reclaimed():
+    """An entry stuck in 'sending' (crashed process) is claimed again once its lease expires."""
+    await collection().delete_many({})
+    entry = await enqueue_notification(-100, "Halo")
+    assert (await claim_next_entry())["_id"] == entry.id
+    assert await claim_next_entry() is None, "leased entry is not handed out twice"
+
+    await collection().update_one(
+        {"_id": entry.id},
+        {"$set": {"locked_until": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+    )
+    reclaimed = await claim_next_entry()
+    assert reclaimed is not None and reclaimed["_id"] == entry.id
+    print("✅ Expired lease reclaimed")
+
+
+async def test_retry_with_backoff():
+    """Transient failures back off and retry; flood control does not count; permanent errors give up."""
+    await collection().delete_many({})
+
+    document = await deliver_once(TimedOut())
+    assert document["status"] == "pending" and document["attempts"] == 1
+    delay = (document["next_attempt_at"] - datetime.utcnow()).total_seconds()
+    assert 0 < delay <= BACKOFF_BASE_SECONDS, f"first retry after {BACKOFF_BASE_SECONDS}s, got {delay:.1f}s"
+    assert await claim_next_entry() is None, "not retried before its backoff"
+    await make_due(document["_id"])
+    assert (await claim_next_entry())["_id"] == document["_id"], "retried once due"
+
+    document = await deliver_once(RetryAfter(30))
+    assert document["status"] == "pending" and document["attempts"] == 0, "flood control is not an attempt"
+    assert (document["next_attempt_at"] - datetime.utcnow()).total_seconds() > 20
+
+    document = await deliver_once(BadRequest("Chat not found"))
+    assert document["status"] == "failed" and document["purge_at"] is not None
+
+    document = await deliver_once(None)
+    assert document["status"] == "sent" and document["attempts"] == 1 and document["purge_at"] is not None
+    print("✅ Backoff retry, RetryAfter without attempt, permanent failure, success")
+
+
+async def test_busy_chat_does_not_block_others():
+    """A burst for one chat takes one delivery slot; other chats are delivered meanwhile."""
+    await collection().delete_many({})
+    release_burst = asyncio.Event()
+    in_flight, most_in_flight, delivered = {}, {}, []
+
+    async def deliver(chat_id, message, parse_mode):
+        in_flight[chat_id] = in_flight.get(chat_id, 0) + 1
+        most_in_flight[chat_id] = max(most_in_flight.get(chat_id, 0), in_flight[chat_id])
+        try:
+            if chat_id == -100:
+                await release_burst.wait()
+            delivered.append(chat_id)
+        finally:
+            in_flight[chat_id] -= 1
+
+    for i in range(6):
+        await enqueue_notification(-100, f"burst {i}")
+    await enqueue_notification(-200, "lain")
+    dispatcher = OutboxDispatcher(concurrency=2, chat_min_interval=0)
+    dispatcher.start(deliver)
+    try:
+        for _ in range(40):
+            if -200 in delivered:
+                break
+            await asyncio.sleep(0.05)
+        assert -200 in delivered, "other chat delivered while the burst is stuck"
+        assert await collection().count_documents({"chat_id": -100, "status": "sending"}) == 1, "burst holds one slot"
+
+        release_burst.set()
+        for _ in range(100):
+            if await collection().count_documents({"status": "sent"}) == 7:
+                break
+            await asyncio.sleep(0.05)
+        assert await collection().count_documents({"status": "sent"}) == 7
+        assert most_in_flight[-100] == 1, "one entry per chat in flight"
+    finally:
+        await dispatcher.stop()
+    print("✅ Busy chat holds one slot, other chats keep flowing")
+
+
+async def test_lease_renewed_during_long_send():
+    """An entry waiting longer than its lease (flood control in the send queue) is not reclaimed."""
+    await collection().delete_many({})
+    lease_seconds = outbox_service.LEASE_SECONDS
+    outbox_service.LEASE_SECONDS = 0.6
+    sending = asyncio.Event()
+    finish = asyncio.Event()
+
+    async def deliver(chat_id, message, parse_mode):
+        sending.set()
+        await finish.wait()
+
+    entry = await enqueue_notification(-100, "Halo")
+    dispatcher = OutboxDispatcher(concurrency=1, chat_min_interval=0)
+    dispatcher.start(deliver)
+    try:
+        await asyncio.wait_for(sending.wait(), timeout=2)
+        await asyncio.sleep(1.5)
+        assert await claim_next_entry() is None, "lease still held after outliving its first period"
+        finish.set()
+        for _ in range(40):
+            if (await collection().find_one({"_id": entry.id}))["status"] == "sent":
+                break
+            await asyncio.sleep(0.05)
+        assert (await collection().find_one({"_id": entry.id}))["status"] == "sent"
+    finally:
+        finish.set()
+        outbox_service.LEASE_SECONDS = lease_seconds
+        await dispatcher.stop()
+    print("✅ Lease renewed while a delivery is waiting")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Notification outbox")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+    await init_beanie_models([NotificationOutbox])
+
+    passed = True
+    try:
+        for test in (
+            test_claim_order_and_exclusivity,
+            test_expired_lease_is_reclaimed,
+            test_retry_with_backoff,
+            test_busy_chat_does_not_block_others,
+            test_lease_renewed_during_long_send
+        ):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
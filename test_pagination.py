@@ -0,0 +1,143 @@
+"""
+Behaviour checks for keyset (cursor) pagination (no database needed).
+
+Pages are walked over an in-memory collection with the same (sort value, _id)
+ordering and $or filter MongoDB evaluates, including ties on the sort value.
+
+Usage:
+    python test_pagination.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Evaluate the subset of MongoDB filters keyset_filter produces."""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict):
+            for operator, value in condition.items():
+                if operator == "$lt" and not document[field] < value:
+                    return False
+                if operator == "$gt" and not document[field] > value:
+                    return False
+        elif document[field] != condition:
+            return False
+    return True
+
+
+def fetch_page(
+    documents: List[dict],
+    field: str,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True
+) -> tuple:
+    """find(keyset_filter).sort((field, _id)).limit(limit + 1), then cut the page like the endpoints do."""
+    query = keyset_filter(field, cursor, descending)
+    ordered = sorted(documents, key=lambda document: (document[field], document["_id"]), reverse=descending)
+    page = [document for document in ordered if matches(document, query)][:limit + 1]
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1][field], page[-1]["_id"])
+    return page, next_cursor
+
+
+def walk(documents: List[dict], field: str, limit: int, descending: bool = True) -> List[dict]:
+    seen, cursor = [], None
+    while True:
+        page, cursor = fetch_page(documents, field, cursor, limit, descending)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+async def test_cursor_round_trip():
+    """Cursors carry datetimes, plain values and the _id tie-breaker unchanged."""
+    document_id = ObjectId()
+    created_at = datetime(2025, 2, 20, 11, 0, 0, 123456)
+    assert decode_cursor(encode_cursor(created_at, document_id)) == (created_at, document_id)
+    assert decode_cursor(encode_cursor("BK-00042", document_id)) == ("BK-00042", document_id)
+    assert "=" not in encode_cursor(created_at, document_id), "cursors are URL-safe without padding"
+
+    for malformed in ("not-a-cursor", encode_cursor(created_at, document_id)[:-4]):
+        try:
+            decode_cursor(malformed)
+        except HTTPException as e:
+            assert e.status_code == 400
+        else:
+            raise AssertionError(f"malformed cursor accepted: {malformed}")
+
+    assert keyset_filter("created_at", None) == {}, "first page has no filter"
+    print("✅ Cursors round-trip; malformed cursors are a 400")
+
+
+async def test_pages_cover_everything_once():
+    """Walking all pages returns every document exactly once, in sort order, even across ties."""
+    start = datetime(2025, 1, 1)
+    # Three documents per timestamp, so page boundaries fall inside ties
+    documents = [
+        {"_id": ObjectId(), "created_at": start + timedelta(minutes=i // 3)}
+        for i in range(47)
+    ]
+
+    for limit in (1, 2, 3, 5, 10, 47, 100):
+        for descending in (True, False):
+            seen = walk(documents, "created_at", limit, descending)
+            expected = sorted(documents, key=lambda document: (document["created_at"], document["_id"]), reverse=descending)
+            assert [document["_id"] for document in seen] == [document["_id"] for document in expected], (
+                f"limit={limit} descending={descending}"
+            )
+    print("✅ Pages cover every document once, in order, for all page sizes")
+
+
+async def test_inserts_do_not_shift_pages():
+    """Documents inserted after the first page neither repeat nor hide older ones (unlike skip/limit)."""
+    start = datetime(2025, 1, 1)
+    documents = [{"_id": ObjectId(), "created_at": start + timedelta(minutes=i)} for i in range(10)]
+
+    first_page, cursor = fetch_page(documents, "created_at", None, 4)
+    # Newer bookings arrive while the client is paging (newest first)
+    documents += [{"_id": ObjectId(), "created_at": start + timedelta(hours=1, minutes=i)} for i in range(3)]
+
+    rest = []
+    while cursor:
+        page, cursor = fetch_page(documents, "created_at", cursor, 4)
+        rest.extend(page)
+
+    ids = [document["_id"] for document in first_page + rest]
+    assert len(ids) == len(set(ids)) == 10, "each original document exactly once"
+    print("✅ Concurrent inserts do not shift later pages")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Keyset pagination")
+    print("=" * 60)
+
+    passed = True
+    for test in (test_cursor_round_trip, test_pages_cover_everything_once, test_inserts_do_not_shift_pages):
+        try:
+            await test()
+        except Exception as e:
+            passed = False
+            print(f"❌ {test.__name__} failed: {e!r}")
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,190 @@
+"""
+Behaviour checks for atomic room slot reservation: exact claims, concurrent
+claims, moving and releasing claims, and the startup backfill.
+
+Needs MongoDB (MONGODB_URL); runs against a throwaway <MONGODB_DB_NAME>_test
+database that is dropped afterwards.
+
+Usage:
+    python test_room_slots.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, init_beanie_models
+from app.models.booking import Booking, UserSnapshot, RoomSnapshot
+from app.models.room_slot import RoomSlot
+from app.services.reservation_service import (
+    backfill_room_slots,
+    claim_room_slots,
+    move_room_slots,
+    release_room_slots
+)
+
+
+TEST_DB_NAME = f"{settings.MONGODB_DB_NAME}_test"
+ROOM_ID = ObjectId()
+OTHER_ROOM_ID = ObjectId()
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    """Tomorrow at hour:minute UTC."""
+    day = datetime.now(timezone.utc).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+
+
+def collection():
+    return RoomSlot.get_motor_collection()
+
+
+async def claims_of(booking_id: ObjectId) -> list:
+    """(room_id, start, end, claim_id) of every claim a booking holds, in time order."""
+    found = []
+    async for document in collection().find({"claims.booking_id": booking_id}):
+        for claim in document["claims"]:
+            if claim["booking_id"] == booking_id:
+                found.append((document["room_id"], claim["start"], claim["end"], claim["claim_id"]))
+    return sorted(found, key=lambda claim: claim[1])
+
+
+async def insert_booking(start: datetime, end: datetime) -> Booking:
+    booking = Booking(
+        booking_number=f"BK-{ObjectId()}",
+        user_id=ObjectId(),
+        user_snapshot=UserSnapshot(full_name="Budi Santoso", telegram_id=123456789),
+        room_id=ROOM_ID,
+        room_snapshot=RoomSnapshot(name="Ruang Meeting 1"),
+        telegram_group_id=-100,
+        title="Rapat",
+        start_time=start,
+        end_time=end,
+        published=True
+    )
+    await booking.insert()
+    return booking
+
+
+async def test_adjacent_off_grid_bookings():
+    """Bookings meeting inside a slot both fit; an overlap is rejected and names the holder."""
+    await collection().delete_many({})
+    first, second, third = ObjectId(), ObjectId(), ObjectId()
+
+    assert await claim_room_slots(ROOM_ID, at(2), at(2, 20), first) == (True, None)
+    assert await claim_room_slots(ROOM_ID, at(2, 20), at(3), second) == (True, None), "adjacent booking fits"
+    assert await claim_room_slots(OTHER_ROOM_ID, at(2, 10), at(2, 30), third) == (True, None), "other room is free"
+
+    reserved, holder = await claim_room_slots(ROOM_ID, at(2, 10), at(2, 30), third)
+    assert not reserved and holder in (first, second)
+    assert len(await claims_of(third)) == 2, "failed claim rolled back, other room untouched"
+
+    claims = await claims_of(first)
+    assert [(start, end) for _, start, end, _ in claims] == [
+        (at(2).replace(tzinfo=None), at(2, 15).replace(tzinfo=None)),
+        (at(2, 15).replace(tzinfo=None), at(2, 20).replace(tzinfo=None))
+    ], "claims are the exact booking range split along the grid"
+    print("✅ Adjacent off-grid bookings fit, overlaps rejected and rolled back")
+
+
+async def test_concurrent_claims():
+    """Of many simultaneous claims for overlapping ranges exactly one wins."""
+    await collection().delete_many({})
+    booking_ids = [ObjectId() for _ in range(20)]
+    results = await asyncio.gather(*(
+        claim_room_slots(ROOM_ID, at(9, 5 * (i % 3)), at(10, 5 * (i % 3)), booking_id)
+        for i, booking_id in enumerate(booking_ids)
+    ))
+
+    winners = [booking_id for booking_id, (reserved, _) in zip(booking_ids, results) if reserved]
+    assert len(winners) == 1, f"{len(winners)} winners"
+    assert all(holder == winners[0] for reserved, holder in results if not reserved)
+    for booking_id in booking_ids:
+        if booking_id != winners[0]:
+            assert await claims_of(booking_id) == [], "losers leave no claims behind"
+    print("✅ Concurrent claims: one winner, losers rolled back")
+
+
+async def test_move_and_release():
+    """A move may overlap the booking's own range, frees the old range and fails without losing it."""
+    await collection().delete_many({})
+    booking_id, other_id, later_id = ObjectId(), ObjectId(), ObjectId()
+    assert (await claim_room_slots(ROOM_ID, at(9), at(10), booking_id))[0]
+    assert (await claim_room_slots(ROOM_ID, at(11), at(12), other_id))[0]
+
+    assert await move_room_slots(booking_id, ROOM_ID, at(9, 30), at(10, 30)) == (True, None)
+    assert (await claim_room_slots(ROOM_ID, at(9), at(9, 30), later_id))[0], "old range freed"
+    before = await claims_of(booking_id)
+
+    reserved, holder = await move_room_slots(booking_id, ROOM_ID, at(10, 30), at(11, 30))
+    assert not reserved and holder == other_id
+    assert await claims_of(booking_id) == before, "failed move keeps the old claims"
+
+    assert await move_room_slots(booking_id, OTHER_ROOM_ID, at(11), at(12)) == (True, None)
+    assert {room_id for room_id, _, _, _ in await claims_of(booking_id)} == {OTHER_ROOM_ID}
+
+    await release_room_slots(booking_id)
+    assert await claims_of(booking_id) == []
+    assert (await claim_room_slots(OTHER_ROOM_ID, at(11), at(12), later_id))[0], "released range is free"
+    print("✅ Moves overlap their own range, failed moves keep claims, release frees them")
+
+
+async def test_backfill():
+    """The backfill replaces old-layout claims, records overlapping legacy bookings, and is idempotent."""
+    await collection().delete_many({})
+    await Booking.get_motor_collection().delete_many({})
+    booking = await insert_booking(at(13), at(14, 10))
+    overlapping = await insert_booking(at(14), at(15))
+    # Old layout: one document per slot holding a single booking_id
+    await collection().insert_one({
+        "room_id": ROOM_ID,
+        "slot_start": at(13).replace(tzinfo=None),
+        "booking_id": booking.id,
+        "expires_at": at(23).replace(tzinfo=None)
+    })
+
+    await backfill_room_slots()
+    assert await collection().count_documents({"claims": {"$exists": False}}) == 0, "old layout removed"
+    first_run = {booking_id: await claims_of(booking_id) for booking_id in (booking.id, overlapping.id)}
+    assert len(first_run[booking.id]) == 5 and len(first_run[overlapping.id]) == 4
+
+    await backfill_room_slots()
+    assert {booking_id: await claims_of(booking_id) for booking_id in first_run} == first_run, "second run changes nothing"
+
+    reserved, holder = await claim_room_slots(ROOM_ID, at(14, 5), at(14, 20), ObjectId())
+    assert not reserved and holder in (booking.id, overlapping.id), "backfilled bookings guard their range"
+    print("✅ Backfill replaces old claims, records legacy overlaps, runs once")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Room slot reservation")
+    print("=" * 60)
+
+    settings.MONGODB_DB_NAME = TEST_DB_NAME
+    await connect_to_mongo()
+    await database.client.drop_database(TEST_DB_NAME)
+    await init_beanie_models([Booking, RoomSlot])
+
+    passed = True
+    try:
+        for test in (test_adjacent_off_grid_bookings, test_concurrent_claims, test_move_and_release, test_backfill):
+            try:
+                await test()
+            except Exception as e:
+                passed = False
+                print(f"❌ {test.__name__} failed: {e!r}")
+    finally:
+        await database.client.drop_database(TEST_DB_NAME)
+        await close_mongo_connection()
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,93 @@
+"""
+Behaviour checks for the scheduler's job processing: slow (synchronous) job
+store calls must not block the event loop, and jobs still run on it.
+
+Runs offline, with an in-memory job store that sleeps like a MongoDB round trip.
+
+Usage:
+    python test_scheduler_jobstore.py
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.jobstores.memory import MemoryJobStore
+
+from app.services.scheduler_service import ThreadedJobStoreScheduler
+
+
+STORE_DELAY_SECONDS = 0.3
+
+
+class SlowJobStore(MemoryJobStore):
+    """Memory job store whose due-job lookups and updates block like pymongo calls."""
+
+    def get_due_jobs(self, now):
+        time.sleep(STORE_DELAY_SECONDS)
+        return super().get_due_jobs(now)
+
+    def update_job(self, job):
+        time.sleep(STORE_DELAY_SECONDS)
+        super().update_job(job)
+
+
+async def test_event_loop_not_blocked():
+    """Wakeups and due jobs are processed while the event loop keeps serving other tasks."""
+    scheduler = ThreadedJobStoreScheduler()
+    scheduler.add_jobstore(SlowJobStore(), alias="slow")
+    ran = asyncio.Event()
+    runs = []
+
+    async def job():
+        runs.append(asyncio.get_running_loop())
+        ran.set()
+
+    scheduler.start()
+    try:
+        for _ in range(5):
+            scheduler.wakeup()
+        scheduler.add_job(
+            job,
+            'date',
+            run_date=datetime.now(timezone.utc) + timedelta(seconds=0.2),
+            jobstore="slow"
+        )
+
+        # Tick the loop while the scheduler works; each tick must come back promptly
+        longest_tick = 0.0
+        deadline = time.monotonic() + 5
+        while not ran.is_set() and time.monotonic() < deadline:
+            started = time.monotonic()
+            await asyncio.sleep(0.01)
+            longest_tick = max(longest_tick, time.monotonic() - started)
+
+        assert ran.is_set(), "job did not run"
+        assert runs == [asyncio.get_running_loop()], "job runs once, on the event loop"
+        assert longest_tick < STORE_DELAY_SECONDS / 2, f"event loop blocked for {longest_tick:.2f}s"
+    finally:
+        scheduler.shutdown(wait=False)
+        await asyncio.sleep(0)
+    print(f"✅ Job store calls off the event loop (longest tick {longest_tick * 1000:.0f} ms)")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Scheduler job processing")
+    print("=" * 60)
+
+    passed = True
+    for test in (test_event_loop_not_blocked,):
+        try:
+            await test()
+        except Exception as e:
+            passed = False
+            print(f"❌ {test.__name__} failed: {e!r}")
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,108 @@
+"""
+Behaviour checks for the Telegram send queue: per-chat order and coalescing,
+flood control (RetryAfter) and a bad message inside a coalesced batch.
+
+Runs offline against a fake bot.
+
+Usage:
+    python test_telegram_send_queue.py
+"""
+import asyncio
+import sys
+import time
+
+from telegram.error import BadRequest, RetryAfter
+
+from app.services.telegram_send_queue import TelegramSendQueue
+
+
+class FakeBot:
+    """Records sent messages; raises the queued errors first."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.sent = []
+        self.errors = []
+
+    async def send_message(self, chat_id: int, text: str, parse_mode=None):
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        if "BAD" in text:
+            raise BadRequest("Can't parse entities")
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+async def test_order_and_coalescing():
+    """Messages queued while a chat is busy go out in order, merged into fewer requests."""
+    bot = FakeBot()
+    queue = TelegramSendQueue(bot, chat_messages_per_minute=600, chat_burst=1, coalesce_max_messages=3)
+    try:
+        await asyncio.gather(*(queue.send(1, f"m{i}") for i in range(7)), queue.send(2, "other"))
+    finally:
+        await queue.stop()
+
+    chat_texts = [text for chat_id, text, _ in bot.sent if chat_id == 1]
+    assert "\n\n".join(chat_texts).split("\n\n") == [f"m{i}" for i in range(7)], "order kept"
+    assert len(chat_texts) < 7 and all(text.count("\n\n") < 3 for text in chat_texts), chat_texts
+    assert (2, "other") in [(chat_id, text) for chat_id, text, _ in bot.sent], "other chat served"
+    metrics = queue.get_metrics()
+    assert metrics["sent"] == 8 and metrics["coalesced"] == 8 - len(bot.sent), metrics
+    print(f"✅ 7 messages delivered in order as {len(chat_texts)} requests")
+
+
+async def test_retry_after_pauses_chat():
+    """Flood control pauses the chat for retry_after and retries the message instead of failing it."""
+    bot = FakeBot(delay=0)
+    bot.errors.append(RetryAfter(1))
+    queue = TelegramSendQueue(bot)
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(queue.send(1, "hello"), timeout=5)
+    finally:
+        await queue.stop()
+
+    assert [text for _, text, _ in bot.sent] == ["hello"]
+    assert bot.sent[0][2] - started >= 1, "chat paused for retry_after"
+    assert queue.get_metrics()["retry_after"] == 1
+    print("✅ RetryAfter waited out, message retried")
+
+
+async def test_bad_message_in_batch():
+    """A message Telegram rejects fails alone; the messages merged with it are still delivered."""
+    bot = FakeBot()
+    queue = TelegramSendQueue(bot, chat_messages_per_minute=600, chat_burst=1, coalesce_max_messages=5)
+    try:
+        results = await asyncio.gather(
+            *(queue.send(1, text) for text in ("first", "a", "BAD", "b")),
+            return_exceptions=True
+        )
+    finally:
+        await queue.stop()
+
+    assert [type(result) for result in results] == [type(None), type(None), BadRequest, type(None)], results
+    delivered = "\n\n".join(text for _, text, _ in bot.sent).split("\n\n")
+    assert delivered == ["first", "a", "b"], delivered
+    print("✅ Bad message fails alone, the rest of its batch delivered")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Telegram send queue")
+    print("=" * 60)
+
+    passed = True
+    for test in (test_order_and_coalescing, test_retry_after_pauses_chat, test_bad_message_in_batch):
+        try:
+            await test()
+        except Exception as e:
+            passed = False
+            print(f"❌ {test.__name__} failed: {e!r}")
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,90 @@
+"""
+Behaviour checks for the Telegram webhook ingestion queue: submit returns
+without waiting for the handler, updates of one chat stay in order while
+chats run concurrently, redeliveries are dropped and a full queue refuses.
+
+Runs offline.
+
+Usage:
+    python test_webhook_queue.py
+"""
+import asyncio
+import sys
+import time
+
+from app.bot.update_queue import WebhookUpdateQueue
+
+
+def make_update(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {"message_id": update_id, "chat": {"id": chat_id}, "text": "/start"}}
+
+
+async def test_order_per_chat_and_concurrency():
+    """Each chat's updates are handled in order; different chats overlap."""
+    handled = []
+
+    async def handler(data):
+        await asyncio.sleep(0.05)
+        handled.append((data["message"]["chat"]["id"], data["update_id"]))
+
+    queue = WebhookUpdateQueue(workers=4, max_size=100)
+    queue.start(handler)
+    started = time.monotonic()
+    for update_id in range(20):
+        assert queue.submit(make_update(update_id, chat_id=update_id % 4))
+    submit_seconds = time.monotonic() - started
+    await queue.stop()
+    total_seconds = time.monotonic() - started
+
+    assert submit_seconds < 0.05, "submit does not wait for handlers"
+    assert total_seconds < 20 * 0.05 / 2, f"chats not handled concurrently ({total_seconds:.2f}s)"
+    assert len(handled) == 20
+    for chat_id in range(4):
+        update_ids = [update_id for chat, update_id in handled if chat == chat_id]
+        assert update_ids == sorted(update_ids), f"chat {chat_id} out of order"
+    print("✅ Immediate submit, chats concurrent, per-chat order kept")
+
+
+async def test_duplicates_and_full_queue():
+    """Redelivered update_ids are acknowledged but not handled again; a full queue refuses."""
+    handled = []
+    release = asyncio.Event()
+
+    async def handler(data):
+        await release.wait()
+        handled.append(data["update_id"])
+
+    queue = WebhookUpdateQueue(workers=1, max_size=2)
+    queue.start(handler)
+    assert queue.submit(make_update(1, chat_id=7))
+    await asyncio.sleep(0)  # Worker takes update 1 and blocks in the handler
+    assert queue.submit(make_update(1, chat_id=7)), "duplicate acknowledged"
+    assert queue.submit(make_update(2, chat_id=7)) and queue.submit(make_update(3, chat_id=7))
+    assert not queue.submit(make_update(4, chat_id=7)), "full queue refuses (Telegram retries)"
+
+    release.set()
+    await queue.stop()
+    assert handled == [1, 2, 3], handled
+    print("✅ Duplicates dropped, full queue refuses")
+
+
+async def main() -> bool:
+    print("=" * 60)
+    print("🧪 Webhook update queue")
+    print("=" * 60)
+
+    passed = True
+    for test in (test_order_per_chat_and_concurrency, test_duplicates_and_full_queue):
+        try:
+            await test()
+        except Exception as e:
+            passed = False
+            print(f"❌ {test.__name__} failed: {e!r}")
+
+    print("=" * 60)
+    print("✅ All checks passed" if passed else "❌ Some checks failed")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)